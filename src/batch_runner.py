@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Batch runner — solves a stream of knapsack instances (one JSON object per line)
+across long-lived worker processes and writes one JSON result line per instance.
+
+    python src/batch_runner.py instances.jsonl -o results/batch_results.jsonl --workers 8
+    cat instances.jsonl | python src/batch_runner.py - --as-completed
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+
+from models.knapsack_model_json import solve_knapsack_from_json
+from utils.logger import log_run, print_summary, flush_logs
+from utils.metrics import start_metrics_server
+from utils.worker_pool import WorkerPool
+
+# Extra wall-clock seconds granted past --timeout before an instance is reported as timed out
+TIMEOUT_GRACE = 2.0
+
+
+def solve_line(index, line, timeout=None, quiet=True):
+    """Worker: parse one JSONL instance, solve it and return a result record."""
+    start_time = time.time()
+    record = {"index": index}
+    try:
+        data = json.loads(line)
+        record["id"] = data.get("id", data.get("request_id"))
+        if timeout:
+            params = dict(data.get("parameters", {}))
+            params["timelimit"] = min(params.get("timelimit", timeout), timeout)
+            data["parameters"] = params
+
+        out = io.StringIO() if quiet else sys.stdout
+        with contextlib.redirect_stdout(out):
+            result = solve_knapsack_from_json(data)
+        record["status"] = "success" if result else "no_solution"
+        record["result"] = result
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed"] = round(time.time() - start_time, 3)
+    return record
+
+
+def warm_worker(backends=()):
+    """Worker initializer: import the solver stack (and any requested backends) once per worker."""
+    import models.knapsack_model_json  # noqa: F401
+    if "ortools" in backends:
+        from models.ortools_backend import load_ortools
+        load_ortools()
+    if "glpk" in backends:
+        try:
+            import models.glpk_backend  # noqa: F401
+        except ImportError:
+            pass  # pyomo missing: the glpk backend reports itself unsupported per solve
+
+
+def read_instances(source):
+    """Yield (index, line) pairs from a JSONL file path or '-' for stdin, skipping blank lines."""
+    stream = sys.stdin if source == "-" else open(source, "r")
+    try:
+        index = 0
+        for line in stream:
+            if line.strip():
+                yield index, line
+                index += 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def run_batch(source, output, workers=None, ordered=True, timeout=None, max_inflight=None, quiet=True,
+              warm_backends=()):
+    """
+    Stream instances from source through long-lived worker processes and write results to output.
+    - Workers keep their imports and caches across instances (utils/worker_pool.py);
+      warm_backends are preloaded once per worker.
+    - At most max_inflight instances are read and queued at a time (bounded memory).
+    - ordered=True writes results in input order, otherwise as they complete.
+    - timeout caps each instance's solver timelimit; a worker still running past
+      timeout + TIMEOUT_GRACE is killed and replaced, and its instance reported as "timeout".
+    Returns a summary dict with status counts and throughput.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * workers
+    if "fork" in mp.get_all_start_methods():
+        warm_worker(warm_backends)  # forked workers, replacements included, start with these imports
+    start_time = time.time()
+    counts = {}
+    queued = deque()   # (index, line) read but not started yet
+    running = {}       # worker -> (index, start time)
+    done_buffer = {}   # index -> record, for ordered output
+    next_to_write = 0
+    instances = read_instances(source)
+    exhausted = False
+    pool = WorkerPool(workers, initializer=warm_worker, initargs=(tuple(warm_backends),))
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as out:
+
+        def emit(record):
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        def finish(record):
+            nonlocal next_to_write
+            if not ordered:
+                emit(record)
+                return
+            done_buffer[record["index"]] = record
+            while next_to_write in done_buffer:
+                emit(done_buffer.pop(next_to_write))
+                next_to_write += 1
+
+        try:
+            while True:
+                # Keep the workers fed; in ordered mode also cap how far ahead of the writer we read
+                while not exhausted and len(queued) + len(running) < max_inflight and (
+                        not ordered or len(done_buffer) < max_inflight):
+                    item = next(instances, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    queued.append(item)
+                while queued and pool.idle:
+                    index, line = queued.popleft()
+                    worker = pool.acquire()
+                    worker.send(solve_line, index, line, timeout, quiet)
+                    running[worker] = (index, time.time())
+
+                if not running:
+                    break
+
+                for worker in pool.wait(running, timeout=0.5):
+                    index, _ = running.pop(worker)
+                    ok, record = worker.recv()
+                    if ok:
+                        pool.release(worker)
+                        finish(record)
+                    else:
+                        pool.replace(worker)
+                        finish({"index": index, "status": "error", "error": record})
+
+                now = time.time()
+                for worker, (index, started) in list(running.items()):
+                    if timeout and now > started + timeout + TIMEOUT_GRACE:
+                        running.pop(worker)
+                        pool.replace(worker)
+                        finish({"index": index, "status": "timeout", "elapsed": round(now - started, 3)})
+        finally:
+            pool.close(busy=running)
+
+    elapsed = round(time.time() - start_time, 3)
+    total = sum(counts.values())
+    summary = {
+        "mode": "batch",
+        "instances": total,
+        "counts": counts,
+        "workers": workers,
+        "runtime": elapsed,
+        "throughput_per_sec": round(total / elapsed, 2) if elapsed else None,
+        "status": "SUCCESS",
+    }
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a JSONL stream of knapsack instances in parallel.")
+    parser.add_argument("source", help="JSONL file with one instance per line, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="results/batch_results.jsonl", help="JSONL output path")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--as-completed", action="store_true", help="write results as they finish, not in input order")
+    parser.add_argument("--timeout", type=float, default=None, help="per-instance time limit in seconds")
+    parser.add_argument("--max-inflight", type=int, default=None, help="instances queued at once (default: 2 x workers)")
+    parser.add_argument("--verbose", action="store_true", help="show solver output from the workers")
+    parser.add_argument("--warm", default="", help="comma-separated backends to preload per worker: ortools,glpk")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="expose Prometheus metrics on this port (set PROMETHEUS_MULTIPROC_DIR for worker metrics)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("\n🧠 AI Optimizer Agent — Batch Runner")
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    summary = run_batch(
+        args.source, args.output, workers=args.workers, ordered=not args.as_completed,
+        timeout=args.timeout, max_inflight=args.max_inflight, quiet=not args.verbose,
+        warm_backends=[b for b in args.warm.split(",") if b],
+    )
+    print(f"\n📁 Results written to {args.output}")
+    print(f"📦 Instances: {summary['instances']} {summary['counts']} | "
+          f"⏱️ {summary['runtime']} sec | 🚀 {summary['throughput_per_sec']} instances/sec")
+    log_run(dict(summary))
+    flush_logs()
+    print_summary(summary)
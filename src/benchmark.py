@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite — runs every solve mode / exact backend on seeded synthetic
+instances (utils/instance_generators.py) and records wall time, peak memory
+and optimality gap per case. Results can be checked against a stored baseline.
+
+    python src/benchmark.py --sizes 10,100,1000 --modes heuristic,exact:dp,exact:cpsat
+    python src/benchmark.py --update-baseline            # store results/benchmarks/baseline.json
+    python src/benchmark.py --compare                    # exit 1 on regressions vs the baseline
+    python src/benchmark.py --startup-only               # CLI import-time budget check only
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from utils.instance_generators import INSTANCE_CLASSES, generate_instance
+
+DEFAULT_SIZES = (10, 100, 1000, 10_000, 100_000, 1_000_000)
+DEFAULT_MODES = (
+    "heuristic", "metaheuristic", "auto", "compare",
+    "exact:dp", "exact:cpsat", "exact:scip", "exact:bnb", "exact:glpk", "exact:persistent",
+)
+# Modes that build an exact model or run a long search; skipped above --max-exact-items
+EXPENSIVE_PREFIXES = ("exact", "metaheuristic", "auto", "compare")
+DEFAULT_OUTPUT = "results/benchmarks/latest.json"
+DEFAULT_BASELINE = "results/benchmarks/baseline.json"
+# A case regresses when it is this much slower (relative and absolute) or its gap grows by this much
+TIME_TOLERANCE = 0.25
+MIN_TIME_DELTA = 0.05
+GAP_TOLERANCE = 1e-3
+# Extra seconds past the solver timelimit before a case is killed
+CASE_GRACE = 10.0
+# Cold import of the CLI (main.py) must stay under this and must not pull in solver packages
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ("pyomo", "ortools", "prometheus_client")
+STARTUP_REPEATS = 5
+_STARTUP_PROBE = (
+    "import json, sys, time; t = time.perf_counter(); import main; "
+    "ms = (time.perf_counter() - t) * 1000; "
+    "print(json.dumps({'ms': ms, 'heavy': sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[1:]))}))"
+)
+
+
+def _rss_mb():
+    """Current resident set size in MB (falls back to the peak where /proc is missing)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB on Linux
+
+
+def run_case(kind, n, mode_spec, seed, timelimit):
+    """Generate one instance and solve it in this process; returns a result record."""
+    from models.knapsack_model_json import solve_knapsack_from_json, solve_compare
+
+    mode, _, backend = mode_spec.partition(":")
+    data = generate_instance(kind, n, seed=seed, solve_mode=mode, backend=backend or "auto")
+    data["parameters"].update(cache=False, timelimit=timelimit)
+    rss_start = _rss_mb()
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "compare":
+            result_exact, result = solve_compare(data)
+        else:
+            result_exact, result = None, solve_knapsack_from_json(data)
+    wall = time.perf_counter() - start_time
+
+    # Peak RSS above the post-generation level, i.e. the memory the solve itself added
+    record = {"status": "success" if result else "no_solution", "wall": round(wall, 4),
+              "peak_mb": round(max(0.0, _peak_rss_mb() - rss_start), 2)}
+    if result:
+        info = result.get("info", {})
+        record.update(value=result["value"], backend=info.get("backend"), timings=info.get("timings"),
+                      optimal=mode == "exact" and info.get("optimal", True),
+                      upper_bound=info.get("upper_bound"))
+        # A pinned backend that did not apply fell back to another; its timings are not that backend's
+        if mode == "exact" and backend and record["backend"] != backend:
+            record.update(status="unsupported", requested_backend=backend)
+    if result_exact:
+        record.update(reference_value=result_exact["value"],
+                      reference_optimal=result_exact.get("info", {}).get("optimal", True))
+    return record
+
+
+def _case_worker(conn, kind, n, mode_spec, seed, timelimit):
+    try:
+        record = run_case(kind, n, mode_spec, seed, timelimit)
+    except Exception as e:
+        record = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    conn.send(record)
+    conn.close()
+
+
+def run_isolated(kind, n, mode_spec, seed, timelimit):
+    """
+    Run one case in a fresh child process, so peak memory is per case and a
+    runaway solver can be killed after timelimit + CASE_GRACE.
+    """
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_case_worker, args=(child_conn, kind, n, mode_spec, seed, timelimit))
+    start_time = time.perf_counter()
+    proc.start()
+    child_conn.close()
+    try:
+        if parent_conn.poll(timelimit + CASE_GRACE):
+            return parent_conn.recv()
+        return {"status": "timeout", "wall": round(time.perf_counter() - start_time, 4)}
+    except EOFError:
+        return {"status": "error", "error": f"worker exited with code {proc.exitcode}"}
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+
+
+def measure_startup(repeats=STARTUP_REPEATS, budget_ms=IMPORT_BUDGET_MS):
+    """
+    Import main.py in fresh interpreters (best of `repeats`) and check it against
+    the import-time budget; heavy solver packages must not be imported at startup.
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")])))
+    runs = []
+    # A scratch cwd, so anything the import writes relative to it never lands in the tree
+    with tempfile.TemporaryDirectory() as scratch:
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE, *HEAVY_MODULES], cwd=scratch, env=env,
+                                 capture_output=True, text=True, check=True)
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["ms"])
+    return {
+        "import_ms": round(best["ms"], 2),
+        "budget_ms": budget_ms,
+        "heavy_modules": best["heavy"],
+        "within_budget": best["ms"] <= budget_ms and not best["heavy"],
+    }
+
+
+def fill_gaps(results):
+    """
+    Relative gap per case against the best proven optimum of the same instance.
+    When none is proven, the tightest upper bound any run reported is the
+    reference (so a timed-out exact run still shows its gap), and only without
+    one the best value any mode found.
+    """
+    by_instance = {}
+    for r in results:
+        by_instance.setdefault((r["class"], r["n"]), []).append(r)
+    for runs in by_instance.values():
+        proven = [r["value"] for r in runs if r.get("optimal")]
+        proven += [r["reference_value"] for r in runs if r.get("reference_optimal")]
+        bounds = [r["upper_bound"] for r in runs if r.get("upper_bound") is not None]
+        found = [r["value"] for r in runs if r.get("value") is not None]
+        if proven:
+            reference, kind = max(proven), "optimal"
+        elif bounds:
+            reference, kind = min(bounds), "upper_bound"
+        else:
+            reference, kind = max(found, default=None), "best_found"
+        for r in runs:
+            if r.get("value") is None or not reference:
+                continue
+            r["gap"] = round(max(0.0, (reference - r["value"]) / abs(reference)), 6)
+            r["gap_reference"] = kind
+
+
+def run_suite(classes, sizes, modes, seed=0, timelimit=10, max_exact_items=10_000, log=print):
+    results = []
+    for kind in classes:
+        for n in sizes:
+            for mode_spec in modes:
+                case = {"case": f"{kind}/{n}/{mode_spec}", "class": kind, "n": n, "mode": mode_spec}
+                if n > max_exact_items and mode_spec.startswith(EXPENSIVE_PREFIXES):
+                    results.append(dict(case, status="skipped"))
+                    continue
+                record = run_isolated(kind, n, mode_spec, seed, timelimit)
+                results.append(dict(case, **record))
+                log(f"   {case['case']:<48} {record['status']:<11} {record.get('wall', '-'):>9} s "
+                    f"{record.get('peak_mb', '-'):>9} MB")
+    fill_gaps(results)
+    return results
+
+
+def compare_to_baseline(results, baseline, time_tolerance=TIME_TOLERANCE, min_time_delta=MIN_TIME_DELTA,
+                        gap_tolerance=GAP_TOLERANCE):
+    """List of regressions: cases that got slower, lost quality or stopped succeeding."""
+    previous = {r["case"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = previous.get(r["case"])
+        if old is None or old["status"] == "skipped" or r["status"] == "skipped":
+            continue
+        if old["status"] == "success" and r["status"] != "success":
+            regressions.append({"case": r["case"], "kind": "status", "baseline": old["status"], "current": r["status"]})
+            continue
+        # A fallback ran a different backend than the case names; its time and gap are not comparable
+        if "unsupported" in (old["status"], r["status"]):
+            continue
+        if r.get("wall") is not None and old.get("wall") is not None:
+            delta = r["wall"] - old["wall"]
+            if delta > min_time_delta and delta > time_tolerance * old["wall"]:
+                regressions.append({"case": r["case"], "kind": "time", "baseline": old["wall"], "current": r["wall"]})
+        if r.get("gap") is not None and old.get("gap") is not None and r["gap"] > old["gap"] + gap_tolerance:
+            regressions.append({"case": r["case"], "kind": "gap", "baseline": old["gap"], "current": r["gap"]})
+    return regressions
+
+
+def _write_json(path, payload):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, default=str)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every solve mode on synthetic knapsack instances.")
+    parser.add_argument("--classes", default=",".join(INSTANCE_CLASSES), help="comma-separated instance classes")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated item counts")
+    parser.add_argument("--modes", default=",".join(DEFAULT_MODES),
+                        help="comma-separated solve modes; exact:<backend> pins an exact backend")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timelimit", type=float, default=10, help="solver time limit per case in seconds")
+    parser.add_argument("--max-exact-items", type=int, default=10_000,
+                        help="skip exact / metaheuristic / auto / compare cases above this many items")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="JSON results path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="stored baseline to compare against")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline, exit 1 on regressions")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--startup-only", action="store_true", help="only run the CLI import-time budget check")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("\n🧠 AI Optimizer Agent — Benchmark Suite")
+    startup = measure_startup()
+    print(f"🚀 CLI import: {startup['import_ms']} ms (budget {startup['budget_ms']} ms)"
+          + (f", loaded {startup['heavy_modules']}" if startup["heavy_modules"] else ""))
+    if args.startup_only:
+        sys.exit(0 if startup["within_budget"] else 1)
+
+    results = run_suite(
+        [c for c in args.classes.split(",") if c], [int(s) for s in args.sizes.split(",") if s],
+        [m for m in args.modes.split(",") if m], seed=args.seed, timelimit=args.timelimit,
+        max_exact_items=args.max_exact_items,
+    )
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "seed": args.seed,
+            "timelimit": args.timelimit,
+        },
+        "startup": startup,
+        "results": results,
+    }
+    _write_json(args.output, payload)
+    print(f"\n📁 Benchmark results written to {args.output}")
+
+    if args.update_baseline:
+        _write_json(args.baseline, payload)
+        print(f"📌 Baseline updated: {args.baseline}")
+    elif args.compare:
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read baseline {args.baseline}: {e}")
+            sys.exit(2)
+        regressions = compare_to_baseline(results, baseline)
+        if not startup["within_budget"]:
+            regressions.append({"case": "startup", "kind": "import", "baseline": startup["budget_ms"],
+                                "current": startup["import_ms"]})
+        for reg in regressions:
+            print(f"📉 {reg['case']}: {reg['kind']} {reg['baseline']} → {reg['current']}")
+        print(f"{'❌' if regressions else '✅'} {len(regressions)} regression(s) vs {args.baseline}")
+        sys.exit(1 if regressions else 0)
@@ -1,71 +1,92 @@
 import time
+import numpy as np
+from heuristics.local_search import local_search
+from models.constraint_index import RuleState
+from models.item_table import as_table
+from utils.incumbents import report_incumbent, stop_requested
 
-def greedy_knapsack(items, capacity, budget=None, mandatory_items=None):
+# Item count from which engine="auto" switches to the NumPy passes
+NUMPY_MIN_ITEMS = 2000
+# Window size used when scanning past the break item for items that still fit
+TAIL_CHUNK = 4096
+
+
+def greedy_knapsack(items, capacity, budget=None, mandatory_items=None, engine="auto",
+                    local_search_strategy="first", rules=None, time_limit=None):
     """
     Multi-pass, self-repairing greedy heuristic with local improvement.
     - Runs three greedy strategies (value/weight, value/cost, hybrid).
     - Repairs infeasible mandatory sets.
     - Applies small local search to refine results.
     - Returns the best solution found among passes.
+    - engine: "python", "numpy" or "auto" (NumPy for large item lists).
+    - local_search_strategy: "first", "best" or "none".
+    - time_limit: seconds for the whole heuristic; local search stops with what it
+      has once they are used up (None: until no move improves).
+    - rules: compiled ConstraintIndex; when it carries any rule, the rule-aware
+      group engine is used.
     """
 
+    table = as_table(items)
+    if rules is not None and rules.has_rules:
+        return greedy_knapsack_rules(table, capacity, budget, mandatory_items, rules, local_search_strategy,
+                                     time_limit)
+    if engine == "numpy" or (engine == "auto" and len(table) >= NUMPY_MIN_ITEMS):
+        return greedy_knapsack_numpy(table, capacity, budget, mandatory_items, local_search_strategy, time_limit)
+
     start_time = time.time()
-    mandatory_items = set(mandatory_items or [])
-    item_lookup = {i["name"]: i for i in items}
+    n = len(table)
+    values, weights, costs = table.values.tolist(), table.weights.tolist(), table.costs.tolist()
+    mandatory = np.flatnonzero(table.mask(mandatory_items)).tolist()
+    excludes = [[] for _ in range(n)]
+    for k, j in table.exclusive.tolist():
+        excludes[k].append(j)
 
-    def single_pass(score_func):
-        """Run one greedy pass using a given score function."""
-        selected = set()
+    def single_pass(score):
+        """Run one greedy pass using the given per-item scores."""
+        selected = [False] * n
         total_value = total_weight = total_cost = 0
 
         # Add mandatory items first
-        for m in mandatory_items:
-            if m in item_lookup:
-                item = item_lookup[m]
-                total_weight += item["weight"]
-                total_cost += item["cost"]
-                total_value += item["value"]
-                selected.add(m)
+        for k in mandatory:
+            total_weight += weights[k]
+            total_cost += costs[k]
+            total_value += values[k]
+            selected[k] = True
 
         # Skip if mandatory already infeasible
         if capacity and total_weight > capacity or (budget and total_cost > budget):
             return selected, total_value, total_weight, total_cost
 
-        # Compute scores
-        sorted_items = sorted(
-            [i for i in items if i["name"] not in selected],
-            key=score_func,
-            reverse=True
-        )
-
-        for item in sorted_items:
-            name = item["name"]
-            if any(e in selected for e in item.get("exclusive", [])):
+        for k in sorted((k for k in range(n) if not selected[k]), key=score.__getitem__, reverse=True):
+            if any(selected[j] for j in excludes[k]):
                 continue
-            if capacity and total_weight + item["weight"] > capacity:
+            if capacity and total_weight + weights[k] > capacity:
                 continue
-            if budget and (total_cost + item["cost"] > budget):
+            if budget and (total_cost + costs[k] > budget):
                 continue
 
-            selected.add(name)
-            total_weight += item["weight"]
-            total_cost += item["cost"]
-            total_value += item["value"]
+            selected[k] = True
+            total_weight += weights[k]
+            total_cost += costs[k]
+            total_value += values[k]
 
         return selected, total_value, total_weight, total_cost
 
     # ------------------ Step 1: Run multiple greedy passes ------------------
     print("\n⚙️ Running Multi-Pass Greedy Heuristic...")
 
-    def vw_ratio(x): return x["value"] / max(1e-9, x["weight"])
-    def vc_ratio(x): return x["value"] / max(1e-9, x["cost"])
-    def hybrid_ratio(x): return x["value"] / (0.5 * x["weight"] + 0.5 * x["cost"])
-
-    passes = {
-        "value/weight": single_pass(vw_ratio),
-        "value/cost": single_pass(vc_ratio),
-        "hybrid": single_pass(hybrid_ratio),
+    scorers = {
+        "value/weight": lambda: [v / max(1e-9, w) for v, w in zip(values, weights)],
+        "value/cost": lambda: [v / max(1e-9, c) for v, c in zip(values, costs)],
+        "hybrid": lambda: [v / max(1e-9, 0.5 * w + 0.5 * c) for v, w, c in zip(values, weights, costs)],
     }
+    passes = {}
+    for name, scorer in scorers.items():
+        passes[name] = sel, val, wt, cst = single_pass(scorer())
+        if _fits(wt, cst, capacity, budget) and report_incumbent(
+                val, source=f"greedy:{name}", selected=lambda: table.select(np.array(sel, dtype=bool))):
+            break
 
     # ------------------ Step 2: Pick the best result ------------------
     best_name, (best_sel, best_val, best_wt, best_cost) = max(
@@ -74,38 +95,280 @@ def greedy_knapsack(items, capacity, budget=None, mandatory_items=None):
     print(f"🏁 Best pass: {best_name} (Value = {best_val:.2f})")
 
     # ------------------ Step 3: Local improvement ------------------
-    non_selected = [i["name"] for i in items if i["name"] not in best_sel]
-    improved = True
-    while improved:
-        improved = False
-        for s in list(best_sel):
-            for n in list(non_selected):
-                s_item = item_lookup[s]
-                n_item = item_lookup[n]
-
-                new_weight = best_wt - s_item["weight"] + n_item["weight"]
-                new_cost = best_cost - s_item["cost"] + n_item["cost"]
-                new_value = best_val - s_item["value"] + n_item["value"]
-
-                # Check feasibility and improvement
-                if (capacity and new_weight > capacity) or (budget and new_cost > budget):
-                    continue
-                if new_value > best_val:
-                    best_sel.remove(s)
-                    best_sel.add(n)
-                    best_val, best_wt, best_cost = new_value, new_weight, new_cost
-                    non_selected.remove(n)
-                    non_selected.append(s)
-                    improved = True
-                    print(f"🔄 Local swap improved solution: replaced {s} with {n}")
-                    break
-            if improved:
-                break
+    ls_info = None
+    best_sel = np.array(best_sel, dtype=bool)
+    if local_search_strategy != "none" and not stop_requested():
+        sel, ls_info = run_local_search(table, best_sel, capacity, budget, mandatory_items, local_search_strategy,
+                                        time_limit=_remaining(time_limit, start_time))
+        if any(ls_info["moves"].values()):
+            best_sel = sel
+            best_val, best_wt, best_cost = table.totals(best_sel)
+
+    runtime = round(time.time() - start_time, 3)
+    print(f"⏱️ Heuristic runtime: {runtime} sec")
+    print(f"✅ Final Value: {best_val:.2f}, Weight: {best_wt}/{capacity}, Cost: {best_cost}/{budget}")
+
+    info = {"mandatory_dropped": False, "best_pass": best_name, "runtime": runtime, "engine": "python"}
+    if ls_info:
+        info["local_search"] = ls_info
+
+    return table.select(best_sel), best_val, best_wt, best_cost, info
+
+
+def _fits(weight, cost, capacity, budget):
+    return (not capacity or weight <= capacity) and (not budget or cost <= budget)
+
+
+def _remaining(time_limit, start_time):
+    """Seconds of time_limit left since start_time (None when there is no limit)."""
+    return None if time_limit is None else max(0.0, time_limit - (time.time() - start_time))
+
+
+def run_local_search(table, in_best, capacity, budget, mandatory_items, strategy, locked=None, time_limit=None):
+    """Run the neighbourhood search on a greedy solution, keeping mandatory items locked."""
+    if locked is None:
+        locked = table.mask(mandatory_items)
+    sel, stats = local_search(table.values, table.weights, table.costs, in_best, capacity, budget,
+                              locked=locked, strategy=strategy, time_limit=time_limit)
+    moves = stats["moves"]
+    if any(moves.values()):
+        print(f"🔄 Local search improved solution: {moves['swap']} swaps, {moves['add']} adds, "
+              f"{moves['drop']} drops in {stats['time']} sec")
+    return sel, stats
+
+
+def greedy_knapsack_numpy(items, capacity, budget=None, mandatory_items=None, local_search_strategy="first",
+                          time_limit=None):
+    """
+    NumPy-backed variant of greedy_knapsack for large item lists.
+    Runs greedy_knapsack_arrays on the ItemTable columns.
+    Returns the same (selected, value, weight, cost, info) tuple.
+    """
+
+    table = as_table(items)
+    best_mask, best_val, best_wt, best_cost, info = greedy_knapsack_arrays(
+        table.values, table.weights, table.costs, capacity, budget, table.mask(mandatory_items),
+        table.exclusive_blocks(), local_search_strategy, time_limit
+    )
+    return table.select(best_mask), best_val, best_wt, best_cost, info
+
+
+def greedy_knapsack_arrays(values, weights, costs, capacity, budget=None, mandatory=None, blocked_by=None,
+                           local_search_strategy="first", time_limit=None):
+    """
+    Array-native NumPy greedy engine; works directly on (memory-mapped) columns.
+    - Scores all three passes in one batch and orders them with a single argsort.
+    - Takes each pass's fitting prefix via cumsum, then scans the tail in chunks.
+    - mandatory: boolean mask of items fixed in first.
+    - blocked_by: {j: [k, ...]} -- picking item j blocks items k (exclusivity).
+    - Returns (selected mask, value, weight, cost, info).
+    """
+
+    start_time = time.time()
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    costs = np.asarray(costs, dtype=float)
+    n = len(values)
+    blocked_by = blocked_by or {}
+    cap_limit = capacity if capacity else np.inf
+    budget_limit = budget if budget else np.inf
+
+    has_rule = np.zeros(n, dtype=bool)
+    for j, ks in blocked_by.items():
+        has_rule[j] = True
+        has_rule[ks] = True
+
+    # Mandatory items first
+    base = np.zeros(n, dtype=bool) if mandatory is None else np.asarray(mandatory, dtype=bool).copy()
+    base_blocked = np.zeros(n, dtype=bool)
+    for j in np.flatnonzero(base):
+        base_blocked[blocked_by.get(j, [])] = True
+    base_val, base_wt, base_cost = values[base].sum(), weights[base].sum(), costs[base].sum()
+    mandatory_ok = base_wt <= cap_limit and base_cost <= budget_limit
+
+    def single_pass(order):
+        """Run one greedy pass over a precomputed item order."""
+        chosen = base.copy()
+        if not mandatory_ok:
+            return chosen
+        order = order[~base[order]]
+        w, c = weights[order], costs[order]
+        rem_w, rem_c = cap_limit - base_wt, budget_limit - base_cost
+
+        # Prefix that fits outright and is untouched by exclusivity rules
+        fits = (np.cumsum(w) <= rem_w) & (np.cumsum(c) <= rem_c) & ~np.cumsum(has_rule[order]).astype(bool)
+        pos = len(order) if fits.all() else int(np.argmin(fits))
+        chosen[order[:pos]] = True
+        rem_w -= w[:pos].sum()
+        rem_c -= c[:pos].sum()
+
+        # Tail: jump to the next item that still fits
+        blocked = base_blocked.copy()
+        min_w = np.minimum.accumulate(w[::-1])[::-1]
+        min_c = np.minimum.accumulate(c[::-1])[::-1]
+        while pos < len(order) and min_w[pos] <= rem_w and min_c[pos] <= rem_c:
+            window = order[pos:pos + TAIL_CHUNK]
+            fit = (weights[window] <= rem_w) & (costs[window] <= rem_c) & ~blocked[window]
+            k = int(np.argmax(fit))
+            if not fit[k]:
+                pos += len(window)
+                continue
+            j = window[k]
+            chosen[j] = True
+            rem_w -= weights[j]
+            rem_c -= costs[j]
+            blocked[blocked_by.get(j, [])] = True
+            pos += k + 1
+        return chosen
+
+    # ------------------ Step 1: Score and order all passes at once ------------------
+    print("\n⚙️ Running Multi-Pass Greedy Heuristic (NumPy engine)...")
+    pass_names = ["value/weight", "value/cost", "hybrid"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.vstack([
+            values / np.maximum(1e-9, weights),
+            values / np.maximum(1e-9, costs),
+            values / np.maximum(1e-9, 0.5 * weights + 0.5 * costs),
+        ])
+    orders = np.argsort(-scores, axis=1, kind="stable")
+    passes = {}
+    for name, order in zip(pass_names, orders):
+        passes[name] = chosen = single_pass(order)
+        if mandatory_ok and report_incumbent(values[chosen].sum(), source=f"greedy:{name}"):
+            break
+
+    # ------------------ Step 2: Pick the best result ------------------
+    best_name, best_mask = max(passes.items(), key=lambda kv: values[kv[1]].sum())
+    best_val = values[best_mask].sum()
+    print(f"🏁 Best pass: {best_name} (Value = {best_val:.2f})")
+
+    # ------------------ Step 3: Local improvement ------------------
+    ls_info = None
+    if local_search_strategy != "none" and not stop_requested():
+        sel, ls_info = local_search(values, weights, costs, best_mask, capacity, budget, locked=base,
+                                    strategy=local_search_strategy, time_limit=_remaining(time_limit, start_time))
+        moves = ls_info["moves"]
+        if any(moves.values()):
+            best_mask = sel
+            print(f"🔄 Local search improved solution: {moves['swap']} swaps, {moves['add']} adds, "
+                  f"{moves['drop']} drops in {ls_info['time']} sec")
+    best_val = float(values[best_mask].sum())
+    best_wt = float(weights[best_mask].sum())
+    best_cost = float(costs[best_mask].sum())
+
+    runtime = round(time.time() - start_time, 3)
+    print(f"⏱️ Heuristic runtime: {runtime} sec")
+    print(f"✅ Final Value: {best_val:.2f}, Weight: {best_wt}/{capacity}, Cost: {best_cost}/{budget}")
+
+    info = {"mandatory_dropped": False, "best_pass": best_name, "runtime": runtime, "engine": "numpy"}
+    if ls_info:
+        info["local_search"] = ls_info
+
+    return best_mask, best_val, best_wt, best_cost, info
+
+
+def greedy_knapsack_rules(items, capacity, budget, mandatory_items, rules, local_search_strategy="first",
+                          time_limit=None):
+    """
+    Rule-aware variant of greedy_knapsack working on dependency groups.
+    - Each all-or-nothing dependency group is scored and added as one unit.
+    - Exclusivity and category limits are checked through a RuleState in O(1) per group.
+    - Category minimums are filled first with the best-scoring groups of each category.
+    - Returns the same (selected, value, weight, cost, info) tuple.
+    """
+
+    start_time = time.time()
+    table = as_table(items)
+    values, weights, costs = table.values, table.weights, table.costs
+    gv, gw, gc = rules.group_sums(values), rules.group_sums(weights), rules.group_sums(costs)
+    cap_limit = capacity if capacity else np.inf
+    budget_limit = budget if budget else np.inf
+
+    mandatory_groups = np.unique(rules.group_of[table.mask(mandatory_items)]).tolist()
+    locked = np.zeros(rules.num_groups, dtype=bool)
+    locked[mandatory_groups] = True
+    locked |= rules.mixed
+
+    def single_pass(order):
+        """Run one greedy pass over groups in the given order."""
+        state = RuleState(rules)
+        rem_w, rem_c = cap_limit, budget_limit
+        for g in mandatory_groups:
+            state.add(g)
+            rem_w -= gw[g]
+            rem_c -= gc[g]
+        if rem_w < 0 or rem_c < 0:
+            return state
+
+        def try_add(g):
+            nonlocal rem_w, rem_c
+            if gw[g] <= rem_w and gc[g] <= rem_c and state.can_add(g):
+                state.add(g)
+                rem_w -= gw[g]
+                rem_c -= gc[g]
+
+        # Category minimums first, best-scoring groups of each short category
+        if np.any(state.cat_count < rules.cat_min):
+            for g in order:
+                if any(state.cat_count[c] < rules.cat_min[c] for c, _ in rules.group_cats[g]):
+                    try_add(g)
+                    if not np.any(state.cat_count < rules.cat_min):
+                        break
+
+        for g in order:
+            try_add(g)
+        return state
+
+    # ------------------ Step 1: Run multiple greedy passes ------------------
+    print("\n⚙️ Running Multi-Pass Greedy Heuristic (rule-aware groups)...")
+    pass_names = ["value/weight", "value/cost", "hybrid"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.vstack([
+            gv / np.maximum(1e-9, gw),
+            gv / np.maximum(1e-9, gc),
+            gv / np.maximum(1e-9, 0.5 * gw + 0.5 * gc),
+        ])
+    orders = np.argsort(-scores, axis=1, kind="stable")
+    passes = {}
+    for name, order in zip(pass_names, orders):
+        passes[name] = state = single_pass(order.tolist())
+        groups = state.selected
+        if (_fits(gw[groups].sum(), gc[groups].sum(), capacity, budget)
+                and not np.any(state.cat_count < rules.cat_min)
+                and report_incumbent(gv[groups].sum(), source=f"greedy:{name}",
+                                     selected=lambda: table.select(np.isin(rules.group_of, np.flatnonzero(groups))))):
+            break
+
+    # ------------------ Step 2: Pick the best result ------------------
+    best_name, best_state = max(passes.items(), key=lambda kv: gv[kv[1].selected].sum())
+    print(f"🏁 Best pass: {best_name} (Value = {gv[best_state.selected].sum():.2f})")
+
+    # ------------------ Step 3: Local improvement ------------------
+    ls_info = None
+    best_groups = best_state.selected.copy()
+    if local_search_strategy != "none" and not stop_requested():
+        best_groups, ls_info = local_search(
+            gv, gw, gc, best_groups, capacity, budget, locked=locked,
+            strategy=local_search_strategy, time_limit=_remaining(time_limit, start_time), rules=best_state
+        )
+        moves = ls_info["moves"]
+        if any(moves.values()):
+            print(f"🔄 Local search improved solution: {moves['swap']} swaps, {moves['add']} adds, "
+                  f"{moves['drop']} drops in {ls_info['time']} sec")
 
+    chosen = np.isin(rules.group_of, np.flatnonzero(best_groups))
+    best_val = float(values[chosen].sum())
+    best_wt = float(weights[chosen].sum())
+    best_cost = float(costs[chosen].sum())
     runtime = round(time.time() - start_time, 3)
     print(f"⏱️ Heuristic runtime: {runtime} sec")
     print(f"✅ Final Value: {best_val:.2f}, Weight: {best_wt}/{capacity}, Cost: {best_cost}/{budget}")
 
-    info = {"mandatory_dropped": False, "best_pass": best_name, "runtime": runtime}
+    info = {"mandatory_dropped": False, "best_pass": best_name, "runtime": runtime, "engine": "rules",
+            "constraint_index": rules.summary()}
+    if np.any(best_state.cat_count < rules.cat_min):
+        info["category_minimums_met"] = False
+    if ls_info:
+        info["local_search"] = ls_info
 
-    return list(best_sel), best_val, best_wt, best_cost, info
+    return table.select(chosen), best_val, best_wt, best_cost, info
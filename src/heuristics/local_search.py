@@ -0,0 +1,231 @@
+import time
+import numpy as np
+from utils.profiling import add_phase
+from utils.incumbents import report_incumbent
+
+
+def local_search(values, weights, costs, selected, capacity=None, budget=None, locked=None,
+                 strategy="first", max_moves=None, time_limit=None, rules=None):
+    """
+    Delta-evaluated add / drop / swap neighbourhood search.
+    - Keeps all items sorted by weight and by cost once; the slack of each move
+      turns into a searchsorted prefix of candidates instead of a full scan.
+    - strategy="first" applies the first improving move and keeps sweeping,
+      strategy="best" applies the best move of each sweep. Each selected item's
+      best swap is cached with the slack it was found at; after a move only the
+      entries the move can have changed are re-evaluated (see refresh_swaps).
+    - Locked (mandatory) items are never dropped or swapped out.
+    - rules: optional RuleState (models.constraint_index) kept in sync with the
+      selection; candidates are filtered through its vectorized insert_mask.
+    - Every applied move is reported as an incumbent (utils/incumbents.py) while the
+      selection is feasible; the search stops early when the tracker asks it to.
+    - Returns (selected mask, stats) where stats holds move counts and time.
+    """
+
+    start_time = time.time()
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    costs = np.asarray(costs, dtype=float)
+    sel = np.asarray(selected, dtype=bool).copy()
+    locked = np.zeros(len(sel), dtype=bool) if locked is None else np.asarray(locked, dtype=bool)
+    cap_limit = capacity if capacity else np.inf
+    budget_limit = budget if budget else np.inf
+
+    by_weight = np.argsort(weights, kind="stable")
+    by_cost = np.argsort(costs, kind="stable")
+    sorted_w = weights[by_weight]
+    sorted_c = costs[by_cost]
+
+    slack_w = cap_limit - weights[sel].sum()
+    slack_c = budget_limit - costs[sel].sum()
+    current = values[sel].sum()
+    moves = {"add": 0, "drop": 0, "swap": 0}
+    evaluations = 0
+    stopped = False
+
+    # Best-improvement cache: per selected item, its best swap-in partner (-1: none)
+    # and the slack it was evaluated at (nan: stale); items that left the selection
+    # since the last refresh are new candidates for every entry
+    swap_in = np.full(len(sel), -1)
+    swap_w = np.full(len(sel), np.nan)
+    swap_c = np.full(len(sel), np.nan)
+    released = []
+
+    def pick(cand, floor, out=None):
+        """Most valuable non-selected candidate worth more than floor (None if there is none)."""
+        cand = cand[~sel[cand] & (values[cand] > floor)]
+        if rules is not None and len(cand):
+            cand = cand[rules.insert_mask(cand, out)]
+        return int(cand[np.argmax(values[cand])]) if len(cand) else None
+
+    def best_insert(limit_w, limit_c, floor, out=None):
+        """Best non-selected item fitting within (limit_w, limit_c) with value above floor."""
+        nonlocal evaluations
+        p = np.searchsorted(sorted_w, limit_w, side="right")
+        q = np.searchsorted(sorted_c, limit_c, side="right")
+        if p <= q:
+            cand = by_weight[:p]
+            cand = cand[costs[cand] <= limit_c]
+        else:
+            cand = by_cost[:q]
+            cand = cand[weights[cand] <= limit_w]
+        evaluations += int(min(p, q))
+        return pick(cand, floor, out)
+
+    def band_insert(old_w, old_c, limit_w, limit_c, floor, out):
+        """Like best_insert, but only over the items that fit (limit_w, limit_c) and not (old_w, old_c)."""
+        nonlocal evaluations
+        parts = []
+        if limit_w > old_w:
+            a, b = np.searchsorted(sorted_w, [old_w, limit_w], side="right")
+            parts.append(by_weight[a:b][costs[by_weight[a:b]] <= limit_c])
+        if limit_c > old_c:
+            a, b = np.searchsorted(sorted_c, [old_c, limit_c], side="right")
+            parts.append(by_cost[a:b][weights[by_cost[a:b]] <= limit_w])
+        cand = np.concatenate(parts) if parts else by_weight[:0]
+        evaluations += len(cand)
+        return pick(cand, floor, out)
+
+    def evaluate_swap(i):
+        """Full re-evaluation of item i's best swap at the current slack."""
+        j = best_insert(slack_w + weights[i], slack_c + costs[i], values[i], out=i)
+        swap_in[i] = -1 if j is None else j
+        swap_w[i], swap_c[i] = slack_w, slack_c
+
+    def refresh_swaps():
+        """
+        Bring every selected item's cached best swap up to the current slack.
+        A partner found at an earlier slack is still the best among the items that
+        fitted then and fit now, so an entry is re-evaluated in full only when it is
+        stale or its partner no longer fits / was selected; where the slack grew,
+        only the newly fitting band of items is scanned, and released items are
+        compared directly.
+        """
+        items = np.flatnonzero(sel & ~locked)
+        lw, lc = slack_w + weights[items], slack_c + costs[items]
+        j = swap_in[items]
+        jj = np.where(j >= 0, j, 0)
+        keep = ~np.isnan(swap_w[items]) & ((j < 0) | (~sel[jj] & (weights[jj] <= lw) & (costs[jj] <= lc)))
+        grown = keep & ((slack_w > swap_w[items]) | (slack_c > swap_c[items]))
+        for o in released:
+            better = keep & ~sel[o] & (weights[o] <= lw) & (costs[o] <= lc) & (
+                values[o] > np.where(j >= 0, values[jj], values[items]))
+            for k in np.flatnonzero(better).tolist():
+                if rules is None or rules.insert_mask(np.array([o]), int(items[k]))[0]:
+                    swap_in[items[k]] = j[k] = jj[k] = o
+        released.clear()
+
+        for k in np.flatnonzero(~keep).tolist():
+            if out_of_budget():
+                return  # the rest stay stale for the next refresh
+            evaluate_swap(int(items[k]))
+        for k in np.flatnonzero(grown).tolist():
+            i = int(items[k])
+            b = band_insert(swap_w[i] + weights[i], swap_c[i] + costs[i], lw[k], lc[k], values[i], i)
+            if b is not None and (swap_in[i] < 0 or values[b] > values[swap_in[i]]):
+                swap_in[i] = b
+            swap_w[i], swap_c[i] = slack_w, slack_c
+
+    def best_move():
+        """The best improving move (or None), with swaps read from the refreshed cache."""
+        refresh_swaps()
+        best = None
+        j = best_insert(slack_w, slack_c, 0.0)
+        if j is not None:
+            best = (values[j], "add", None, j)
+        for i in np.flatnonzero(sel & ~locked & (values < 0)).tolist():
+            if (best is None or -values[i] > best[0]) and (rules is None or rules.can_remove(i)):
+                best = (-values[i], "drop", i, None)
+        while True:
+            items = np.flatnonzero(sel & ~locked & (swap_in >= 0))
+            if not len(items):
+                return best
+            deltas = values[swap_in[items]] - values[items]
+            k = int(np.argmax(deltas))
+            i, j = int(items[k]), int(swap_in[items[k]])
+            if rules is not None and not rules.insert_mask(np.array([j]), i)[0]:
+                evaluate_swap(i)  # an earlier move blocked the cached partner
+                continue
+            return best if best is not None and best[0] >= deltas[k] else (deltas[k], "swap", i, j)
+
+    def find_moves():
+        """Yield improving moves as (delta, kind, out_item, in_item) against the current state."""
+        j = best_insert(slack_w, slack_c, 0.0)
+        if j is not None:
+            yield values[j], "add", None, j
+        # Weakest selected items first: their swaps have the most room to improve
+        for i in sorted(np.flatnonzero(sel & ~locked), key=lambda k: values[k]):
+            if out_of_budget():
+                return
+            if values[i] < 0 and (rules is None or rules.can_remove(i)):
+                yield -values[i], "drop", i, None
+            if not sel[i]:
+                continue
+            j = best_insert(slack_w + weights[i], slack_c + costs[i], values[i], out=i)
+            if j is not None:
+                yield values[j] - values[i], "swap", i, j
+
+    def apply(move):
+        nonlocal slack_w, slack_c, current, stopped
+        delta, kind, out_item, in_item = move
+        if out_item is not None:
+            sel[out_item] = False
+            if strategy == "best":
+                released.append(out_item)
+            slack_w += weights[out_item]
+            slack_c += costs[out_item]
+            if rules is not None:
+                rules.remove(out_item)
+        if in_item is not None:
+            sel[in_item] = True
+            swap_w[in_item] = np.nan
+            slack_w -= weights[in_item]
+            slack_c -= costs[in_item]
+            if rules is not None:
+                rules.add(in_item)
+        moves[kind] += 1
+        current += delta
+        if slack_w >= 0 and slack_c >= 0 and (rules is None or rules.minimums_met()):
+            stopped = report_incumbent(current, source="local_search")
+
+    def out_of_budget():
+        if stopped:
+            return True
+        if max_moves is not None and sum(moves.values()) >= max_moves:
+            return True
+        return time_limit is not None and time.time() - start_time >= time_limit
+
+    # Sweep the neighbourhood until a full sweep finds nothing; first-improvement
+    # applies moves as the sweep reaches them instead of restarting it
+    # With rules a move can also unblock items a cached entry never saw, so the
+    # best-improvement search re-evaluates every entry once before it stops
+    verified = rules is None
+    while not out_of_budget():
+        if strategy == "best":
+            best = best_move()
+            if best is None and not verified:
+                swap_w[:] = np.nan
+                verified = True
+                continue
+            sweep = [best] if best is not None else []
+        else:
+            sweep = find_moves()
+        applied = 0
+        for move in sweep:
+            apply(move)
+            applied += 1
+            if out_of_budget():
+                break
+        if not applied:
+            break
+        verified = rules is None
+
+    elapsed = time.time() - start_time
+    add_phase("local_search", elapsed)
+    stats = {
+        "strategy": strategy,
+        "moves": moves,
+        "evaluations": evaluations,
+        "time": round(elapsed, 3),
+    }
+    return sel, stats
@@ -0,0 +1,445 @@
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from heuristics.greedy_knapsack import greedy_knapsack
+from heuristics.local_search import local_search
+from models.constraint_index import RuleState
+from models.item_table import as_table
+from models.concurrent_solve import can_race
+from utils.incumbents import report_incumbent, stop_requested
+
+ALGORITHMS = ("ga", "sa", "tabu")
+DEFAULT_ISLANDS = 4
+DEFAULT_POPULATION = 64
+DEFAULT_MIGRATION_INTERVAL = 50
+DEFAULT_MAX_ITERATIONS = 2000
+DEFAULT_TIMELIMIT = 10
+# Parallel annealing chains per SA island and sampled flips per tabu iteration
+SA_CHAINS = 16
+TABU_NEIGHBOURS = 64
+
+# Problem instance of a pool worker, set once by the pool initializer
+_PROBLEM = None
+
+
+class MetaProblem:
+    """
+    Array form of one instance shared by every island.
+    - Works on dependency groups when rules are present (one bit per group).
+    - evaluate() scores a whole population with one matrix product against
+      the (value, weight, cost) columns; rule violations are penalised.
+    """
+
+    def __init__(self, values, weights, costs, capacity, budget, locked, rules=None):
+        self.values = values
+        self.columns = np.column_stack([values, weights, costs])
+        self.weights = weights
+        self.costs = costs
+        self.cap_limit = capacity if capacity else np.inf
+        self.budget_limit = budget if budget else np.inf
+        self.locked = locked
+        self.free = np.flatnonzero(~locked)
+        self.n = len(values)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = values / np.maximum(1e-9, 0.5 * weights + 0.5 * costs)
+        self.fill_order = np.argsort(-ratio, kind="stable")
+        self.drop_order = self.fill_order[::-1]
+        # One unit of excess weight / cost is never worth more than the best ratio it could buy
+        self.rho_w = float(np.max(values / np.maximum(1e-9, weights), initial=0.0)) + 1.0
+        self.rho_c = float(np.max(values / np.maximum(1e-9, costs), initial=0.0)) + 1.0
+        self.rho_rule = float(values.sum()) + 1.0
+
+        self.has_rules = rules is not None and rules.has_rules
+        if self.has_rules:
+            pairs = {(min(int(rules.group_of[i]), int(rules.group_of[j])),
+                      max(int(rules.group_of[i]), int(rules.group_of[j])))
+                     for i, j in rules.conflict_pairs()}
+            pairs = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+            self.pair_i, self.pair_j = pairs[:, 0], pairs[:, 1]  # i == j: a self-conflicting group
+            C = len(rules.categories)
+            self.cat_counts = np.zeros((self.n, C))
+            for g, cats in enumerate(rules.group_cats):
+                for c, k in cats:
+                    self.cat_counts[g, c] = k
+            self.cat_min = rules.cat_min[:C]
+            self.cat_max = rules.cat_max[:C]
+
+    def totals(self, pop):
+        return pop.astype(float) @ self.columns
+
+    def evaluate(self, pop):
+        """Return (penalised fitness, feasible mask, raw value) for a (P, n) boolean population."""
+        totals = self.totals(pop)
+        over_w = np.maximum(0.0, totals[:, 1] - self.cap_limit)
+        over_c = np.maximum(0.0, totals[:, 2] - self.budget_limit)
+        violation = self.rho_w * over_w + self.rho_c * over_c
+        feasible = (over_w <= 1e-9) & (over_c <= 1e-9)
+        if self.has_rules:
+            rule_violation = (pop[:, self.pair_i] & pop[:, self.pair_j]).sum(axis=1).astype(float)
+            if self.cat_counts.shape[1]:
+                counts = pop.astype(float) @ self.cat_counts
+                rule_violation += (np.maximum(0.0, self.cat_min - counts)
+                                   + np.maximum(0.0, counts - self.cat_max)).sum(axis=1)
+            violation += self.rho_rule * rule_violation
+            feasible &= rule_violation == 0
+        return totals[:, 0] - violation, feasible, totals[:, 0]
+
+    def repair(self, pop):
+        """
+        Vectorized capacity/budget repair: drop the lowest-ratio unlocked items of each
+        overfull row until it fits, then (without rules) add the best-ratio prefix that fits.
+        """
+        pop[:, self.locked] = True
+        totals = self.totals(pop)
+        ex_w = totals[:, 1] - self.cap_limit
+        ex_c = totals[:, 2] - self.budget_limit
+        over = (ex_w > 1e-9) | (ex_c > 1e-9)
+        if over.any():
+            order = self.drop_order[~self.locked[self.drop_order]]
+            rows = pop[over][:, order]
+            cum_w = np.cumsum(rows * self.weights[order], axis=1)
+            cum_c = np.cumsum(rows * self.costs[order], axis=1)
+            enough = (cum_w >= ex_w[over, None] - 1e-9) & (cum_c >= ex_c[over, None] - 1e-9)
+            last = np.where(enough.any(axis=1), np.argmax(enough, axis=1), len(order) - 1)
+            rows &= np.arange(len(order)) > last[:, None]
+            sub = pop[over]
+            sub[:, order] = rows
+            pop[over] = sub
+            totals[over] = self.totals(sub)
+
+        if not self.has_rules:
+            order = self.fill_order
+            slack_w = self.cap_limit - totals[:, 1]
+            slack_c = self.budget_limit - totals[:, 2]
+            cand = ~pop[:, order]
+            fits = ((np.cumsum(cand * self.weights[order], axis=1) <= slack_w[:, None] + 1e-9)
+                    & (np.cumsum(cand * self.costs[order], axis=1) <= slack_c[:, None] + 1e-9))
+            pop[:, order] |= cand & np.logical_and.accumulate(fits, axis=1)
+        return pop
+
+    def prefix_fill(self, order, base):
+        """One greedy pass: take the best-ordered prefix that fits on top of base."""
+        x = base.copy()
+        order = order[~x[order]]
+        rem_w = self.cap_limit - self.weights[x].sum()
+        rem_c = self.budget_limit - self.costs[x].sum()
+        fits = (np.cumsum(self.weights[order]) <= rem_w) & (np.cumsum(self.costs[order]) <= rem_c)
+        pos = len(order) if fits.all() else int(np.argmin(fits))
+        x[order[:pos]] = True
+        return x
+
+
+class Island:
+    """
+    One independently evolving search on a MetaProblem.
+    algorithm: "ga" (population), "sa" (parallel annealing chains) or "tabu".
+    State persists between epochs so islands can be shipped to pool workers and back.
+    """
+
+    def __init__(self, algorithm, seeds, population_size, max_iterations, seed):
+        self.algorithm = algorithm
+        self.rng = np.random.default_rng(seed)
+        self.seeds = seeds
+        self.population_size = population_size
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.state = None
+        self.best = None
+        self.best_fit = -np.inf
+        self.immigrants = []
+
+    def done(self):
+        return self.iterations >= self.max_iterations
+
+    def _perturbed(self, problem, count):
+        """count copies of the seeds with random bit flips on free items."""
+        base = self.seeds[np.arange(count) % len(self.seeds)].copy()
+        flips = self.rng.random((count, problem.n)) < min(0.5, 2.0 / max(1, problem.n))
+        flips[: len(self.seeds)] = False  # keep the seeds themselves
+        flips[:, problem.locked] = False
+        return base ^ flips
+
+    def _record(self, problem, pop, fitness, feasible):
+        if feasible.any():
+            k = int(np.argmax(np.where(feasible, fitness, -np.inf)))
+            if fitness[k] > self.best_fit:
+                self.best_fit = float(fitness[k])
+                self.best = pop[k].copy()
+
+    def _init_state(self, problem):
+        if self.algorithm == "ga":
+            pop = problem.repair(self._perturbed(problem, self.population_size))
+            fit, feas, _ = problem.evaluate(pop)
+            self._record(problem, pop, fit, feas)
+            self.state = {"pop": pop, "fit": np.where(feas, fit, fit - problem.rho_rule)}
+        elif self.algorithm == "sa":
+            chains = self._perturbed(problem, SA_CHAINS)
+            fit, feas, _ = problem.evaluate(chains)
+            self._record(problem, chains, fit, feas)
+            t0 = max(1e-9, float(np.std(problem.values)))
+            self.state = {"x": chains, "fit": fit, "t": t0,
+                          "alpha": 1e-3 ** (1.0 / max(1, self.max_iterations))}
+        else:
+            x = self.seeds[:1].copy()
+            fit, feas, _ = problem.evaluate(x)
+            self._record(problem, x, fit, feas)
+            self.state = {"x": x, "fit": float(fit[0]), "tabu": np.zeros(problem.n, dtype=np.int64)}
+
+    def _take_immigrants(self, problem):
+        if not self.immigrants:
+            return
+        incoming = np.array(self.immigrants, dtype=bool)
+        self.immigrants = []
+        fit, feas, _ = problem.evaluate(incoming)
+        self._record(problem, incoming, fit, feas)
+        s = self.state
+        if self.algorithm == "ga":
+            worst = np.argsort(s["fit"])[: len(incoming)]
+            s["pop"][worst] = incoming[: len(worst)]
+            s["fit"][worst] = fit[: len(worst)]
+        elif self.algorithm == "sa":
+            worst = int(np.argmin(s["fit"]))
+            k = int(np.argmax(fit))
+            if fit[k] > s["fit"][worst]:
+                s["x"][worst], s["fit"][worst] = incoming[k], fit[k]
+        else:
+            k = int(np.argmax(fit))
+            if fit[k] > s["fit"]:
+                s["x"], s["fit"] = incoming[k:k + 1].copy(), float(fit[k])
+
+    def run(self, problem, iterations, deadline):
+        """Advance this island by up to `iterations` steps or until the deadline."""
+        if self.state is None:
+            self._init_state(problem)
+        self._take_immigrants(problem)
+        if not len(problem.free):
+            self.iterations = self.max_iterations
+            return self
+        step = {"ga": self._ga_step, "sa": self._sa_step, "tabu": self._tabu_step}[self.algorithm]
+        for _ in range(min(iterations, self.max_iterations - self.iterations)):
+            if time.time() >= deadline:
+                break
+            step(problem)
+            self.iterations += 1
+        return self
+
+    def _ga_step(self, problem):
+        s, rng = self.state, self.rng
+        pop, fit = s["pop"], s["fit"]
+        P, n = pop.shape
+        # Binary tournament selection, uniform crossover, bit-flip mutation
+        a, b = rng.integers(0, P, size=(2, P))
+        parents = np.where(fit[a] >= fit[b], a, b)
+        mates = np.roll(parents, 1)
+        mask = rng.random((P, n)) < 0.5
+        children = np.where(mask, pop[parents], pop[mates])
+        children ^= rng.random((P, n)) < 1.0 / n
+        children = problem.repair(children)
+        child_fit, feas, _ = problem.evaluate(children)
+        child_fit = np.where(feas, child_fit, child_fit - problem.rho_rule)
+        self._record(problem, children, child_fit, feas)
+
+        # Elitism: keep the best P of parents + children
+        merged = np.vstack([pop, children])
+        merged_fit = np.concatenate([fit, child_fit])
+        keep = np.argsort(-merged_fit, kind="stable")[:P]
+        s["pop"], s["fit"] = merged[keep], merged_fit[keep]
+
+    def _sa_step(self, problem):
+        s, rng = self.state, self.rng
+        x = s["x"]
+        K = len(x)
+        j = problem.free[rng.integers(0, len(problem.free), size=K)]
+        y = x.copy()
+        y[np.arange(K), j] ^= True
+        fit, feas, _ = problem.evaluate(y)
+        delta = fit - s["fit"]
+        accept = (delta >= 0) | (rng.random(K) < np.exp(np.minimum(0.0, delta) / s["t"]))
+        x[accept], s["fit"][accept] = y[accept], fit[accept]
+        self._record(problem, y, np.where(accept, fit, -np.inf), feas & accept)
+        s["t"] *= s["alpha"]
+
+    def _tabu_step(self, problem):
+        s, rng = self.state, self.rng
+        m = min(TABU_NEIGHBOURS, len(problem.free))
+        j = rng.choice(problem.free, size=m, replace=False)
+        y = np.repeat(s["x"], m, axis=0)
+        y[np.arange(m), j] ^= True
+        fit, feas, _ = problem.evaluate(y)
+        # Aspiration: a tabu move is allowed if it yields a new best feasible solution
+        admissible = (s["tabu"][j] <= self.iterations) | (feas & (fit > self.best_fit))
+        if not admissible.any():
+            return
+        k = int(np.argmax(np.where(admissible, fit, -np.inf)))
+        s["x"], s["fit"] = y[k:k + 1], float(fit[k])
+        s["tabu"][j[k]] = self.iterations + 7 + int(rng.integers(0, 8))
+        self._record(problem, y[k:k + 1], fit[k:k + 1], feas[k:k + 1])
+
+
+def _init_worker(problem):
+    global _PROBLEM
+    _PROBLEM = problem
+
+
+def _run_island(island, iterations, deadline):
+    return island.run(_PROBLEM, iterations, deadline)
+
+
+def run_islands(problem, islands, migration_interval, deadline, workers=1):
+    """
+    Island model: every epoch each island runs migration_interval steps (in a
+    process pool when workers > 1), then sends its best solution to the next
+    island on a ring. Stops when all iteration budgets are spent or at the deadline.
+    """
+    epochs = 0
+    pool = None
+    if workers > 1 and can_race():
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(problem,))
+    try:
+        while time.time() < deadline and not all(isl.done() for isl in islands):
+            if pool:
+                futures = [pool.submit(_run_island, isl, migration_interval, deadline) for isl in islands]
+                islands = [f.result() for f in futures]
+            else:
+                islands = [isl.run(problem, migration_interval, deadline) for isl in islands]
+            epochs += 1
+            for k, isl in enumerate(islands):
+                if isl.best is not None and len(islands) > 1:
+                    islands[(k + 1) % len(islands)].immigrants.append(isl.best.copy())
+            found = [isl.best for isl in islands if isl.best is not None]
+            if found and report_incumbent(max(float(problem.values[b].sum()) for b in found), source="metaheuristic"):
+                break
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return islands, epochs
+
+
+def solve_metaheuristic(items, capacity, budget=None, mandatory_items=None, rules=None, params=None):
+    """
+    Metaheuristic solve (tabu search / simulated annealing / genetic algorithm).
+    - Seeded by the greedy passes and the full greedy + local search answer.
+    - Runs params["islands"] islands across a process pool with ring migration
+      every params["migration_interval"] iterations.
+    - params["metaheuristic"]: "ga", "sa", "tabu" or "mixed" (islands cycle through all three).
+    - Budgets: params["timelimit"] seconds and params["max_iterations"] steps per island.
+    - The best island solution is polished with local search.
+    - Returns the same (selected, value, weight, cost, info) tuple as greedy_knapsack.
+    """
+
+    params = params or {}
+    start_time = time.time()
+    timelimit = params.get("timelimit", DEFAULT_TIMELIMIT)
+    deadline = start_time + timelimit
+
+    table = as_table(items)
+    greedy_sel, greedy_val, greedy_wt, greedy_cost, _ = greedy_knapsack(
+        table, capacity, budget, mandatory_items,
+        engine=params.get("heuristic_engine", "auto"),
+        local_search_strategy=params.get("local_search", "first"),
+        rules=rules,
+        time_limit=timelimit,
+    )
+
+    print("\n🧬 Running Metaheuristic Solver...")
+    values, weights, costs = table.values, table.weights, table.costs
+    mandatory = table.mask(mandatory_items)
+    greedy_mask = table.mask(greedy_sel)
+
+    use_groups = rules is not None and rules.has_rules
+    if use_groups:
+        to_groups = lambda mask: np.bincount(rules.group_of[mask], minlength=rules.num_groups) > 0
+        gv, gw, gc = rules.group_sums(values), rules.group_sums(weights), rules.group_sums(costs)
+        problem = MetaProblem(gv, gw, gc, capacity, budget, to_groups(mandatory), rules)
+        greedy_bits = to_groups(greedy_mask)
+    else:
+        problem = MetaProblem(values, weights, costs, capacity, budget, mandatory)
+        greedy_bits = greedy_mask
+
+    # Seeds: the polished greedy answer plus the three greedy pass orders
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.vstack([
+            problem.values / np.maximum(1e-9, problem.weights),
+            problem.values / np.maximum(1e-9, problem.costs),
+            problem.values / np.maximum(1e-9, 0.5 * problem.weights + 0.5 * problem.costs),
+        ])
+    orders = np.argsort(-scores, axis=1, kind="stable")
+    seeds = [greedy_bits]
+    if not use_groups:
+        seeds += [problem.prefix_fill(order, problem.locked) for order in orders]
+    seeds = np.array(seeds, dtype=bool)
+
+    algorithm = params.get("metaheuristic", "mixed")
+    if algorithm not in ALGORITHMS and algorithm != "mixed":
+        print(f"⚠️ Unknown metaheuristic '{algorithm}'. Using mixed islands.")
+        algorithm = "mixed"
+    num_islands = max(1, int(params.get("islands", DEFAULT_ISLANDS)))
+    workers = int(params.get("meta_workers", min(num_islands, os.cpu_count() or 1)))
+    migration_interval = max(1, int(params.get("migration_interval", DEFAULT_MIGRATION_INTERVAL)))
+    max_iterations = int(params.get("max_iterations", DEFAULT_MAX_ITERATIONS))
+    seed = params.get("seed")
+    seed_seq = np.random.SeedSequence(seed).spawn(num_islands)
+    islands = [
+        Island(ALGORITHMS[k % len(ALGORITHMS)] if algorithm == "mixed" else algorithm,
+               seeds, int(params.get("population_size", DEFAULT_POPULATION)), max_iterations, seed_seq[k])
+        for k in range(num_islands)
+    ]
+
+    mandatory_ok = greedy_wt <= problem.cap_limit and greedy_cost <= problem.budget_limit
+    epochs = 0
+    if mandatory_ok and not stop_requested():
+        islands, epochs = run_islands(problem, islands, migration_interval, deadline, workers)
+
+    # ------------------ Pick the best island and polish it ------------------
+    found = [isl for isl in islands if isl.best is not None]
+    best_bits = max(found, key=lambda isl: isl.best_fit).best if found else greedy_bits
+    best_island_val = float(problem.values[best_bits].sum())
+    if best_island_val <= greedy_val:
+        best_bits = greedy_bits
+
+    ls_info = None
+    if params.get("local_search", "first") != "none" and mandatory_ok and not stop_requested():
+        state = None
+        if use_groups:
+            state = RuleState(rules)
+            for g in np.flatnonzero(best_bits):
+                state.add(g)
+        best_bits, ls_info = local_search(
+            problem.values, problem.weights, problem.costs, best_bits, capacity, budget,
+            locked=problem.locked | (rules.mixed if use_groups else False),
+            strategy=params.get("local_search", "first"), rules=state,
+        )
+
+    chosen = np.isin(rules.group_of, np.flatnonzero(best_bits)) if use_groups else best_bits
+    best_val = float(values[chosen].sum())
+    best_wt = float(weights[chosen].sum())
+    best_cost = float(costs[chosen].sum())
+    runtime = round(time.time() - start_time, 3)
+    print(f"🏝️ {num_islands} islands ({', '.join(isl.algorithm for isl in islands)}), {epochs} epochs, "
+          f"{sum(isl.iterations for isl in islands)} iterations")
+    print(f"⏱️ Metaheuristic runtime: {runtime} sec")
+    print(f"✅ Final Value: {best_val:.2f} (greedy {greedy_val:.2f}), Weight: {best_wt}/{capacity}, "
+          f"Cost: {best_cost}/{budget}")
+
+    info = {
+        "mandatory_dropped": False,
+        "engine": "metaheuristic",
+        "metaheuristic": algorithm,
+        "islands": [{"algorithm": isl.algorithm, "iterations": isl.iterations,
+                     "best_value": float(problem.values[isl.best].sum()) if isl.best is not None else None}
+                    for isl in islands],
+        "epochs": epochs,
+        "workers": workers,
+        "greedy_value": greedy_val,
+        "runtime": runtime,
+    }
+    if use_groups:
+        info["constraint_index"] = rules.summary()
+        if np.any(problem.cat_counts[best_bits].sum(axis=0) < problem.cat_min):
+            info["category_minimums_met"] = False
+    if ls_info:
+        info["local_search"] = ls_info
+
+    return table.select(chosen), best_val, best_wt, best_cost, info
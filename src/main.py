@@ -1,29 +1,42 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
-from utils.data_loader import load_json_data
-from models.knapsack_model_json import solve_knapsack_from_json
+from utils.data_loader import load_instance
+from models.knapsack_model_json import solve_knapsack_from_json, solve_compare
 from utils.logger import log_run, print_summary
 
 
+def comparison_gaps(result_exact, result_heuristic):
+    """(gap to the exact value, certified gap to the LP bound) in percent; None when unknown."""
+    gap = None
+    if result_exact:
+        gap = 0
+        if result_exact["value"] > 0:
+            gap = ((result_exact["value"] - result_heuristic["value"]) / result_exact["value"]) * 100
+    bound_gap = result_heuristic.get("info", {}).get("gap")
+    return gap, None if bound_gap is None else bound_gap * 100
+
+
 def save_comparison(result_exact, result_heuristic):
-    """Save comparison between exact and heuristic solvers."""
+    """Save comparison between exact and heuristic solvers (exact fields are null when it was skipped)."""
     os.makedirs("results", exist_ok=True)
     comparison_path = "results/last_comparison.json"
 
-    gap = 0
-    if result_exact and result_heuristic and result_exact["value"] > 0:
-        gap = ((result_exact["value"] - result_heuristic["value"]) / result_exact["value"]) * 100
+    gap, bound_gap = comparison_gaps(result_exact, result_heuristic)
+    exact = result_exact or {}
 
     comparison_data = {
-        "exact_value": result_exact["value"],
+        "exact_value": exact.get("value"),
         "heuristic_value": result_heuristic["value"],
-        "value_gap_percent": round(gap, 2),
-        "exact_items": result_exact["selected"],
+        "value_gap_percent": None if gap is None else round(gap, 2),
+        "upper_bound": result_heuristic.get("info", {}).get("upper_bound"),
+        "certified_gap_percent": None if bound_gap is None else round(bound_gap, 4),
+        "exact_items": exact.get("selected"),
         "heuristic_items": result_heuristic["selected"],
-        "exact_weight": result_exact["weight"],
+        "exact_weight": exact.get("weight"),
         "heuristic_weight": result_heuristic["weight"],
-        "exact_cost": result_exact["cost"],
+        "exact_cost": exact.get("cost"),
         "heuristic_cost": result_heuristic["cost"],
     }
 
@@ -38,7 +51,8 @@ def save_comparison(result_exact, result_heuristic):
 if __name__ == "__main__":
     print("\n🧠 AI Optimizer Agent — Knapsack Model Runner")
 
-    data = load_json_data("data/knapsack_input.json")
+    # Optional argument: another JSON instance or a columnar directory (utils/columnar.py)
+    data = load_instance(sys.argv[1] if len(sys.argv) > 1 else "data/knapsack_input.json")
     if not data:
         print("❌ Failed to load input data. Please check JSON file path.")
         exit(1)
@@ -50,24 +64,22 @@ if __name__ == "__main__":
     if solve_mode == "compare":
         print("\n📊 Running solver comparison: Exact vs Heuristic\n")
 
-        data_exact = data.copy()
-        data_exact["solve_mode"] = "exact"
-        result_exact = solve_knapsack_from_json(data_exact)
-
-        data_heuristic = data.copy()
-        data_heuristic["solve_mode"] = "heuristic"
-        result_heuristic = solve_knapsack_from_json(data_heuristic)
+        result_exact, result_heuristic = solve_compare(data)
 
-        if result_exact and result_heuristic:
-            gap = 0
-            if result_exact["value"] > 0:
-                gap = ((result_exact["value"] - result_heuristic["value"]) / result_exact["value"]) * 100
+        if result_heuristic and (result_exact or result_heuristic["info"].get("gap") is not None):
+            gap, bound_gap = comparison_gaps(result_exact, result_heuristic)
 
             print("\n📈 --- Comparison Summary ---")
-            print(f"✅ Exact Value: {result_exact['value']}")
+            if result_exact:
+                print(f"✅ Exact Value: {result_exact['value']}")
             print(f"⚡ Heuristic Value: {result_heuristic['value']}")
-            print(f"📉 Gap: {gap:.2f}%")
-            print(f"Exact Items: {result_exact['selected']}")
+            if gap is not None:
+                print(f"📉 Gap: {gap:.2f}%")
+            if bound_gap is not None:
+                print(f"📐 Upper Bound: {result_heuristic['info']['upper_bound']} "
+                      f"(certified gap {bound_gap:.4f}%)")
+            if result_exact:
+                print(f"Exact Items: {result_exact['selected']}")
             print(f"Heuristic Items: {result_heuristic['selected']}")
 
             save_comparison(result_exact, result_heuristic)
@@ -75,9 +87,12 @@ if __name__ == "__main__":
             # Log comparison
             entry = {
                 "mode": "compare",
-                "exact_value": result_exact["value"],
+                "exact_value": result_exact["value"] if result_exact else None,
                 "heuristic_value": result_heuristic["value"],
-                "gap_percent": round(gap, 2),
+                "gap_percent": None if gap is None else round(gap, 2),
+                "certified_gap_percent": None if bound_gap is None else round(bound_gap, 4),
+                "exact_timings": result_exact.get("info", {}).get("timings") if result_exact else None,
+                "heuristic_timings": result_heuristic.get("info", {}).get("timings"),
                 "status": "SUCCESS",
             }
             log_run(entry)
@@ -109,7 +124,9 @@ if __name__ == "__main__":
 
             if "auto" in result["mode"]:
                 print("\n🤖 Auto Mode Summary:")
-                if "heuristic" in result["mode"]:
+                if "certified" in result["mode"]:
+                    print(f"   → Heuristic answer certified within {info.get('gap', 0):.4%} of the LP bound.")
+                elif "heuristic" in result["mode"]:
                     print("   → Used heuristic fallback.")
                 else:
                     print("   → Exact solver succeeded.")
@@ -120,9 +137,12 @@ if __name__ == "__main__":
                 "value": result["value"],
                 "weight": result["weight"],
                 "cost": result["cost"],
-                "runtime": result.get("info", {}).get("runtime", None),
+                "runtime": info.get("timings", {}).get("total", info.get("runtime")),
+                "timings": info.get("timings"),
                 "status": "SUCCESS",
             }
+            if info.get("profile"):
+                entry["profile"] = info["profile"]
             log_run(entry)
             print_summary(entry)
 
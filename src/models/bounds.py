@@ -0,0 +1,150 @@
+import time
+import numpy as np
+from models.item_table import as_table
+
+# Break-item search: sort once fewer than this many candidates remain; pivot sample size
+BREAK_SORT_BELOW = 2048
+BREAK_PIVOT_SAMPLE = 63
+# The surrogate multiplier is tuned on a random sample of at most this many items
+SURROGATE_SAMPLE = 20000
+SURROGATE_STEPS = 20
+# ...then refined on all items within +-SURROGATE_WINDOW of the sample's answer
+SURROGATE_WINDOW = 0.05
+SURROGATE_REFINE_STEPS = 8
+
+
+def dantzig_break(values, sizes, room, rng=None):
+    """
+    Fractional knapsack optimum for sum(sizes * x) <= room without a full sort.
+    Quickselect on efficiency (pivot = median of a small sample) narrows down the
+    break item in expected O(n). Returns (LP value, break efficiency or None when
+    everything fits, mask of the items taken whole).
+    """
+    rng = rng if rng is not None else np.random.default_rng(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = np.where(sizes > 0, values / np.where(sizes > 0, sizes, 1), np.inf)
+    taken = np.zeros(len(values), dtype=bool)
+    idx = np.arange(len(values))
+    left = float(room)
+    while len(idx) > BREAK_SORT_BELOW:
+        pivot = np.median(eff[rng.choice(idx, BREAK_PIVOT_SAMPLE)])
+        upper = eff[idx] > pivot
+        s_upper = sizes[idx[upper]].sum()
+        if s_upper <= left:
+            taken[idx[upper]] = True
+            left -= s_upper
+            rest = idx[~upper]
+        else:
+            rest = idx[upper]
+        if len(rest) == len(idx):
+            break  # all remaining efficiencies tie with the pivot
+        idx = rest
+    idx = idx[np.argsort(-eff[idx], kind="stable")]
+    cum_s = np.cumsum(sizes[idx])
+    b = int(np.searchsorted(cum_s, left, side="right"))
+    taken[idx[:b]] = True
+    total = values[taken].sum()
+    if b == len(idx):
+        return total, None, taken
+    left -= cum_s[b - 1] if b else 0.0
+    return total + left * eff[idx[b]], eff[idx[b]], taken
+
+
+def surrogate_multiplier(values, weights, costs, cap, bud, rng=None):
+    """
+    lam in [0, 1] that (approximately) minimises the Dantzig bound of
+    lam * w / cap + (1 - lam) * c / bud <= 1 (quasi-convex in lam). A ternary
+    search on a random sample finds the neighbourhood, a few full-data steps refine it.
+    Any lam gives a valid bound; the search only makes it tighter. With only one
+    finite positive limit the surrogate is that constraint alone (lam 1 or 0).
+    """
+    if not (0 < cap < np.inf and 0 < bud < np.inf) or not len(values):
+        return 1.0 if 0 < cap < np.inf else 0.0
+    rng = rng if rng is not None else np.random.default_rng(0)
+
+    def search(v, w, c, room_w, room_c, lo, hi, steps):
+        def bound(lam):
+            return dantzig_break(v, lam * w / room_w + (1 - lam) * c / room_c, 1.0)[0]
+
+        for _ in range(steps):
+            m1, m2 = lo + (hi - lo) / 3, hi - (hi - lo) / 3
+            if bound(m1) <= bound(m2):
+                hi = m2
+            else:
+                lo = m1
+        return (lo + hi) / 2
+
+    n = len(values)
+    if n <= SURROGATE_SAMPLE:
+        return search(values, weights, costs, cap, bud, 0.0, 1.0, SURROGATE_STEPS)
+    pick = rng.choice(n, SURROGATE_SAMPLE, replace=False)
+    scale = SURROGATE_SAMPLE / n
+    lam = search(values[pick], weights[pick], costs[pick], cap * scale, bud * scale, 0.0, 1.0, SURROGATE_STEPS)
+    return search(values, weights, costs, cap, bud, max(0.0, lam - SURROGATE_WINDOW),
+                  min(1.0, lam + SURROGATE_WINDOW), SURROGATE_REFINE_STEPS)
+
+
+def _clip(sizes, room):
+    """Negative sizes hand their room to the relaxation up front, so every size it sees is >= 0."""
+    return np.maximum(sizes, 0), room - float(np.minimum(sizes, 0).sum())
+
+
+def relaxation_bound(table, capacity, budget, mandatory_items=None):
+    """
+    Upper bound on the optimum from the LP relaxation, in expected O(n) per evaluation.
+    - Dantzig (fractional) bound of the capacity and of the budget constraint alone,
+      each from a quickselect for the break item (dantzig_break), no sort.
+    - Surrogate bound lam * w / capacity + (1 - lam) * c / budget <= 1 with lam tuned
+      to minimise it; at the best lam this is the LP bound of both constraints together.
+    - Dependency / exclusivity / category rules are left out, which only loosens the bound.
+      Mandatory items are fixed in when they fit (otherwise the solvers drop some, so they stay free).
+    Returns {"upper_bound", "lp_capacity", "lp_budget", "surrogate", "multiplier", ...}.
+    """
+
+    start_time = time.time()
+    table = as_table(table)
+    values, weights, costs = table.values, table.weights, table.costs
+    fixed = table.mask(mandatory_items)
+    rw = capacity - float(weights[fixed].sum()) if capacity else None
+    rc = budget - float(costs[fixed].sum()) if budget else None
+    mandatory_fixed = not ((rw is not None and rw < 0) or (rc is not None and rc < 0))
+    if not mandatory_fixed:
+        fixed = np.zeros(len(table), dtype=bool)
+        rw, rc = capacity or None, budget or None
+    base = float(values[fixed].sum())
+
+    free = ~fixed & (values > 0)
+    v, w, c = values[free], weights[free], costs[free]
+    if rw is not None:
+        w, rw = _clip(w, rw)
+    if rc is not None:
+        c, rc = _clip(c, rc)
+
+    bounds = {"lp_capacity": None, "lp_budget": None, "surrogate": None, "multiplier": None}
+    if rw is not None:
+        bounds["lp_capacity"] = base + dantzig_break(v, w, rw)[0]
+    if rc is not None:
+        bounds["lp_budget"] = base + dantzig_break(v, c, rc)[0]
+    if rw and rc:
+        lam = surrogate_multiplier(v, w, c, rw, rc)
+        bounds["surrogate"] = base + dantzig_break(v, lam * w / rw + (1 - lam) * c / rc, 1.0)[0]
+        bounds["multiplier"] = round(lam, 6)
+
+    candidates = [b for b in (bounds["lp_capacity"], bounds["lp_budget"], bounds["surrogate"]) if b is not None]
+    upper = min(candidates) if candidates else base + float(v.sum())
+    # With integer values no solution lies strictly between floor(bound) and bound
+    if np.all(np.mod(values, 1) == 0):
+        upper = float(np.floor(upper + 1e-6))
+    return dict(
+        {k: round(float(b), 6) if b is not None and k != "multiplier" else b for k, b in bounds.items()},
+        upper_bound=float(upper),
+        mandatory_fixed=mandatory_fixed,
+        time=round(time.time() - start_time, 4),
+    )
+
+
+def certified_gap(value, upper_bound):
+    """Relative gap (upper_bound - value) / upper_bound of a feasible value; 0.0 means proven optimal."""
+    if upper_bound is None or value is None:
+        return None
+    return max(0.0, (upper_bound - value) / abs(upper_bound)) if upper_bound else 0.0
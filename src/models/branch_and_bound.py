@@ -0,0 +1,183 @@
+import math
+import time
+import heapq
+import numpy as np
+from bisect import bisect_right
+from heuristics.greedy_knapsack import greedy_knapsack
+from models.item_table import as_table
+from models.bounds import surrogate_multiplier
+from utils.incumbents import report_incumbent, stop_requested
+
+# How often (in nodes) the time limit is checked
+CHECK_EVERY = 1024
+
+
+def branch_and_bound(items, capacity, budget=None, mandatory_items=None, timelimit=10,
+                     strategy="dfs", max_nodes=None):
+    """
+    Anytime branch-and-bound for the capacity + budget knapsack.
+    - Seeded with the greedy heuristic's solution as the first incumbent.
+    - Upper bounds: Dantzig (fractional) bound on the surrogate constraint
+      lam * w/capacity + (1 - lam) * c/budget <= 1, with lam chosen at the root to
+      minimise the bound, computed in O(log n) per node from prefix sums. With integer
+      values a node survives only if its bound beats the incumbent by a whole unit.
+    - strategy="dfs" dives include-first; strategy="best" expands the highest bound first.
+    - On hitting timelimit / max_nodes it returns the incumbent plus a proven gap
+      instead of nothing.
+    - Incumbents and bounds are reported as they improve (utils/incumbents.py);
+      the search stops when the tracker asks it to.
+    Returns ((selected, value, weight, cost, info), status) with status "success"
+    (proven optimal), "timeout" (incumbent + gap), "stopped" (early stop, incumbent + gap)
+    or "infeasible".
+    """
+
+    start_time = time.time()
+    table = as_table(items)
+    all_v, all_w, all_c = table.values.tolist(), table.weights.tolist(), table.costs.tolist()
+    cap_limit = capacity if capacity else float("inf")
+    budget_limit = budget if budget else float("inf")
+
+    fixed_mask = table.mask(mandatory_items)
+    fixed = np.flatnonzero(fixed_mask).tolist()
+    base_val = sum(all_v[k] for k in fixed)
+    rw = cap_limit - sum(all_w[k] for k in fixed)
+    rc = budget_limit - sum(all_c[k] for k in fixed)
+    if rw < 0 or rc < 0:
+        print("❌ Exact model infeasible: mandatory items exceed capacity or budget.")
+        return None, "infeasible"
+
+    free = np.flatnonzero(~fixed_mask & (table.values > 0) & (table.weights <= rw) & (table.costs <= rc)).tolist()
+    lam = surrogate_multiplier(table.values[free], table.weights[free], table.costs[free], rw, rc)
+
+    # Surrogate "size" of each item: lam * w / rw + (1 - lam) * c / rc, so the
+    # surrogate constraint is sum(size) <= 1 at the root
+    def size(w, c):
+        return (lam * w / wscale if wscale else 0.0) + ((1 - lam) * c / cscale if cscale else 0.0)
+
+    wscale = rw if 0 < rw < float("inf") else 0.0
+    cscale = rc if 0 < rc < float("inf") else 0.0
+    free.sort(key=lambda k: -all_v[k] / max(1e-12, size(all_w[k], all_c[k])))
+    v = [all_v[k] for k in free]
+    w = [all_w[k] for k in free]
+    c = [all_c[k] for k in free]
+    s = [size(wk, ck) for wk, ck in zip(w, c)]
+    n = len(free)
+    prefix_v, prefix_s = [0.0], [0.0]
+    for vk, sk in zip(v, s):
+        prefix_v.append(prefix_v[-1] + vk)
+        prefix_s.append(prefix_s[-1] + sk)
+
+    def bound(k, val, rw, rc):
+        """Dantzig bound over the undecided items k..n-1 on the surrogate constraint."""
+        r = size(rw, rc)
+        j = bisect_right(prefix_s, prefix_s[k] + r, lo=k) - 1
+        ub = val + prefix_v[j] - prefix_v[k]
+        if j < n:
+            ub += (r - (prefix_s[j] - prefix_s[k])) * v[j] / s[j]
+        return ub
+
+    def to_positions(path):
+        positions = []
+        while path is not None:
+            positions.append(path[0])
+            path = path[1]
+        return positions
+
+    # ------------------ Seed incumbent from greedy ------------------
+    selected, greedy_val, _, _, _ = greedy_knapsack(
+        table, capacity, budget, mandatory_items, local_search_strategy="first", time_limit=timelimit
+    )
+    position = {k: p for p, k in enumerate(free)}
+    best = [position[k] for k in np.flatnonzero(table.mask(selected)).tolist() if k in position]
+    best_val = sum(v[p] for p in best)
+    incumbents = 1
+    halt = report_incumbent(best_val + base_val, bound(0, 0.0, rw, rc) + base_val, source="bnb") or stop_requested()
+
+    # ------------------ Tree search ------------------
+    # Node: (k, value, remaining weight, remaining cost, path) where path is a
+    # cons list (position, parent) of included free items
+    root = (0, 0.0, rw, rc, None)
+    stack = [root]
+    heap = [(-bound(0, 0.0, rw, rc), 0, root)]
+    counter = 1
+    nodes = 0
+    stopped = False
+    eps = 1e-9
+    # With integer values a node must promise a whole unit more than the incumbent
+    integral = all(float(vk).is_integer() for vk in v)
+    prune = 1 - 1e-6 if integral else eps
+
+    while heap if strategy == "best" else stack:
+        if strategy == "best":
+            neg_ub, _, node = heapq.heappop(heap)
+            if -neg_ub <= best_val + prune:
+                break  # best-first: no open node can improve
+        else:
+            node = stack.pop()
+        k, val, nrw, nrc, path = node
+
+        nodes += 1
+        if strategy == "best" and nodes % CHECK_EVERY == 0:
+            halt = report_incumbent(None, -neg_ub + base_val, source="bnb") or halt
+        if nodes % CHECK_EVERY == 0:
+            halt = halt or stop_requested()
+        if halt or (nodes % CHECK_EVERY == 0 and (time.time() - start_time >= timelimit
+                                                  or (max_nodes and nodes >= max_nodes))):
+            if strategy == "best":
+                heapq.heappush(heap, (neg_ub, counter, node))
+            else:
+                stack.append(node)
+            stopped = True
+            break
+
+        if val > best_val + eps:
+            best_val = val
+            best = to_positions(path)
+            incumbents += 1
+            halt = report_incumbent(best_val + base_val, source="bnb",
+                                    selected=lambda: table.select(fixed + [free[p] for p in best]))
+        if k == n or bound(k, val, nrw, nrc) <= best_val + prune:
+            continue
+
+        children = [(k + 1, val, nrw, nrc, path)]
+        if w[k] <= nrw and c[k] <= nrc:
+            children.append((k + 1, val + v[k], nrw - w[k], nrc - c[k], (k, path)))
+        for child in children:  # include-branch pushed last, so DFS dives into it first
+            if strategy == "best":
+                heapq.heappush(heap, (-bound(*child[:4]), counter, child))
+                counter += 1
+            else:
+                stack.append(child)
+
+    # ------------------ Result and gap ------------------
+    if stopped:
+        open_nodes = [node for _, _, node in heap] if strategy == "best" else stack
+        upper = max([bound(*node[:4]) for node in open_nodes] + [best_val])
+        if integral:
+            upper = max(math.floor(upper + 1e-6), best_val)
+    else:
+        upper = best_val
+    upper += base_val
+    total_best = best_val + base_val
+    gap = (upper - total_best) / abs(upper) if upper else 0.0
+
+    chosen = fixed + [free[p] for p in best]
+    runtime = round(time.time() - start_time, 3)
+    status = ("stopped" if halt else "timeout") if stopped else "success"
+    if stopped:
+        print(f"⏱️ B&B stopped after {nodes} nodes: incumbent {total_best:.2f}, gap {gap * 100:.2f}%")
+    else:
+        print(f"🌳 B&B proved optimality after {nodes} nodes in {runtime} sec")
+
+    info = {
+        "mandatory_dropped": False,
+        "backend": "bnb",
+        "runtime": runtime,
+        "optimal": not stopped,
+        "upper_bound": upper,
+        "gap": round(gap, 6),
+        "nodes": nodes,
+        "incumbents": incumbents,
+        "greedy_seed_value": greedy_val,
+    }
+    return (table.select(chosen), *table.totals(chosen), info), status
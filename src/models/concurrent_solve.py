@@ -0,0 +1,63 @@
+import os
+import signal
+import multiprocessing as mp
+
+# Extra seconds granted to the exact solver past its own timelimit before it is killed
+RACE_GRACE = 1.0
+
+
+def can_race():
+    """Racing needs to fork a child; daemonic processes are not allowed to have children."""
+    return not mp.current_process().daemon
+
+
+def _exact_worker(data, conn):
+    # Own process group, so cancel() also takes down solver subprocesses such as glpsol
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    from models.knapsack_model_json import solve_knapsack_from_json
+
+    try:
+        result = solve_knapsack_from_json(data)
+    except Exception as e:
+        print(f"❌ Exact solver process failed: {e}")
+        result = None
+    conn.send(result)
+    conn.close()
+
+
+class ExactSolveProcess:
+    """
+    Exact solve running in a child process so it can race the heuristic.
+    - result(timeout) waits for the answer without blocking past the deadline.
+    - cancel() kills the child's whole process group, leaving no orphaned solvers.
+    """
+
+    def __init__(self, data):
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        self._conn, child_conn = ctx.Pipe(duplex=False)
+        exact_data = dict(data, solve_mode="exact")
+        self.process = ctx.Process(target=_exact_worker, args=(exact_data, child_conn), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def result(self, timeout=None):
+        """Return (result, status) with status "success", "failed" or "deadline"."""
+        if not self._conn.poll(timeout):
+            return None, "deadline"
+        try:
+            result = self._conn.recv()
+        except EOFError:  # child died before answering
+            result = None
+        self.process.join()
+        return result, "success" if result else "failed"
+
+    def cancel(self):
+        if self.process.is_alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (AttributeError, ProcessLookupError, PermissionError):
+                self.process.kill()
+        self.process.join()
+        self._conn.close()
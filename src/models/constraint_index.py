@@ -0,0 +1,231 @@
+import time
+import numpy as np
+from models.item_table import ItemTable, as_table
+
+
+class ConstraintIndex:
+    """
+    Integer-indexed form of the dependent / exclusive / category_limits rules.
+    Built once per instance from its ItemTable and shared by the heuristic and the
+    exact backends.
+    - Dependencies are all-or-nothing: items linked through "dependent" (transitively)
+      form one group that is selected or dropped as a unit.
+    - Exclusivity is a symmetric item conflict, lifted to group-level adjacency lists.
+    - Categories are small ints with per-category [min, max] count arrays; slot -1
+      (the last slot) is the unlimited "no category" bucket.
+    """
+
+    def __init__(self, items, category_limits=None):
+        start_time = time.time()
+        table = as_table(items)
+        n = len(table)
+        self.n = n
+        self.names = table.names
+
+        # ---------------- Dependency groups (union-find) ----------------
+        parent = list(range(n))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        dependency_links = 0
+        for k, j in table.dependent.tolist():
+            if j != k:
+                dependency_links += 1
+                rk, rj = find(k), find(j)
+                if rk != rj:
+                    parent[max(rk, rj)] = min(rk, rj)
+
+        group_id = {}
+        group_of = np.empty(n, dtype=np.int64)
+        members = []
+        for k in range(n):
+            root = find(k)
+            if root not in group_id:
+                group_id[root] = len(members)
+                members.append([])
+            group_of[k] = group_id[root]
+            members[group_id[root]].append(k)
+        self.group_of = group_of
+        self.members = members
+        G = len(members)
+        self.num_groups = G
+
+        # ---------------- Exclusivity (symmetric, group level) ----------------
+        item_conflicts = {}
+        for k, j in table.exclusive.tolist():
+            if j != k:
+                item_conflicts.setdefault(k, set()).add(j)
+                item_conflicts.setdefault(j, set()).add(k)
+        self.item_conflicts = {k: sorted(v) for k, v in item_conflicts.items()}
+        self._cliques = None
+
+        group_conflicts = [set() for _ in range(G)] if item_conflicts else None
+        self.self_conflict = np.zeros(G, dtype=bool)
+        for k, nbs in item_conflicts.items():
+            gk = group_of[k]
+            for j in nbs:
+                gj = group_of[j]
+                if gj == gk:
+                    self.self_conflict[gk] = True
+                else:
+                    group_conflicts[gk].add(int(gj))
+        empty = np.zeros(0, dtype=np.int64)
+        self.group_conflicts = ([np.array(sorted(s), dtype=np.int64) if s else empty for s in group_conflicts]
+                                if group_conflicts else [empty] * G)
+
+        # ---------------- Categories ----------------
+        category_limits = category_limits or {}
+        self.categories = sorted({str(c) for c in category_limits})
+        code = {c: k for k, c in enumerate(self.categories)}
+        C = len(self.categories)
+        self.cat_min = np.zeros(C + 1, dtype=np.int64)
+        self.cat_max = np.full(C + 1, np.iinfo(np.int64).max // 2, dtype=np.int64)
+        for c, limits in category_limits.items():
+            lo, hi = limits
+            self.cat_min[code[str(c)]] = int(lo)
+            self.cat_max[code[str(c)]] = int(hi)
+        # Table category codes -> limit codes; table code -1 (no category) lands on the last slot
+        remap = np.array([code.get(c, C) for c in table.categories] + [C], dtype=np.int64)
+        self.category_of = remap[table.category]
+
+        # Groups whose members share one category get a single (category, count);
+        # mixed-category groups are flagged and kept out of vectorized moves
+        self.group_category = np.full(G, C, dtype=np.int64)
+        self.group_cat_count = np.zeros(G, dtype=np.int64)
+        self.group_cats = [()] * G
+        self.mixed = np.zeros(G, dtype=bool)
+        for g, ms in enumerate(members):
+            counts = {}
+            for k in ms:
+                cat = int(self.category_of[k])
+                if cat != C:
+                    counts[cat] = counts.get(cat, 0) + 1
+            self.group_cats[g] = tuple(counts.items())
+            if len(counts) == 1:
+                (cat, cnt), = counts.items()
+                self.group_category[g] = cat
+                self.group_cat_count[g] = cnt
+            elif len(counts) > 1:
+                self.mixed[g] = True
+
+        # Categories whose minimum exceeds the number of items they hold
+        per_category = np.bincount(self.category_of, minlength=C + 1)
+        self.unsatisfiable = [self.categories[c] for c in range(C) if per_category[c] < self.cat_min[c]]
+
+        self.has_dependencies = dependency_links > 0
+        self.has_conflicts = bool(item_conflicts)
+        self.has_categories = C > 0
+        self.has_rules = self.has_dependencies or self.has_conflicts or self.has_categories
+        self.compile_time = round(time.time() - start_time, 4)
+
+    def group_sums(self, column):
+        """Per-group totals of an item-level array (value, weight or cost)."""
+        return np.bincount(self.group_of, weights=np.asarray(column, dtype=float), minlength=self.num_groups)
+
+    def conflict_pairs(self):
+        """Yield each conflicting item pair (i, j) with i < j once."""
+        for k, nbs in self.item_conflicts.items():
+            for j in nbs:
+                if k < j:
+                    yield k, j
+
+    def conflict_cliques(self):
+        """
+        Cover every conflicting pair with cliques of mutually exclusive items, so each
+        clique becomes one choose-at-most-one row instead of one row per pair.
+        Greedy: grow each uncovered pair by common neighbours that conflict with every member.
+        """
+        if self._cliques is None:
+            neighbours = {k: set(nbs) for k, nbs in self.item_conflicts.items()}
+            covered = set()
+            cliques = []
+            for i, j in self.conflict_pairs():
+                if (i, j) in covered:
+                    continue
+                clique = [i, j]
+                for k in sorted(neighbours[i] & neighbours[j]):
+                    if all(k in neighbours[m] for m in clique):
+                        clique.append(k)
+                clique.sort()
+                covered.update((a, b) for x, a in enumerate(clique) for b in clique[x + 1:])
+                cliques.append(clique)
+            self._cliques = cliques
+        return self._cliques
+
+    def summary(self):
+        return {
+            "groups": self.num_groups,
+            "dependency_groups": sum(1 for ms in self.members if len(ms) > 1),
+            "conflict_pairs": sum(len(v) for v in self.item_conflicts.values()) // 2,
+            "conflict_cliques": len(self.conflict_cliques()),
+            "categories": len(self.categories),
+            "compile_time": self.compile_time,
+        }
+
+
+class RuleState:
+    """
+    Incremental feasibility state over groups for one heuristic run.
+    Every check is O(1) per group (plus its few categories): conflicts are
+    tracked as per-group counters of selected conflicting neighbours.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.selected = np.zeros(index.num_groups, dtype=bool)
+        self.blocked = np.zeros(index.num_groups, dtype=np.int64)
+        self.cat_count = np.zeros(len(index.cat_max), dtype=np.int64)
+
+    def can_add(self, g):
+        ix = self.index
+        if self.selected[g] or self.blocked[g] or ix.self_conflict[g]:
+            return False
+        return all(self.cat_count[c] + k <= ix.cat_max[c] for c, k in ix.group_cats[g])
+
+    def can_remove(self, g):
+        return all(self.cat_count[c] - k >= self.index.cat_min[c] for c, k in self.index.group_cats[g])
+
+    def add(self, g):
+        self.selected[g] = True
+        self.blocked[self.index.group_conflicts[g]] += 1
+        for c, k in self.index.group_cats[g]:
+            self.cat_count[c] += k
+
+    def remove(self, g):
+        self.selected[g] = False
+        self.blocked[self.index.group_conflicts[g]] -= 1
+        for c, k in self.index.group_cats[g]:
+            self.cat_count[c] -= k
+
+    def minimums_met(self):
+        return not np.any(self.cat_count < self.index.cat_min)
+
+    def insert_mask(self, cand, out=None):
+        """
+        Vectorized check of which candidate groups could be inserted, optionally
+        after removing group `out` (a swap). Mixed-category groups never qualify.
+        """
+        ix = self.index
+        blocked = self.blocked[cand]
+        room = ix.cat_max - self.cat_count
+        floor_ok = np.ones(len(cand), dtype=bool)
+        if out is not None:
+            blocked = blocked - np.isin(cand, ix.group_conflicts[out])
+            room = room.copy()
+            for c, k in ix.group_cats[out]:
+                room[c] += k
+                if self.cat_count[c] - k < ix.cat_min[c]:
+                    # Removing `out` breaks this category's minimum unless the candidate refills it
+                    floor_ok &= (ix.group_category[cand] == c) & (ix.group_cat_count[cand] >= k)
+        cats = ix.group_category[cand]
+        return ((blocked == 0) & ~ix.self_conflict[cand] & ~ix.mixed[cand] & ~self.selected[cand]
+                & (ix.group_cat_count[cand] <= room[cats]) & floor_ok)
+
+
+def compile_constraints(data, table=None):
+    """Compile the instance's item rules and category limits into a ConstraintIndex."""
+    return ConstraintIndex(table if table is not None else ItemTable.from_data(data), data.get("category_limits"))
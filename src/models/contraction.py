@@ -0,0 +1,80 @@
+import time
+import numpy as np
+from models.item_table import ItemTable
+
+
+class GroupContraction:
+    """
+    Instance with every all-or-nothing dependency group collapsed into one super-item.
+    - table: one item per group (named after its first member) with summed value,
+      weight and cost; exclusivity becomes group-level edges, categories carry over.
+    - mandatory_items: super-items of the groups that hold a mandatory item.
+    - expand(names) maps selected super-items back to the original item names.
+    """
+
+    def __init__(self, table, mandatory_items, group_items, source, info):
+        self.table = table
+        self.mandatory_items = mandatory_items
+        self.group_items = group_items
+        self.source = source
+        self.info = info
+
+    def expand(self, names):
+        """Original item names, in table order, for a list of super-item names."""
+        picked = [self.group_items[self.table.index[name]] for name in names or [] if name in self.table.index]
+        if not picked:
+            return []
+        return self.source.select(np.concatenate(picked))
+
+
+def contract_groups(table, rules, mandatory_items=None):
+    """
+    Collapse the ConstraintIndex's dependency groups (already found by union-find) into super-items.
+    - Groups whose members conflict with each other can never be selected and are dropped.
+    - Returns None when there is nothing to contract, when a mandatory group conflicts
+      with itself (left for the solvers to report), or when a group holds more than one
+      category-limited item (a super-item counts once toward its category).
+    """
+
+    start_time = time.time()
+    if not rules.has_dependencies:
+        return None
+    G = rules.num_groups
+    limited = [[c for c, _ in cats] for cats in rules.group_cats]
+    if any(sum(k for _, k in cats) > 1 for cats in rules.group_cats):
+        return None
+
+    mandatory_groups = np.zeros(G, dtype=bool)
+    mandatory_groups[rules.group_of[table.mask(mandatory_items)]] = True
+    if np.any(rules.self_conflict & mandatory_groups):
+        return None
+    keep = ~rules.self_conflict
+    new_id = np.full(G, -1, dtype=np.int64)
+    new_id[keep] = np.arange(int(keep.sum()))
+
+    members = [np.asarray(ms, dtype=np.int64) for ms in rules.members]
+    group_items = [members[g] for g in np.flatnonzero(keep)]
+    names = [table.names[ms[0]] for ms in group_items]
+
+    # Category of a super-item: its one limited member's, otherwise its first member's
+    category = np.empty(len(group_items), dtype=np.int32)
+    for g_new, g in enumerate(np.flatnonzero(keep)):
+        ms = group_items[g_new]
+        if limited[g]:
+            ms = ms[rules.category_of[ms] == limited[g][0]]
+        category[g_new] = table.category[ms[0]]
+
+    edges = [(int(new_id[g]), int(new_id[h])) for g in np.flatnonzero(keep)
+             for h in rules.group_conflicts[g] if g < h and keep[h]]
+    contracted = ItemTable(
+        names, rules.group_sums(table.values)[keep], rules.group_sums(table.weights)[keep],
+        rules.group_sums(table.costs)[keep], category, table.categories, None, edges,
+    )
+    info = {
+        "items": len(table),
+        "super_items": len(contracted),
+        "groups_merged": sum(1 for ms in group_items if len(ms) > 1),
+        "dropped_self_conflicting": int(G - keep.sum()),
+        "time": round(time.time() - start_time, 4),
+    }
+    return GroupContraction(contracted, contracted.select(mandatory_groups[keep]), group_items, table, info)
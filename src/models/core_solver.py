@@ -0,0 +1,205 @@
+import time
+import numpy as np
+from models.item_table import as_table
+from models.dp_knapsack import dp_knapsack, dp_unsupported_reason, DEFAULT_DP_MEMORY_MB
+from models.branch_and_bound import branch_and_bound
+from models.bounds import dantzig_break, surrogate_multiplier
+from utils.incumbents import tracking, active_tracker, report_incumbent, stop_requested
+from utils.profiling import phase
+
+# Below this many items the plain exact backends are fast enough; backend="core" still forces it
+CORE_MIN_ITEMS = 5000
+# First core: the items whose reduced cost is closest to zero (nearest the break item)
+DEFAULT_CORE_SIZE = 256
+# Largest core handed to the exact subsolver before the incumbent is returned with its gap
+MAX_CORE_SIZE = 20_000
+DEFAULT_TIMELIMIT = 10
+
+
+def core_unsupported_reason(table, capacity, budget, params=None, rules=None):
+    table = as_table(table)
+    params = params or {}
+    if rules is not None and rules.has_rules:
+        return "dependent/exclusive/category rules present"
+    if not (capacity or budget):
+        return "no capacity or budget"
+    if np.any(table.weights < 0) or np.any(table.costs < 0):
+        return "negative weights or costs"
+    min_items = params.get("core_min_items", CORE_MIN_ITEMS)
+    if len(table) < min_items:
+        return f"fewer than {min_items} items"
+    return None
+
+
+def _solve_subproblem(sub, capacity, budget, timelimit, memory_mb=DEFAULT_DP_MEMORY_MB):
+    """
+    Exact solve of one core: DP when its table fits in memory_mb, B&B otherwise.
+    A limit of exactly 0 keeps only the items that need none of it (0 means "no limit" to the solvers).
+    Returns (chosen mask over sub, value, proven upper bound).
+    """
+    keep = np.ones(len(sub), dtype=bool)
+    if capacity == 0:
+        keep &= sub.weights == 0
+        capacity = None
+    if budget == 0:
+        keep &= sub.costs == 0
+        budget = None
+    if not keep.all():
+        sub_keep = sub.subset(keep)
+        chosen, value, upper = _solve_subproblem(sub_keep, capacity, budget, timelimit, memory_mb)
+        full = np.zeros(len(sub), dtype=bool)
+        full[np.flatnonzero(keep)[chosen]] = True
+        return full, value, upper
+    # A limit the whole core fits within cannot bind; dropping it shrinks the DP table
+    if capacity and sub.weights.sum() <= capacity:
+        capacity = None
+    if budget and sub.costs.sum() <= budget:
+        budget = None
+    if not (capacity or budget):
+        chosen = sub.values > 0
+        return chosen, float(sub.values[chosen].sum()), float(sub.values[chosen].sum())
+
+    if dp_unsupported_reason(sub, capacity, budget, memory_mb) is None:
+        selected, value, _, _, _ = dp_knapsack(sub, capacity, budget)
+        return sub.mask(selected), value, value
+    solution, _ = branch_and_bound(sub, capacity, budget, timelimit=timelimit)
+    selected, value, _, _, info = solution
+    return sub.mask(selected), value, info["upper_bound"]
+
+
+def solve_core(table, capacity, budget, mandatory_items, params, rules=None):
+    """
+    Core-problem exact solver for very large instances (Balas-Zemel / Pisinger style).
+    - The LP break item of the capacity, budget or surrogate constraint is found by
+      quickselect (expected O(n)); its efficiency e gives each item the reduced cost v - e * s.
+    - Items with the smallest |reduced cost| form the core; the rest are fixed to the
+      LP side (in if the LP takes them whole, out otherwise) and only the core is solved exactly.
+    - Flipping an outside item costs at least its |reduced cost| from the LP bound, so once
+      no such bound beats the incumbent the answer is optimal (bounds are rounded down for
+      integer values); otherwise the core doubles and is solved again. A core the subsolver
+      cannot close ends the search with the incumbent and its gap.
+    Returns (solution, status) like the other exact backends.
+    """
+
+    start_time = time.time()
+    table = as_table(table)
+    timelimit = params.get("timelimit", DEFAULT_TIMELIMIT)
+    values, weights, costs = table.values, table.weights, table.costs
+    fixed = table.mask(mandatory_items)
+    rw = capacity - weights[fixed].sum() if capacity else None
+    rc = budget - costs[fixed].sum() if budget else None
+    if (rw is not None and rw < 0) or (rc is not None and rc < 0):
+        print("❌ Exact model infeasible: mandatory items exceed capacity or budget.")
+        return None, "infeasible"
+    base = float(values[fixed].sum())
+    # With integer values no solution lies strictly between floor(bound) and bound
+    integral = bool(np.all(np.mod(values, 1) == 0))
+    floor = (lambda x: np.floor(np.asarray(x) + 1e-6)) if integral else np.asarray
+
+    fits = ~fixed & (values > 0)
+    if rw is not None:
+        fits &= weights <= rw
+    if rc is not None:
+        fits &= costs <= rc
+    free = np.flatnonzero(fits)
+    v, w, c = values[free], weights[free], costs[free]
+
+    # ------------------ LP relaxation and reduced costs ------------------
+    with phase("core_lp"):
+        use_w = rw is not None and w.sum() > rw
+        use_c = rc is not None and c.sum() > rc
+        if use_w and use_c:
+            lam = surrogate_multiplier(v, w, c, rw, rc, np.random.default_rng(0))
+            sizes, room = lam * w / rw + (1 - lam) * c / rc, 1.0
+        elif use_w or use_c:
+            sizes, room = (w, rw) if use_w else (c, rc)
+        else:
+            sizes, room = np.zeros(len(free)), 0.0
+        lp, eff, taken = dantzig_break(v, sizes, room)
+        eff = 0.0 if eff is None else eff
+        reduced = v - eff * sizes
+        slack = np.abs(reduced)
+        flip_bound = floor(base + lp - slack)  # best value with this item on the other side of the LP
+
+    best_val, best = -np.inf, None
+    core_size = min(len(free), int(params.get("core_size", DEFAULT_CORE_SIZE)))
+    rounds = 0
+    upper = float(floor(base + lp))
+    status = "timeout"
+    outer = active_tracker()
+    with phase("solve"):
+        while True:
+            rounds += 1
+            core = np.zeros(len(free), dtype=bool)
+            if core_size >= len(free):
+                core[:] = True
+            else:
+                core[np.argpartition(slack, core_size)[:core_size]] = True
+            ones = ~core & taken
+            cap_left = rw - w[ones].sum() if rw is not None else None
+            bud_left = rc - c[ones].sum() if rc is not None else None
+            if (cap_left is not None and cap_left < 0) or (bud_left is not None and bud_left < 0):
+                # The fixed-in side overflows a real constraint (surrogate artefact): widen the core
+                core_size = min(len(free), max(1, core_size * 2))
+                continue
+
+            round_start = time.time()
+            remaining = max(0.1, timelimit - (round_start - start_time))
+            in_core = np.zeros(len(table), dtype=bool)
+            in_core[free[core]] = True
+            # The subsolver's own incumbents are core-only values; keep them off the caller's stream
+            with tracking(cancel=outer.cancel if outer is not None else None):
+                sub_chosen, sub_val, sub_upper = _solve_subproblem(
+                    table.subset(in_core), cap_left, bud_left, remaining,
+                    params.get("dp_memory_mb", DEFAULT_DP_MEMORY_MB),
+                )
+            value = base + float(v[ones].sum()) + sub_val
+            if value > best_val:
+                best_val = value
+                best = fixed.copy()
+                best[free[ones]] = True
+                best[free[core][sub_chosen]] = True
+
+            outside = flip_bound[~core]
+            core_upper = float(floor(base + float(v[ones].sum()) + sub_upper))
+            upper = max(core_upper, outside.max() if len(outside) else -np.inf)
+            upper = max(min(upper, float(floor(base + lp))), best_val)
+            tol = 1e-9 * max(1.0, abs(best_val))
+            if report_incumbent(best_val, upper, source="core", selected=lambda: table.select(best)):
+                status = "stopped"
+            if upper <= best_val + tol:
+                status = "success"
+                break
+            if status == "stopped" or stop_requested():
+                status = "stopped"
+                break
+            # A core the subsolver could not close will not close once it is larger either
+            if core_upper > value + tol or core_size >= len(free) or core_size >= MAX_CORE_SIZE:
+                break
+            # The next core is twice as large, and a DP round cannot be cut short
+            if timelimit - (time.time() - start_time) < 2 * (time.time() - round_start):
+                break
+            core_size = min(len(free), MAX_CORE_SIZE, 2 * core_size)
+
+    runtime = round(time.time() - start_time, 3)
+    optimal = status == "success"
+    gap = float((upper - best_val) / abs(upper)) if upper else 0.0
+    if optimal:
+        print(f"🎯 Core solver proved optimality with a {core_size}-item core of {len(free)} "
+              f"in {rounds} round(s), {runtime} sec")
+    else:
+        print(f"⏱️ Core solver {'stopped' if status == 'stopped' else 'hit its limits'} at a {core_size}-item core: "
+              f"incumbent {best_val:.2f}, gap {gap * 100:.2f}%")
+    info = {
+        "mandatory_dropped": False,
+        "backend": "core",
+        "runtime": runtime,
+        "optimal": optimal,
+        "upper_bound": float(upper),
+        "gap": round(gap, 6),
+        "core_size": core_size,
+        "free_items": len(free),
+        "rounds": rounds,
+        "break_efficiency": float(eff),
+    }
+    return (table.select(best), *table.totals(best), info), status
@@ -0,0 +1,116 @@
+import time
+import numpy as np
+from models.item_table import as_table
+
+# Default cap on the DP value table plus its packed backpointer bits
+DEFAULT_DP_MEMORY_MB = 256
+
+
+def _as_int_array(col):
+    """Return the column as an int64 array, or None if any entry is non-integer or negative."""
+    if np.any(col < 0) or np.any(col != np.floor(col)):
+        return None
+    return col.astype(np.int64)
+
+
+def dp_cells(capacity, budget):
+    """Number of (weight, cost) states in the DP table for these limits."""
+    cells = 1
+    for limit in (capacity, budget):
+        if limit:
+            cells *= int(limit) + 1
+    return cells
+
+
+def dp_unsupported_reason(items, capacity, budget, max_memory_mb=DEFAULT_DP_MEMORY_MB):
+    """
+    Explain why the DP backend cannot solve this instance, or return None if it can.
+    - Weights (and costs when a budget is set) must be non-negative integers.
+    - The table (value rows + packed backpointer bits) must fit in max_memory_mb.
+    """
+    table = as_table(items)
+    if capacity and _as_int_array(table.weights) is None:
+        return "non-integer weights"
+    if budget and _as_int_array(table.costs) is None:
+        return "non-integer costs"
+
+    cells = dp_cells(capacity, budget)
+    table_mb = (cells * 8 * 2 + len(table) * cells / 8) / 2**20
+    if table_mb > max_memory_mb:
+        return f"DP table needs {table_mb:.0f} MB (cap {max_memory_mb} MB)"
+    return None
+
+
+def dp_fill(table, capacity, budget, mandatory_items=None):
+    """
+    Fill the DP value table for every capacity <= capacity and budget <= budget at once.
+    Returns (dp, free, decisions, fixed, weights, costs), where dp[w, c] is the best
+    value of the free items within weight w and cost c (mandatory weight/cost already
+    taken off), or None if the mandatory set is infeasible.
+    """
+    n = len(table)
+    values = table.values
+    weights = _as_int_array(table.weights) if capacity else np.zeros(n, dtype=np.int64)
+    costs = _as_int_array(table.costs) if budget else np.zeros(n, dtype=np.int64)
+
+    fixed = table.mask(mandatory_items)
+    cap_left = int(capacity) - int(weights[fixed].sum()) if capacity else 0
+    budget_left = int(budget) - int(costs[fixed].sum()) if budget else 0
+    if cap_left < 0 or budget_left < 0:
+        return None
+
+    # Table shape: (capacity + 1, budget + 1); an absent dimension collapses to size 1
+    dp = np.zeros((cap_left + 1, budget_left + 1))
+    free = np.flatnonzero(~fixed & (values > 0) & (weights <= cap_left) & (costs <= budget_left))
+    decisions = []
+    for k in free:
+        w, c, v = weights[k], costs[k], values[k]
+        cand = dp[:cap_left + 1 - w, :budget_left + 1 - c] + v
+        target = dp[w:, c:]
+        take = cand > target
+        target[take] = cand[take]
+        full = np.zeros(dp.shape, dtype=bool)
+        full[w:, c:] = take
+        decisions.append(np.packbits(full, axis=None))
+    return dp, free, decisions, fixed, weights, costs
+
+
+def dp_walk(filled, w_pos, c_pos):
+    """Chosen-item mask for cell (w_pos, c_pos) of a dp_fill() table, walking the bitsets backwards."""
+    dp, free, decisions, fixed, weights, costs = filled
+    chosen = fixed.copy()
+    row_len = dp.shape[1]
+    for k, bits in zip(free[::-1], decisions[::-1]):
+        cell = w_pos * row_len + c_pos
+        if (bits[cell >> 3] >> (7 - (cell & 7))) & 1:
+            chosen[k] = True
+            w_pos -= weights[k]
+            c_pos -= costs[k]
+    return chosen
+
+
+def dp_knapsack(items, capacity, budget=None, mandatory_items=None):
+    """
+    Exact row-vectorized dynamic program for the capacity and/or budget knapsack.
+    - Mandatory items are fixed in first and their weight/cost removed from the limits.
+    - Each remaining item updates the whole value table with one shifted NumPy maximum.
+    - Decisions are kept as packed bitsets (one bit per item and cell) for reconstruction.
+    - Returns (selected, value, weight, cost, info), or None if the mandatory set is infeasible.
+    Call dp_unsupported_reason() first; this function assumes integer weights/costs.
+    """
+
+    start_time = time.time()
+    table = as_table(items)
+    filled = dp_fill(table, capacity, budget, mandatory_items)
+    if filled is None:
+        return None
+    dp, free = filled[0], filled[1]
+    chosen = dp_walk(filled, dp.shape[0] - 1, dp.shape[1] - 1)
+
+    selected = table.select(chosen)
+    total_value, total_weight, total_cost = table.totals(chosen)
+    runtime = round(time.time() - start_time, 3)
+    print(f"🧮 DP solved {len(free)} free items over a {dp.shape[0]}x{dp.shape[1]} table in {runtime} sec")
+
+    info = {"mandatory_dropped": False, "backend": "dp", "runtime": runtime}
+    return selected, total_value, total_weight, total_cost, info
@@ -0,0 +1,76 @@
+"""
+GLPK exact backend through Pyomo. Registered lazily by models/knapsack_model_json.py,
+so Pyomo is only imported once this backend is actually tried.
+"""
+import numpy as np
+from pyomo.environ import ConcreteModel, Set, Var, Binary, Objective, Constraint, ConstraintList, SolverFactory, maximize
+from pyomo.opt import TerminationCondition
+from models.ortools_backend import add_rule_constraints, DEFAULT_TIMELIMIT
+from utils.profiling import phase
+
+
+def solve_glpk(table, capacity, budget, mandatory_items, params, rules=None):
+    """Pyomo model solved by the external GLPK binary"""
+    with phase("build"):
+        model = ConcreteModel()
+        items = range(len(table))
+        model.Items = Set(initialize=items)
+        model.x = Var(model.Items, within=Binary)
+        values, weights, costs = table.values.tolist(), table.weights.tolist(), table.costs.tolist()
+
+        model.obj = Objective(expr=sum(values[i] * model.x[i] for i in items), sense=maximize)
+        if capacity:
+            model.capacity = Constraint(expr=sum(weights[i] * model.x[i] for i in items) <= capacity)
+        if budget:
+            model.budget = Constraint(expr=sum(costs[i] * model.x[i] for i in items) <= budget)
+
+        # Mandatory constraints
+        model.mandatory = ConstraintList()
+        for k in np.flatnonzero(table.mask(mandatory_items)).tolist():
+            model.mandatory.add(model.x[k] == 1)
+
+        # Dependency / exclusivity / category rules
+        if rules is not None and rules.has_rules:
+            x = [model.x[i] for i in items]
+            model.rules = ConstraintList()
+            add_rule_constraints(model.rules.add, x, rules)
+
+    solver = _timed_stages(SolverFactory("glpk"))
+    try:
+        result = solver.solve(model, tee=False, timelimit=params.get("timelimit", DEFAULT_TIMELIMIT))
+    except Exception as e:
+        print(f"❌ Solver error: {e}")
+        return None, "error"
+
+    termination = result.solver.termination_condition
+    if termination in (TerminationCondition.infeasible, TerminationCondition.unbounded):
+        print("❌ Exact model infeasible or unbounded.")
+        return None, "infeasible"
+    elif termination == TerminationCondition.maxTimeLimit:
+        print("⏱️ Exact solver timeout.")
+        return None, "timeout"
+
+    # Successful solve
+    with phase("extract"):
+        chosen = np.array([model.x[i]() >= 0.5 for i in items], dtype=bool)
+        total_value, total_weight, total_cost = table.totals(chosen)
+
+    info = {"mandatory_dropped": False, "backend": "glpk"}
+    return (table.select(chosen), total_value, total_weight, total_cost, info), "success"
+
+
+def _timed_stages(solver):
+    """
+    Split a Pyomo shell solver's solve() into phases: writing the LP file and
+    reading the solution back count as "solver_io", the glpsol run as "solve".
+    """
+    for stage, name in (("_presolve", "solver_io"), ("_apply_solver", "solve"), ("_postsolve", "solver_io")):
+        method = getattr(solver, stage, None)
+        if method is None:
+            continue
+
+        def timed(*args, _method=method, _name=name, **kwargs):
+            with phase(_name):
+                return _method(*args, **kwargs)
+        setattr(solver, stage, timed)
+    return solver
@@ -0,0 +1,134 @@
+import sys
+import hashlib
+import numpy as np
+
+
+class ItemTable:
+    """
+    Array-backed item list shared by the loader, the heuristics and the model builders.
+    - values / weights / costs: float64 columns, addressed by item index.
+    - names: interned strings with a single name -> index map.
+    - category: int32 codes into `categories` (-1 = no category).
+    - dependent / exclusive: (E, 2) int64 edges (item, referenced item); references
+      to unknown names are dropped.
+    Build it once per solve (from_items / from_columns / from_data) and pass it around.
+    """
+
+    def __init__(self, names, values, weights, costs, category=None, categories=None,
+                 dependent=None, exclusive=None):
+        self.names = [sys.intern(str(name)) for name in names]
+        self.index = {name: k for k, name in enumerate(self.names)}
+        n = len(self.names)
+        self.values = np.asarray(values, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.costs = np.asarray(costs, dtype=float)
+        self.category = np.full(n, -1, dtype=np.int32) if category is None else np.asarray(category, dtype=np.int32)
+        self.categories = list(categories or [])
+        empty = np.zeros((0, 2), dtype=np.int64)
+        self.dependent = empty if dependent is None else np.asarray(dependent, dtype=np.int64).reshape(-1, 2)
+        self.exclusive = empty if exclusive is None else np.asarray(exclusive, dtype=np.int64).reshape(-1, 2)
+
+    @classmethod
+    def from_items(cls, items):
+        """Build from the classic list of item dicts in one pass."""
+        n = len(items)
+        names = [i["name"] for i in items]
+        index = {name: k for k, name in enumerate(names)}
+        codes = {}
+        category = np.fromiter(
+            (codes.setdefault(str(i["category"]), len(codes)) if i.get("category", "") != "" else -1
+             for i in items),
+            dtype=np.int32, count=n,
+        )
+        edges = {"dependent": [], "exclusive": []}
+        for k, item in enumerate(items):
+            for kind, out in edges.items():
+                for ref in item.get(kind, []) or []:
+                    j = index.get(ref)
+                    if j is not None:
+                        out.append((k, j))
+        return cls(
+            names,
+            np.fromiter((i["value"] for i in items), dtype=float, count=n),
+            np.fromiter((i["weight"] for i in items), dtype=float, count=n),
+            np.fromiter((i["cost"] for i in items), dtype=float, count=n),
+            category, sorted(codes, key=codes.get), edges["dependent"], edges["exclusive"],
+        )
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Wrap a columnar instance (utils/columnar.py); its mapped arrays are used as they are."""
+        return cls(
+            (name.decode("utf-8") for name in columns.names),
+            columns.values, columns.weights, columns.costs,
+            columns.category, columns.categories, columns.dependent, columns.exclusive,
+        )
+
+    @classmethod
+    def from_data(cls, data):
+        """The table for a solver input dict: a prebuilt "table", "columns" or "items"."""
+        if data.get("table") is not None:
+            return data["table"]
+        if data.get("columns") is not None and "items" not in data:
+            return cls.from_columns(data["columns"])
+        return cls.from_items(data.get("items", []))
+
+    def __len__(self):
+        return len(self.names)
+
+    def mask(self, names):
+        """Boolean mask of the given names (unknown names are ignored)."""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[[self.index[m] for m in set(names or []) if m in self.index]] = True
+        return mask
+
+    def select(self, chosen):
+        """Names for a boolean mask or an iterable of indices, in index order."""
+        chosen = np.asarray(chosen)
+        idx = np.flatnonzero(chosen) if chosen.dtype == bool else np.sort(chosen)
+        return [self.names[k] for k in idx]
+
+    def totals(self, chosen):
+        """(value, weight, cost) of a boolean mask or index array."""
+        return (float(self.values[chosen].sum()), float(self.weights[chosen].sum()),
+                float(self.costs[chosen].sum()))
+
+    def subset(self, keep):
+        """New table with only the items of a boolean mask; rule edges are re-indexed, dangling ones dropped."""
+        keep = np.asarray(keep, dtype=bool)
+        new_index = np.full(len(self), -1, dtype=np.int64)
+        new_index[keep] = np.arange(int(keep.sum()))
+
+        def edges(arr):
+            mapped = new_index[arr] if len(arr) else arr
+            return mapped[(mapped >= 0).all(axis=1)] if len(arr) else arr
+
+        return ItemTable(
+            self.select(keep), self.values[keep], self.weights[keep], self.costs[keep],
+            self.category[keep], self.categories, edges(self.dependent), edges(self.exclusive),
+        )
+
+    def category_name(self, k):
+        code = self.category[k]
+        return self.categories[code] if code >= 0 else ""
+
+    def exclusive_blocks(self):
+        """{j: [k, ...]}: picking item j blocks each item k that lists j as exclusive."""
+        blocked_by = {}
+        for k, j in self.exclusive.tolist():
+            blocked_by.setdefault(j, []).append(k)
+        return blocked_by
+
+    def fingerprint(self):
+        """Stable hash of the whole table, used to key cached models."""
+        h = hashlib.sha256()
+        h.update("\n".join(self.names).encode("utf-8"))
+        for arr in (self.values, self.weights, self.costs, self.category, self.dependent, self.exclusive):
+            h.update(np.ascontiguousarray(arr).data)
+        h.update("\n".join(self.categories).encode("utf-8"))
+        return h.hexdigest()
+
+
+def as_table(items):
+    """Accept an ItemTable or a list of item dicts."""
+    return items if isinstance(items, ItemTable) else ItemTable.from_items(items)
@@ -1,66 +1,336 @@
-from pyomo.environ import *
-from pyomo.opt import TerminationCondition
+import time
+import queue
+import threading
+import importlib
+import importlib.util
 from heuristics.greedy_knapsack import greedy_knapsack
+from models.dp_knapsack import dp_knapsack, dp_cells, dp_unsupported_reason, DEFAULT_DP_MEMORY_MB
+from models.ortools_backend import (
+    solve_cpsat, solve_scip, cpsat_unsupported_reason, scip_unsupported_reason,
+    DEFAULT_NUM_WORKERS, DEFAULT_TIMELIMIT
+)
+from models.branch_and_bound import branch_and_bound
+from models.core_solver import solve_core, core_unsupported_reason
+from models.constraint_index import compile_constraints
+from models.contraction import contract_groups
+from models.reduction import reduce_instance
+from models.bounds import relaxation_bound, certified_gap
+from models.item_table import ItemTable
+from models.concurrent_solve import ExactSolveProcess, can_race, RACE_GRACE
+from utils.solution_cache import SOLUTION_CACHE, DEFAULT_CACHE_DIR, instance_key
+from utils.metrics import record_solve
+from utils.profiling import profiled, phase
+from utils.incumbents import tracking, active_tracker, report_incumbent, stop_requested
 
-def solve_knapsack_from_json(data):
+# name -> {"solve": fn(table, capacity, budget, mandatory_items, params, rules) -> (solution, status),
+#          "unsupported": fn(table, capacity, budget, params, rules) -> reason or None}
+# where table is the instance's ItemTable and rules its compiled ConstraintIndex
+EXACT_BACKENDS = {}
+# Order tried by backend="auto"; an explicit backend falls back along the same list
+AUTO_BACKEND_ORDER = ["core", "dp", "cpsat", "scip", "bnb", "glpk"]
+# DP always fills its whole table; above this many cells per item bnb is tried first,
+# as it usually finishes a small instance long before DP has allocated its table
+DP_FIRST_MAX_CELLS_PER_ITEM = 64
+
+
+def lazy(target):
+    """
+    Callable for "package.module:function" that imports the module on first call,
+    so heavy solver packages (Pyomo, OR-Tools) load only when a backend is used.
+    """
+    module, _, attr = target.partition(":")
+    resolved = []
+
+    def call(*args, **kwargs):
+        if not resolved:
+            resolved.append(getattr(importlib.import_module(module), attr))
+        return resolved[0](*args, **kwargs)
+    call.__name__ = attr
+    return call
+
+
+def register_backend(name, solve, unsupported=None):
+    """
+    Register an exact solver backend selectable via the input JSON's "backend" key.
+    solve / unsupported may be "module:function" strings, imported on first use.
+    """
+    solve = lazy(solve) if isinstance(solve, str) else solve
+    unsupported = lazy(unsupported) if isinstance(unsupported, str) else unsupported
+    EXACT_BACKENDS[name] = {"solve": solve, "unsupported": unsupported or (lambda *args: None)}
+
+
+def auto_order(n, capacity, budget):
+    """AUTO_BACKEND_ORDER for an instance of n items, with bnb ahead of DP when the DP table is large."""
+    order = list(AUTO_BACKEND_ORDER)
+    if dp_cells(capacity, budget) > DP_FIRST_MAX_CELLS_PER_ITEM * max(n, 1):
+        order.remove("bnb")
+        order.insert(order.index("dp"), "bnb")
+    return order
+
+
+def backend_chain(backend, n=0, capacity=None, budget=None):
+    """Backends to try, in order, for the requested backend name on an instance of n items."""
+    order = auto_order(n, capacity, budget)
+    if backend not in EXACT_BACKENDS:
+        if backend != "auto":
+            print(f"⚠️ Unknown backend '{backend}'. Using auto backend selection.")
+        return order
+    return [backend] + [b for b in order if b != backend]
+
+
+def _no_rules(rules):
+    if rules is not None and rules.has_rules:
+        return "dependent/exclusive/category rules present"
+    return None
+
+
+def solve_dp(table, capacity, budget, mandatory_items, params, rules=None):
+    """Native dynamic-programming exact solver"""
+    with phase("solve"):
+        solution = dp_knapsack(table, capacity, budget, mandatory_items)
+    if solution is None:
+        print("❌ Exact model infeasible: mandatory items exceed capacity or budget.")
+        return None, "infeasible"
+    return solution, "success"
+
+
+def solve_bnb(table, capacity, budget, mandatory_items, params, rules=None):
+    """Native anytime branch-and-bound; keeps its incumbent and gap on timeout"""
+    with phase("solve"):
+        return branch_and_bound(
+            table, capacity, budget, mandatory_items,
+            timelimit=params.get("timelimit", DEFAULT_TIMELIMIT),
+            strategy=params.get("bnb_strategy", "dfs"),
+            max_nodes=params.get("bnb_max_nodes"),
+        )
+
+
+def _dp_unsupported(table, capacity, budget, params, rules=None):
+    return _no_rules(rules) or dp_unsupported_reason(
+        table, capacity, budget, params.get("dp_memory_mb", DEFAULT_DP_MEMORY_MB)
+    )
+
+
+def _bnb_unsupported(table, capacity, budget, params, rules=None):
+    return _no_rules(rules)
+
+
+def _glpk_unsupported(table, capacity, budget, params, rules=None):
+    if importlib.util.find_spec("pyomo") is None:
+        return "pyomo not installed"
+    return None
+
+
+def _ortools_solver(solve):
+    def run(table, capacity, budget, mandatory_items, params, rules=None):
+        return solve(table, capacity, budget, mandatory_items,
+                     params.get("timelimit", DEFAULT_TIMELIMIT), params.get("num_workers", DEFAULT_NUM_WORKERS),
+                     rules=rules)
+    return run
+
+
+register_backend("dp", solve_dp, _dp_unsupported)
+register_backend("cpsat", _ortools_solver(solve_cpsat), cpsat_unsupported_reason)
+register_backend("scip", _ortools_solver(solve_scip), scip_unsupported_reason)
+register_backend("bnb", solve_bnb, _bnb_unsupported)
+register_backend("core", solve_core, core_unsupported_reason)
+register_backend("glpk", "models.glpk_backend:solve_glpk", _glpk_unsupported)
+register_backend("persistent", "models.persistent_model:solve_persistent",
+                 "models.persistent_model:persistent_unsupported_reason")
+
+solve_metaheuristic = lazy("heuristics.metaheuristics:solve_metaheuristic")
+
+
+def solve_knapsack_from_json(data, on_incumbent=None, cancel=None):
+    """
+    Solve one instance in any solve_mode, answering repeats from the solution cache.
+    parameters.cache: true (memory, default), "disk" (memory + results/cache) or false.
+    parameters.profile: "cpu", "memory" or true for both (see utils/profiling.py).
+    Phase timings land in result["info"]["timings"]; every call is also recorded
+    in the Prometheus metrics (utils/metrics.py) when enabled.
+    on_incumbent(event) sees every improving solution (utils/incumbents.py) and
+    stops the solve by returning True; parameters.stop_at_target (stop once
+    parameters.target is reached) and parameters.stop_gap (relative gap) stop it too.
+    Heuristic answers carry an LP-relaxation upper bound and their certified gap
+    (models/bounds.py); auto mode skips the exact solver once that gap is within
+    parameters.stop_gap (0 by default: only a heuristic answer proven optimal).
+    """
+    params = data.get("parameters", {})
+    mode = str(data.get("solve_mode", "exact")).lower()
+    cache_mode = params.get("cache", True)
+    tier = key = None
+    target = params.get("target", params.get("target_value")) if params.get("stop_at_target") else None
+    with profiled(params.get("profile", False)) as prof, \
+            tracking(on_incumbent, target, params.get("stop_gap"), cancel) as tracker:
+        if not cache_mode:
+            result = _solve_knapsack(data)
+        else:
+            cache_dir = params.get("cache_dir", DEFAULT_CACHE_DIR) if cache_mode == "disk" else None
+            with phase("cache_lookup"):
+                key = instance_key(data)
+                result, tier = SOLUTION_CACHE.get(key, cache_dir)
+            if result is not None:
+                print(f"♻️ Cache hit ({tier}) for instance {key[:12]}")
+            else:
+                result = _solve_knapsack(data)
+                if not tracker.stopped:  # an early-stopped answer is not the instance's answer
+                    SOLUTION_CACHE.put(key, result, cache_dir)
+        if result is not None:
+            info = result.get("info", {})
+            proven = result["mode"] in ("exact", "auto (exact)") and info.get("optimal", True)
+            tracker.expand = None
+            tracker.report(result["value"], result["value"] if proven else info.get("upper_bound"),
+                           source="final", selected=result["selected"])
+
+    record_solve(mode, result, prof.total, cache_tier=tier)
+    if result is not None:
+        info = result.setdefault("info", {})
+        info.pop("profile", None)
+        info.update(prof.summary())
+        if key is not None:
+            info["cache"] = dict(SOLUTION_CACHE.stats, hit=tier is not None, tier=tier, key=key[:16])
+        if on_incumbent is not None or tracker.stopped:
+            info["incumbents"] = tracker.summary()
+    return result
+
+
+def iter_incumbents(data):
+    """
+    Generator over one solve's improving solutions: yields each incumbent event as it
+    is found, then {"final": True, "result": result}. Closing the generator early
+    (e.g. breaking out of the loop once an answer is good enough) stops the solve.
+    """
+    events = queue.Queue()
+    cancel = threading.Event()
+
+    def run():
+        try:
+            result = solve_knapsack_from_json(data, events.put, cancel)
+        except Exception as e:
+            events.put(e)
+        else:
+            events.put({"final": True, "result": result})
+
+    threading.Thread(target=run, name="incumbent-solve", daemon=True).start()
+    try:
+        while True:
+            event = events.get()
+            if isinstance(event, Exception):
+                raise event
+            yield event
+            if event.get("final"):
+                return
+    finally:
+        cancel.set()
+
+
+def certified(result, params):
+    """True when a feasible heuristic answer is provably within parameters.stop_gap of optimal."""
+    if result is None or result["info"].get("gap") is None:
+        return False
+    info = result["info"]
+    if info.get("mandatory_dropped") or not info.get("category_minimums_met", True):
+        return False
+    return info["gap"] <= (params.get("stop_gap") or 0.0) + 1e-9
+
+
+def _solve_knapsack(data):
+    solve_start = time.time()
     mode = data.get("solve_mode", "exact").lower()
+    backend = data.get("backend", "auto").lower()
     params = data.get("parameters", {})
     capacity = params.get("capacity")
     budget = params.get("budget")
     target_value = params.get("target_value")
-    items_data = data.get("items", [])
+
+    # One array-backed table per solve, shared by every solver path (columnar
+    # instances are wrapped without materializing item dicts)
+    with phase("load"):
+        table = ItemTable.from_data(data)
     mandatory_items = data.get("mandatory_items", [])
+    with phase("compile"):
+        rules = compile_constraints(data, table)
 
-    def run_exact():
-        """Run Pyomo-based exact solver"""
-        model = ConcreteModel()
-        items = [i["name"] for i in items_data]
-        model.Items = Set(initialize=items)
-        model.x = Var(model.Items, within=Binary)
-        values = {i["name"]: i["value"] for i in items_data}
-        weights = {i["name"]: i["weight"] for i in items_data}
-        costs = {i["name"]: i["cost"] for i in items_data}
-
-        model.obj = Objective(expr=sum(values[i] * model.x[i] for i in items), sense=maximize)
-        if capacity:
-            model.capacity = Constraint(expr=sum(weights[i] * model.x[i] for i in items) <= capacity)
-        if budget:
-            model.budget = Constraint(expr=sum(costs[i] * model.x[i] for i in items) <= budget)
+    # Collapse all-or-nothing dependency groups into super-items; selections are expanded back
+    contraction = None
+    if params.get("contract", True) and rules.has_dependencies:
+        with phase("contract"):
+            contraction = contract_groups(table, rules, mandatory_items)
+        if contraction is not None:
+            table, mandatory_items = contraction.table, contraction.mandatory_items
+            if active_tracker() is not None:
+                active_tracker().expand = contraction.expand
+            rules = compile_constraints(data, table)
+            print(f"🔗 Contracted {contraction.info['items']} items into {contraction.info['super_items']} "
+                  f"super-items ({contraction.info['groups_merged']} dependency groups).")
 
-        # Mandatory constraints
-        for m in mandatory_items:
-            if m in items:
-                setattr(model, f"mandatory_{m}", Constraint(expr=model.x[m] == 1))
+    # Shrink the instance before any solver sees it; selected names need no mapping back.
+    # Not for "persistent": its model is built once per table and re-solved with new limits,
+    # while a reduced table depends on those limits and would force a rebuild every time.
+    reduction = None
+    if params.get("reduce", True) and not rules.has_rules and backend != "persistent":
+        with phase("reduce"):
+            reduced = reduce_instance(table, capacity, budget, mandatory_items)
+        if reduced is not None:
+            table, mandatory_items, reduction = reduced
+            rules = compile_constraints(data, table)
+            print(f"✂️ Reduction eliminated {reduction['eliminated']} of {reduction['items']} items "
+                  f"({reduction['by']}).")
 
-        solver = SolverFactory("glpk")
-        try:
-            result = solver.solve(model, tee=False, timelimit=10)  # 10s time cap
-        except Exception as e:
-            print(f"❌ Solver error: {e}")
-            return None, "error"
+    def finish(result):
+        """Expand super-items back to item names and attach the presolve summaries."""
+        info = result["info"]
+        if contraction:
+            result["selected"] = contraction.expand(result["selected"])
+            info["contraction"] = contraction.info
+        if reduction:
+            info["reduction"] = reduction
+        return result
 
-        termination = result.solver.termination_condition
-        if termination in (TerminationCondition.infeasible, TerminationCondition.unbounded):
-            print("❌ Exact model infeasible or unbounded.")
+    def attach_bound(result):
+        """Give a heuristic result the relaxation's upper bound and its certified gap."""
+        if result is None or not params.get("bound", True):
+            return result
+        with phase("bound"):
+            bound = relaxation_bound(table, capacity, budget, mandatory_items)
+        info = result["info"]
+        info["bound"] = bound
+        info["upper_bound"] = bound["upper_bound"]
+        # Only an answer within capacity and budget is certified; an overfull repair gets no gap
+        fits = (not capacity or result["weight"] <= capacity) and (not budget or result["cost"] <= budget)
+        info["gap"] = round(certified_gap(result["value"], bound["upper_bound"]), 6) if fits else None
+        report_incumbent(None, bound["upper_bound"], source="bound")
+        return result
+
+    def run_exact():
+        """Run the exact solver on the selected backend, falling back when it does not apply"""
+        if rules.unsatisfiable:
+            print(f"❌ Exact model infeasible: category minimums exceed available items {rules.unsatisfiable}.")
             return None, "infeasible"
-        elif termination == TerminationCondition.maxTimeLimit:
-            print("⏱️ Exact solver timeout.")
-            return None, "timeout"
-
-        # Successful solve
-        selected = [i for i in items if model.x[i]() >= 0.5]
-        total_value = sum(values[i] for i in selected)
-        total_weight = sum(weights[i] for i in selected)
-        total_cost = sum(costs[i] for i in selected)
-
-        return {
-            "mode": "exact",
-            "selected": selected,
-            "value": total_value,
-            "weight": total_weight,
-            "cost": total_cost,
-            "info": {"mandatory_dropped": False}
-        }, "success"
+        for name in backend_chain(backend, len(table), capacity, budget):
+            reason = EXACT_BACKENDS[name]["unsupported"](table, capacity, budget, params, rules)
+            if reason:
+                print(f"↩️ {name} backend not applicable ({reason}). Trying next backend.")
+                continue
+
+            solution, status = EXACT_BACKENDS[name]["solve"](
+                table, capacity, budget, mandatory_items, params, rules
+            )
+            if solution is None:
+                return None, status
+
+            selected, total_value, total_weight, total_cost, info = solution
+            if rules.has_rules:
+                info["constraint_index"] = rules.summary()
+            return finish({
+                "mode": "exact",
+                "selected": selected,
+                "value": total_value,
+                "weight": total_weight,
+                "cost": total_cost,
+                "info": info,
+            }), status
+        return None, "error"
 
     def run_heuristic():
         """Run the greedy heuristic solver"""
@@ -69,23 +339,46 @@ def solve_knapsack_from_json(data):
             print("⚠️ Capacity required for heuristic solver. Skipping.")
             return None, "error"
 
-        selected, total_value, total_weight, total_cost, info = greedy_knapsack(
-            items_data, capacity, budget, mandatory_items
-        )
-
-        result = {
+        with phase("heuristic"):
+            selected, total_value, total_weight, total_cost, info = greedy_knapsack(
+                table, capacity, budget, mandatory_items,
+                engine=params.get("heuristic_engine", "auto"),
+                local_search_strategy=params.get("local_search", "first"),
+                rules=rules,
+                time_limit=max(0.0, solve_start + params.get("timelimit", DEFAULT_TIMELIMIT) - time.time()),
+            )
+        result = attach_bound(finish({
             "mode": "heuristic",
             "selected": selected,
             "value": total_value,
             "weight": total_weight,
             "cost": total_cost,
             "info": info,
-        }
+        }))
 
         if info.get("mandatory_dropped"):
             print("\n⚠️ Mandatory adjustments applied in heuristic solution.")
         return result, "success"
 
+    def run_metaheuristic():
+        """Run the island-model metaheuristic (tabu / annealing / genetic)"""
+        if not capacity:
+            print("⚠️ Capacity required for metaheuristic solver. Skipping.")
+            return None, "error"
+
+        with phase("search"):
+            selected, total_value, total_weight, total_cost, info = solve_metaheuristic(
+                table, capacity, budget, mandatory_items, rules=rules, params=params
+            )
+        return attach_bound(finish({
+            "mode": "metaheuristic",
+            "selected": selected,
+            "value": total_value,
+            "weight": total_weight,
+            "cost": total_cost,
+            "info": info,
+        })), "success"
+
     # --------------------- Mode Handling ---------------------
     print(f"\n🧩 Solve Mode: {mode.upper()}")
 
@@ -97,12 +390,62 @@ def solve_knapsack_from_json(data):
         result, status = run_heuristic()
         return result
 
+    elif mode == "metaheuristic":
+        result, status = run_metaheuristic()
+        return result
+
+    elif mode == "auto" and params.get("race", True) and can_race():
+        print("🤖 Auto Mode: Racing exact solver against heuristic...")
+        start_time = time.time()
+        deadline = params.get("auto_deadline", params.get("timelimit", DEFAULT_TIMELIMIT))
+        exact_proc = ExactSolveProcess(data)
+        try:
+            heuristic_result, _ = run_heuristic()
+            if certified(heuristic_result, params):
+                print(f"📐 Heuristic answer is within {heuristic_result['info']['gap']:.4%} of the LP bound; "
+                      f"not waiting for the exact solver.")
+                heuristic_result["mode"] = "auto (heuristic certified)"
+                return heuristic_result
+            if stop_requested() and heuristic_result:
+                print("🛑 Heuristic answer is good enough; not waiting for the exact solver.")
+                heuristic_result["mode"] = "auto (heuristic early stop)"
+                return heuristic_result
+            remaining = max(0.0, start_time + deadline - time.time())
+            result, status = exact_proc.result(timeout=remaining)
+        finally:
+            exact_proc.cancel()
+
+        if result:
+            print("✅ Exact solver finished within the deadline; upgrading to exact answer.")
+            result["info"]["exact_timings"] = result["info"].pop("timings", None)
+            proven = result["info"].get("optimal", True)
+            result["mode"] = "auto (exact)" if proven else "auto (exact incumbent)"
+            return result
+        print(f"🔁 Exact solver {'missed the deadline' if status == 'deadline' else 'failed'}; "
+              f"using heuristic answer.")
+        if heuristic_result:
+            heuristic_result["mode"] = "auto (heuristic fallback)"
+        return heuristic_result
+
     elif mode == "auto":
-        print("🤖 Auto Mode: Trying exact solver first...")
+        heuristic_result = None
+        if capacity:
+            print("🤖 Auto Mode: Bounding a heuristic answer first...")
+            heuristic_result, _ = run_heuristic()
+            if certified(heuristic_result, params):
+                print(f"📐 Heuristic answer is within {heuristic_result['info']['gap']:.4%} of the LP bound; "
+                      f"skipping the exact solver.")
+                heuristic_result["mode"] = "auto (heuristic certified)"
+                return heuristic_result
+        print("🤖 Auto Mode: Trying exact solver...")
         result, status = run_exact()
-        if status != "success":
+        if result is not None and status in ("timeout", "stopped"):
+            print(f"⏱️ Exact solver {'stopped early' if status == 'stopped' else 'timed out'}; "
+                  f"keeping its incumbent (gap {result['info'].get('gap')}).")
+            result["mode"] = "auto (exact incumbent)"
+        elif status != "success":
             print("🔁 Switching to heuristic fallback...")
-            result, _ = run_heuristic()
+            result = heuristic_result if heuristic_result is not None else run_heuristic()[0]
             if result:
                 result["mode"] = "auto (heuristic fallback)"
         else:
@@ -114,3 +457,36 @@ def solve_knapsack_from_json(data):
         print(f"⚠️ Unknown solve_mode '{mode}'. Defaulting to exact solver.")
         result, _ = run_exact()
         return result
+
+
+def solve_compare(data):
+    """
+    Run the exact and heuristic solvers concurrently for compare mode.
+    Wall-clock is about max(exact, heuristic); the exact child is killed if it
+    overruns its timelimit. Returns (result_exact, result_heuristic).
+    parameters.compare_exact: true (default) always solves exactly; false reports the
+    heuristic against its LP bound only (result_exact is None); "auto" solves exactly
+    only when the heuristic is not certified within parameters.stop_gap.
+    """
+    params = data.get("parameters", {})
+    data_exact = dict(data, solve_mode="exact")
+    data_heuristic = dict(data, solve_mode="heuristic")
+    compare_exact = params.get("compare_exact", True)
+    if compare_exact is not True:
+        result_heuristic = solve_knapsack_from_json(data_heuristic)
+        if compare_exact == "auto" and not certified(result_heuristic, params):
+            return solve_knapsack_from_json(data_exact), result_heuristic
+        print("📐 Comparing against the LP bound instead of an exact solve.")
+        return None, result_heuristic
+    if not (params.get("race", True) and can_race()):
+        return solve_knapsack_from_json(data_exact), solve_knapsack_from_json(data_heuristic)
+
+    start_time = time.time()
+    exact_proc = ExactSolveProcess(data_exact)
+    try:
+        result_heuristic = solve_knapsack_from_json(data_heuristic)
+        remaining = start_time + params.get("timelimit", DEFAULT_TIMELIMIT) + RACE_GRACE - time.time()
+        result_exact, _ = exact_proc.result(timeout=max(0.0, remaining))
+    finally:
+        exact_proc.cancel()
+    return result_exact, result_heuristic
@@ -0,0 +1,208 @@
+import os
+import time
+import numpy as np
+from models.item_table import as_table
+from utils.profiling import phase
+from utils.incumbents import active_tracker
+
+_ORTOOLS = {}
+
+DEFAULT_NUM_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_TIMELIMIT = 10  # seconds, per exact solve
+
+
+def load_ortools():
+    """
+    (cp_model, pywraplp), imported on first use so heuristic-only runs never pay
+    the OR-Tools import; (None, None) when ortools is not installed.
+    """
+    if not _ORTOOLS:
+        try:
+            from ortools.sat.python import cp_model
+            from ortools.linear_solver import pywraplp
+        except ImportError:  # pragma: no cover - ortools is in requirements.txt
+            cp_model = pywraplp = None
+        _ORTOOLS.update(cp_model=cp_model, pywraplp=pywraplp)
+    return _ORTOOLS["cp_model"], _ORTOOLS["pywraplp"]
+
+
+def _columns(table):
+    return table.values.tolist(), table.weights.tolist(), table.costs.tolist()
+
+
+def _solution(table, chosen, backend, start_time, extra=None):
+    """Build the (selected, value, weight, cost, info) tuple from a 0/1 list."""
+    picked = np.asarray(chosen, dtype=bool)
+    runtime = round(time.time() - start_time, 3)
+    info = {"mandatory_dropped": False, "backend": backend, "runtime": runtime}
+    info.update(extra or {})
+    return (table.select(picked), *table.totals(picked), info)
+
+
+def _gap(value, bound):
+    return round((bound - value) / abs(bound), 6) if bound else 0.0
+
+
+def add_rule_constraints(add, x, rules):
+    """
+    Post dependency / exclusivity / category constraints from a ConstraintIndex.
+    `add` receives linear expressions built from the 0/1 variables x.
+    """
+    if rules is None or not rules.has_rules:
+        return
+    for members in rules.members:
+        for k in members[1:]:
+            add(x[members[0]] == x[k])
+    for clique in rules.conflict_cliques():
+        add(sum(x[k] for k in clique) <= 1)
+    for code, category in enumerate(rules.categories):
+        in_cat = [x[k] for k in (rules.category_of == code).nonzero()[0]]
+        if not in_cat:
+            continue
+        add(sum(in_cat) >= int(rules.cat_min[code]))
+        add(sum(in_cat) <= int(rules.cat_max[code]))
+
+
+def cpsat_unsupported_reason(items, capacity, budget, params=None, rules=None):
+    """CP-SAT needs integer constraint coefficients; the objective may be fractional."""
+    cp_model, _ = load_ortools()
+    if cp_model is None:
+        return "ortools not installed"
+    table = as_table(items)
+    if capacity and np.any(table.weights != np.floor(table.weights)):
+        return "non-integer weights"
+    if budget and np.any(table.costs != np.floor(table.costs)):
+        return "non-integer costs"
+    return None
+
+
+def scip_unsupported_reason(items, capacity, budget, params=None, rules=None):
+    _, pywraplp = load_ortools()
+    if pywraplp is None:
+        return "ortools not installed"
+    if pywraplp.Solver.CreateSolver("SCIP") is None:
+        return "SCIP not available in this ortools build"
+    return None
+
+
+def solve_cpsat(items, capacity, budget, mandatory_items, timelimit, num_workers=DEFAULT_NUM_WORKERS, rules=None):
+    """
+    Solve the knapsack in-process with OR-Tools CP-SAT.
+    - Builds the model straight from the value/weight/cost columns (no LP file, no subprocess).
+    - Runs num_workers parallel search workers under the given time limit.
+    - Posts the compiled dependency / exclusivity / category rules when given.
+    - Returns (solution, status) like the other exact backends.
+    """
+
+    cp_model, _ = load_ortools()
+    start_time = time.time()
+    table = as_table(items)
+    with phase("build"):
+        values, weights, costs = _columns(table)
+        model = cp_model.CpModel()
+        x = [model.NewBoolVar(f"x{k}") for k in range(len(table))]
+
+        if capacity:
+            model.Add(cp_model.LinearExpr.WeightedSum(x, [int(w) for w in weights]) <= int(capacity))
+        if budget:
+            model.Add(cp_model.LinearExpr.WeightedSum(x, [int(c) for c in costs]) <= int(budget))
+        for k in np.flatnonzero(table.mask(mandatory_items)):
+            model.Add(x[k] == 1)
+        add_rule_constraints(model.Add, x, rules)
+        model.Maximize(cp_model.LinearExpr.WeightedSum(x, values))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(timelimit)
+    solver.parameters.num_workers = int(num_workers)
+    tracker = active_tracker()
+    with phase("solve"):
+        if tracker is None:
+            status = solver.Solve(model)
+        else:
+            status = solver.Solve(model, _incumbent_callback(cp_model, tracker, x, table))
+
+    if status == cp_model.INFEASIBLE:
+        print("❌ Exact model infeasible or unbounded.")
+        return None, "infeasible"
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print("⏱️ Exact solver timeout.")
+        return None, "timeout"
+
+    # On timeout with an incumbent, keep it and report the proven gap
+    optimal = status == cp_model.OPTIMAL
+    with phase("extract"):
+        chosen = [solver.Value(v) for v in x]
+        bound = solver.BestObjectiveBound()
+        extra = {"num_workers": int(num_workers), "optimal": optimal,
+                 "upper_bound": bound, "gap": _gap(solver.ObjectiveValue(), bound)}
+        solution = _solution(table, chosen, "cpsat", start_time, extra)
+    if optimal:
+        return solution, "success"
+    if tracker is not None and tracker.stopped:
+        print(f"🛑 Exact solver stopped early ({tracker.stop_reason}); returning incumbent "
+              f"(gap {extra['gap'] * 100:.2f}%).")
+        return solution, "stopped"
+    print(f"⏱️ Exact solver timeout; returning incumbent (gap {extra['gap'] * 100:.2f}%).")
+    return solution, "timeout"
+
+
+def _incumbent_callback(cp_model, tracker, x, table):
+    """CP-SAT solution callback feeding each incumbent and bound to the tracker; stops the search on request."""
+
+    class IncumbentCallback(cp_model.CpSolverSolutionCallback):
+        def on_solution_callback(self):
+            selected = lambda: table.select(np.array([self.Value(v) for v in x], dtype=bool))  # noqa: E731
+            if tracker.report(self.ObjectiveValue(), self.BestObjectiveBound(), "cpsat", selected):
+                self.StopSearch()
+
+    return IncumbentCallback()
+
+
+def solve_scip(items, capacity, budget, mandatory_items, timelimit, num_workers=DEFAULT_NUM_WORKERS, rules=None):
+    """Solve the knapsack in-process with SCIP through the OR-Tools linear solver wrapper."""
+
+    _, pywraplp = load_ortools()
+    start_time = time.time()
+    table = as_table(items)
+    with phase("build"):
+        values, weights, costs = _columns(table)
+        solver = pywraplp.Solver.CreateSolver("SCIP")
+        x = [solver.BoolVar(f"x{k}") for k in range(len(table))]
+
+        if capacity:
+            solver.Add(solver.Sum([w * v for w, v in zip(weights, x)]) <= capacity)
+        if budget:
+            solver.Add(solver.Sum([c * v for c, v in zip(costs, x)]) <= budget)
+        for k in np.flatnonzero(table.mask(mandatory_items)):
+            x[k].SetLb(1)
+        add_rule_constraints(solver.Add, x, rules)
+        solver.Maximize(solver.Sum([val * v for val, v in zip(values, x)]))
+
+    solver.SetTimeLimit(int(timelimit * 1000))
+    solver.SetNumThreads(int(num_workers))
+    tracker = active_tracker()  # no SCIP incumbent callback; the tracker only tells a stop from a timeout
+    with phase("solve"):
+        status = solver.Solve()
+
+    if status in (pywraplp.Solver.INFEASIBLE, pywraplp.Solver.UNBOUNDED):
+        print("❌ Exact model infeasible or unbounded.")
+        return None, "infeasible"
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        print("⏱️ Exact solver timeout.")
+        return None, "timeout"
+
+    optimal = status == pywraplp.Solver.OPTIMAL
+    with phase("extract"):
+        chosen = [v.solution_value() >= 0.5 for v in x]
+        objective = solver.Objective()
+        extra = {"optimal": optimal, "upper_bound": objective.BestBound(),
+                 "gap": _gap(objective.Value(), objective.BestBound())}
+        solution = _solution(table, chosen, "scip", start_time, extra)
+    if optimal:
+        return solution, "success"
+    if tracker is not None and tracker.stopped:
+        print(f"🛑 Exact solver stopped early ({tracker.stop_reason}); returning incumbent "
+              f"(gap {extra['gap'] * 100:.2f}%).")
+        return solution, "stopped"
+    print(f"⏱️ Exact solver timeout; returning incumbent (gap {extra['gap'] * 100:.2f}%).")
+    return solution, "timeout"
@@ -0,0 +1,160 @@
+import time
+from models.item_table import ItemTable
+from models.dp_knapsack import dp_fill, dp_walk, dp_unsupported_reason, DEFAULT_DP_MEMORY_MB
+from models.constraint_index import compile_constraints
+
+
+def sweep_points(data, capacities=None, budgets=None):
+    """
+    (capacity, budget) points for a sweep: each capacity at the instance's budget
+    (the value-vs-capacity frontier) and each budget at its capacity (value-vs-budget).
+    Non-positive settings are skipped: a zero limit means "no limit" to the solvers.
+    """
+    params = data.get("parameters", {})
+    points = [(c, params.get("budget")) for c in capacities or [] if c > 0]
+    points += [(params.get("capacity"), b) for b in budgets or [] if b > 0]
+    return list(dict.fromkeys(points))
+
+
+def _row(capacity, budget, table, chosen, source):
+    value, weight, cost = table.totals(chosen)
+    return {"capacity": capacity, "budget": budget, "value": value, "weight": weight, "cost": cost,
+            "selected": table.select(chosen), "source": source}
+
+
+def _axis_limits(points, axis, column):
+    """
+    DP table size along one axis (None when no point limits it) and each point's room on it.
+    A None/0 limit means "no limit": such a point gets the column's total, which nothing can exceed.
+    """
+    limits = [point[axis] for point in points]
+    if not any(limits):
+        return None, [None] * len(points)
+    unlimited = int(column[column > 0].sum())
+    rooms = [int(limit) if limit else max(unlimited, 0) for limit in limits]
+    return max(rooms), rooms
+
+
+def _sweep_dp(table, points, mandatory_items):
+    """Every point from one DP fill at the largest capacity and budget, read off its table."""
+    max_cap, cap_rooms = _axis_limits(points, 0, table.weights)
+    max_bud, bud_rooms = _axis_limits(points, 1, table.costs)
+    filled = dp_fill(table, max_cap, max_bud, mandatory_items)
+    if filled is None:
+        return [{"capacity": c, "budget": b, "status": "infeasible"} for c, b in points]
+    dp, fixed, weights, costs = filled[0], filled[3], filled[4], filled[5]
+    fixed_w, fixed_c = int(weights[fixed].sum()), int(costs[fixed].sum())
+    rows = []
+    for (capacity, budget), cap_room, bud_room in zip(points, cap_rooms, bud_rooms):
+        w_pos = cap_room - fixed_w if max_cap else 0
+        c_pos = bud_room - fixed_c if max_bud else 0
+        if w_pos < 0 or c_pos < 0:
+            rows.append({"capacity": capacity, "budget": budget, "status": "infeasible"})
+            continue
+        rows.append(_row(capacity, budget, table, dp_walk(filled, w_pos, c_pos), "dp"))
+    return rows
+
+
+def _covers(row, capacity, budget):
+    """True when a solved row's solution stays optimal at a point it dominates."""
+    if row.get("status", "success") != "success" or not row.get("optimal", True):
+        return False
+    within = [(row["capacity"], capacity, row["weight"]), (row["budget"], budget, row["cost"])]
+    for limit, point, used in within:
+        limit, point = limit or None, point or None  # 0 means "no limit" too
+        if point is None:
+            if limit is not None:
+                return False
+        elif limit is None or limit < point or used > point:
+            return False
+    return True
+
+
+def _sweep_solves(data, points, backend, solve):
+    """
+    One exact solve per point, largest limits first. A point inside a solved point's
+    limits whose solution still fits there has the same optimum, so it is not re-solved.
+    """
+    big = float("inf")
+    order = sorted(points, key=lambda p: (p[0] if p[0] is not None else big, p[1] if p[1] is not None else big),
+                   reverse=True)
+    params = data.get("parameters", {})
+    solved, rows = [], {}
+    for capacity, budget in order:
+        source = next((row for row in solved if _covers(row, capacity, budget)), None)
+        if source is not None:
+            rows[(capacity, budget)] = dict(source, capacity=capacity, budget=budget, source="reused")
+            continue
+        point_params = dict(params, capacity=capacity, budget=budget)
+        result = solve(dict(data, solve_mode="exact", backend=backend, parameters=point_params))
+        if result is None:
+            rows[(capacity, budget)] = {"capacity": capacity, "budget": budget, "status": "no_solution"}
+            continue
+        info = result.get("info", {})
+        row = {"capacity": capacity, "budget": budget, "value": result["value"], "weight": result["weight"],
+               "cost": result["cost"], "selected": result["selected"],
+               "source": f"solve:{info.get('backend', backend)}", "optimal": info.get("optimal", True)}
+        solved.append(row)
+        rows[(capacity, budget)] = row
+    return [rows[p] for p in points]
+
+
+def parametric_sweep(data, capacities=None, budgets=None, backend=None, solve=None):
+    """
+    Optimal value and selection at many capacity / budget settings, in far fewer than one solve each.
+    - Without rules and with integer data small enough for the DP, a single DP fill at
+      the largest limits answers every point (its table holds every smaller capacity/budget).
+    - Otherwise points are solved largest first through solve_knapsack_from_json, reusing a
+      solution wherever it stays optimal; backend "persistent" re-solves one built MIP with warm starts.
+    Returns {"points": rows in sweep_points() order, "info": {...}}.
+    """
+    start_time = time.time()
+    params = data.get("parameters", {})
+    points = sweep_points(data, capacities, budgets)
+    mandatory_items = data.get("mandatory_items", [])
+    table = ItemTable.from_data(data)
+    rules = compile_constraints(data, table)
+    backend = backend or data.get("backend", "auto")
+
+    max_cap = _axis_limits(points, 0, table.weights)[0]
+    max_bud = _axis_limits(points, 1, table.costs)[0]
+    reason = "rules present" if rules.has_rules else None
+    if reason is None and backend in ("auto", "dp"):
+        reason = dp_unsupported_reason(table, max_cap, max_bud, params.get("dp_memory_mb", DEFAULT_DP_MEMORY_MB))
+    elif reason is None:
+        reason = f"backend '{backend}' requested"
+
+    if reason is None:
+        print(f"🧮 Sweeping {len(points)} points with one DP table ({max_cap} x {max_bud})")
+        rows = _sweep_dp(table, points, mandatory_items)
+        method = "dp"
+    else:
+        print(f"🔁 DP sweep not applicable ({reason}); solving {len(points)} points largest first")
+        if solve is None:
+            from models.knapsack_model_json import solve_knapsack_from_json as solve
+        rows = _sweep_solves(data, points, backend, solve)
+        method = "solves"
+
+    for row in rows:
+        row.setdefault("status", "success")
+        row.pop("optimal", None)
+    return {
+        "points": rows,
+        "info": {
+            "method": method,
+            "points": len(points),
+            "solves": 1 if method == "dp" else sum(row.get("source", "").startswith("solve") for row in rows),
+            "reused": sum(row.get("source") == "reused" for row in rows),
+            "runtime": round(time.time() - start_time, 3),
+        },
+    }
+
+
+def breakpoints(rows, axis):
+    """Rows along one axis where the optimal value changes (the frontier's corners)."""
+    out, last = [], None
+    for row in sorted((r for r in rows if r["status"] == "success" and r[axis] is not None), key=lambda r: r[axis]):
+        if last is None or row["value"] != last:
+            out.append(row)
+            last = row["value"]
+    return out
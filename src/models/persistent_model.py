@@ -0,0 +1,157 @@
+import time
+from collections import OrderedDict
+import numpy as np
+from heuristics.greedy_knapsack import greedy_knapsack
+from models.ortools_backend import load_ortools, add_rule_constraints, DEFAULT_NUM_WORKERS, DEFAULT_TIMELIMIT
+from models.bounds import certified_gap
+from models.item_table import as_table
+from utils.incumbents import active_tracker
+from utils.profiling import phase
+
+# Number of item catalogues whose built models are kept alive between solves
+MAX_PERSISTENT_MODELS = 4
+_PERSISTENT_MODELS = OrderedDict()
+
+
+class PersistentKnapsackModel:
+    """
+    Knapsack MIP that is built once per item catalogue and re-solved in memory.
+    - Item variables, objective and the capacity/budget rows are created once.
+    - capacity, budget and mandatory fixings are mutable bounds changed per solve.
+    - Every solve is seeded with the greedy heuristic's solution as a MIP start.
+    """
+
+    def __init__(self, items, solver_id="SCIP", num_workers=DEFAULT_NUM_WORKERS, rules=None):
+        start_time = time.time()
+        _, self.pywraplp = load_ortools()
+        self.table = as_table(items)
+        self.solver_id = solver_id
+        self.solver = self.pywraplp.Solver.CreateSolver(solver_id)
+        if self.solver is None:
+            raise RuntimeError(f"{solver_id} not available in this ortools build")
+        self.solver.SetNumThreads(int(num_workers))
+
+        inf = self.solver.infinity()
+        self.x = [self.solver.BoolVar(f"x{k}") for k in range(len(self.table))]
+        self.capacity_row = self.solver.Constraint(-inf, inf, "capacity")
+        self.budget_row = self.solver.Constraint(-inf, inf, "budget")
+        objective = self.solver.Objective()
+        columns = zip(self.x, self.table.values.tolist(), self.table.weights.tolist(), self.table.costs.tolist())
+        for var, value, weight, cost in columns:
+            self.capacity_row.SetCoefficient(var, weight)
+            self.budget_row.SetCoefficient(var, cost)
+            objective.SetCoefficient(var, value)
+        objective.SetMaximization()
+        add_rule_constraints(self.solver.Add, self.x, rules)
+        self.rules = rules
+        self.fixed = set()
+        self.solves = 0
+        self.build_time = round(time.time() - start_time, 3)
+
+    def set_parameters(self, capacity=None, budget=None, mandatory_items=None):
+        """Update the right-hand sides and mandatory fixings in place."""
+        inf = self.solver.infinity()
+        self.capacity_row.SetUb(capacity if capacity else inf)
+        self.budget_row.SetUb(budget if budget else inf)
+
+        wanted = set(np.flatnonzero(self.table.mask(mandatory_items)).tolist())
+        for k in self.fixed - wanted:
+            self.x[k].SetLb(0)
+        for k in wanted - self.fixed:
+            self.x[k].SetLb(1)
+        self.fixed = wanted
+
+    def solve(self, capacity=None, budget=None, mandatory_items=None, timelimit=DEFAULT_TIMELIMIT,
+              warm_start=True):
+        """Re-solve for new parameters; returns (solution, status) like the exact backends."""
+        start_time = time.time()
+        self.set_parameters(capacity, budget, mandatory_items)
+
+        warm_value = None
+        if warm_start:
+            with phase("warm_start"):
+                selected, warm_value, wt, cst, _ = greedy_knapsack(
+                    self.table, capacity, budget, mandatory_items, local_search_strategy="none", rules=self.rules
+                )
+            if (capacity and wt > capacity) or (budget and cst > budget):
+                warm_value = None  # mandatory set alone is infeasible, no usable start
+            else:
+                self.solver.SetHint(self.x, self.table.mask(selected).astype(float).tolist())
+
+        self.solver.SetTimeLimit(int(timelimit * 1000))
+        tracker = active_tracker()  # no incumbent callback; the tracker only tells a stop from a timeout
+        with phase("solve"):
+            status = self.solver.Solve()
+        self.solves += 1
+
+        if status in (self.pywraplp.Solver.INFEASIBLE, self.pywraplp.Solver.UNBOUNDED):
+            print("❌ Exact model infeasible or unbounded.")
+            return None, "infeasible"
+        if status not in (self.pywraplp.Solver.OPTIMAL, self.pywraplp.Solver.FEASIBLE):
+            print("⏱️ Exact solver timeout.")
+            return None, "timeout"
+
+        # On timeout with an incumbent, keep it and report the proven gap
+        optimal = status == self.pywraplp.Solver.OPTIMAL
+        with phase("extract"):
+            picked = np.array([var.solution_value() >= 0.5 for var in self.x], dtype=bool)
+            objective = self.solver.Objective()
+        info = {
+            "mandatory_dropped": False,
+            "backend": "persistent",
+            "runtime": round(time.time() - start_time, 3),
+            "optimal": optimal,
+            "upper_bound": objective.BestBound(),
+            "gap": round(certified_gap(objective.Value(), objective.BestBound()), 6),
+            "persistent_solves": self.solves,
+            "build_time": self.build_time,
+            "warm_start_value": warm_value,
+        }
+        solution = (self.table.select(picked), *self.table.totals(picked), info)
+        if optimal:
+            return solution, "success"
+        if tracker is not None and tracker.stopped:
+            print(f"🛑 Exact solver stopped early ({tracker.stop_reason}); returning incumbent "
+                  f"(gap {info['gap'] * 100:.2f}%).")
+            return solution, "stopped"
+        print(f"⏱️ Exact solver timeout; returning incumbent (gap {info['gap'] * 100:.2f}%).")
+        return solution, "timeout"
+
+
+def get_persistent_model(items, solver_id="SCIP", num_workers=DEFAULT_NUM_WORKERS, rules=None):
+    """Return the live model for this item catalogue (and its rules), building it on first use."""
+    table = as_table(items)
+    key = (solver_id, table.fingerprint())
+    if rules is not None and rules.has_categories:
+        key += (tuple(rules.categories), tuple(rules.cat_min.tolist()), tuple(rules.cat_max.tolist()))
+    model = _PERSISTENT_MODELS.get(key)
+    if model is None:
+        print(f"🏗️ Building persistent {solver_id} model for {len(table)} items...")
+        with phase("build"):
+            model = PersistentKnapsackModel(table, solver_id, num_workers, rules)
+        _PERSISTENT_MODELS[key] = model
+        if len(_PERSISTENT_MODELS) > MAX_PERSISTENT_MODELS:
+            _PERSISTENT_MODELS.popitem(last=False)
+    else:
+        _PERSISTENT_MODELS.move_to_end(key)
+    return model
+
+
+def persistent_unsupported_reason(items, capacity, budget, params=None, rules=None):
+    _, pywraplp = load_ortools()
+    if pywraplp is None:
+        return "ortools not installed"
+    solver_id = (params or {}).get("persistent_solver", "SCIP")
+    if pywraplp.Solver.CreateSolver(solver_id) is None:
+        return f"{solver_id} not available in this ortools build"
+    return None
+
+
+def solve_persistent(items, capacity, budget, mandatory_items, params, rules=None):
+    """Exact backend entry point: re-solve the cached model for this catalogue."""
+    model = get_persistent_model(
+        items, params.get("persistent_solver", "SCIP"), params.get("num_workers", DEFAULT_NUM_WORKERS),
+        rules
+    )
+    return model.solve(capacity, budget, mandatory_items, params.get("timelimit", DEFAULT_TIMELIMIT),
+                       params.get("warm_start", True))
@@ -0,0 +1,192 @@
+import time
+import numpy as np
+from heuristics.greedy_knapsack import TAIL_CHUNK
+from models.bounds import dantzig_break, surrogate_multiplier
+
+# Dominance is checked against this many strong items (a sound lower bound on each item's dominators)
+DOMINANCE_POOL = 256
+# Items compared against the pool per NumPy block
+DOMINANCE_CHUNK = 8192
+# Reductions are skipped below this many items; the solvers are instant there anyway
+MIN_REDUCE_ITEMS = 16
+
+
+def _max_cardinality(sizes, room):
+    """Most items that fit in room, counting the smallest ones first."""
+    if room is None:
+        return len(sizes)
+    return int(np.searchsorted(np.cumsum(np.sort(sizes)), room, side="right"))
+
+
+def _greedy_value(values, weights, costs, cap, bud, sizes):
+    """Value of a greedy fill in order of values / sizes: fitting prefix, then the tail in chunks."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        order = np.argsort(-np.where(sizes > 0, values / np.where(sizes > 0, sizes, 1), np.inf))
+    w, c = weights[order], costs[order]
+    rem_w = cap if cap else np.inf
+    rem_c = bud if bud else np.inf
+    fits = (np.cumsum(w) <= rem_w) & (np.cumsum(c) <= rem_c)
+    pos = len(order) if fits.all() else int(np.argmin(fits))
+    total = values[order[:pos]].sum()
+    rem_w -= w[:pos].sum()
+    rem_c -= c[:pos].sum()
+    while pos < len(order):
+        fit = (w[pos:pos + TAIL_CHUNK] <= rem_w) & (c[pos:pos + TAIL_CHUNK] <= rem_c)
+        k = int(np.argmax(fit))
+        if not fit[k]:
+            pos += TAIL_CHUNK
+            continue
+        j = order[pos + k]
+        total += values[j]
+        rem_w -= weights[j]
+        rem_c -= costs[j]
+        pos += k + 1
+    return total
+
+
+def lp_bounds(values, sizes, room):
+    """
+    Dantzig bounds for the fractional knapsack sum(sizes * x) <= room, per item:
+    (bound with the item forced in, bound with the item forced out).
+    Computed for every item at once from prefix sums over the efficiency order.
+    """
+    n = len(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = np.where(sizes > 0, values / np.where(sizes > 0, sizes, 1), np.inf)
+    order = np.argsort(-eff)
+    cum_s = np.cumsum(sizes[order])
+    cum_v = np.cumsum(values[order])
+    eff_sorted = eff[order]
+
+    def lp(r):
+        r = np.asarray(r, dtype=float)
+        b = np.searchsorted(cum_s, r, side="right")
+        prev_s = np.where(b > 0, cum_s[np.maximum(b - 1, 0)], 0.0)
+        prev_v = np.where(b > 0, cum_v[np.maximum(b - 1, 0)], 0.0)
+        frac = np.where(b < n, (r - prev_s) * eff_sorted[np.minimum(b, n - 1)], 0.0)
+        return prev_v + np.where(np.isfinite(frac), frac, 0.0)
+
+    pos = np.empty(n, dtype=np.int64)
+    pos[order] = np.arange(n)
+    brk = np.searchsorted(cum_s, room, side="right")
+    bound_in = values + lp(room - sizes)
+    bound_out = np.where(pos < brk, lp(room + sizes) - values, lp(room))
+    return bound_in, bound_out
+
+
+def reduce_instance(table, capacity, budget, mandatory_items=None):
+    """
+    Shrink an instance before it reaches any solver; the reduced instance keeps an optimal solution.
+    - Items that cannot fit next to the mandatory set, or add no value, are dropped.
+    - Duplicate items (same value/weight/cost) are capped at the most items any
+      solution can hold; item j is dropped when at least that many strong items dominate it.
+    - LP bounds (capacity, budget and a surrogate of both) around the break item
+      fix items out, or in, when forcing them the other way cannot beat a greedy incumbent.
+    Returns (reduced table, mandatory items incl. fixed-in ones, info), or None when
+    nothing could be removed. Selected names map back to the original unchanged.
+    """
+
+    start_time = time.time()
+    n = len(table)
+    if n < MIN_REDUCE_ITEMS or not (capacity or budget):
+        return None
+    values, weights, costs = table.values, table.weights, table.costs
+    if np.any(weights < 0) or np.any(costs < 0):
+        return None
+    fixed_in = table.mask(mandatory_items)
+    cap_left = capacity - weights[fixed_in].sum() if capacity else None
+    bud_left = budget - costs[fixed_in].sum() if budget else None
+    if (cap_left is not None and cap_left < 0) or (bud_left is not None and bud_left < 0):
+        return None  # mandatory set infeasible; leave the repair to the solvers
+
+    counts = {}
+    keep = ~fixed_in
+    # 1. Items that can never be selected alongside the mandatory set
+    out = values <= 0
+    if cap_left is not None:
+        out |= weights > cap_left
+    if bud_left is not None:
+        out |= costs > bud_left
+    out &= keep
+    counts["infeasible"] = int(out.sum())
+    keep &= ~out
+
+    free = np.flatnonzero(keep)
+    limit = min(_max_cardinality(weights[free], cap_left) if cap_left is not None else len(free),
+                _max_cardinality(costs[free], bud_left) if bud_left is not None else len(free))
+
+    # 2. Duplicates: at most `limit` identical copies can ever be used together
+    duplicates = np.zeros(len(free), dtype=bool)
+    if limit < len(free):
+        order = np.lexsort((costs[free], weights[free], values[free]))
+        v, w, c = values[free][order], weights[free][order], costs[free][order]
+        new_group = np.ones(len(free), dtype=bool)
+        new_group[1:] = (v[1:] != v[:-1]) | (w[1:] != w[:-1]) | (c[1:] != c[:-1])
+        starts = np.maximum.accumulate(np.where(new_group, np.arange(len(free)), 0))
+        duplicates[order] = np.arange(len(free)) - starts >= limit
+    counts["duplicates"] = int(duplicates.sum())
+    keep[free[duplicates]] = False
+
+    # 3. Dominance: j is out when `limit` items each have value >= and weight/cost <= j's
+    free = np.flatnonzero(keep)
+    dominated = np.zeros(n, dtype=bool)
+    if 0 < limit <= DOMINANCE_POOL and len(free) > limit:
+        scale_w = cap_left if cap_left else max(1.0, weights[free].sum())
+        scale_c = bud_left if bud_left else max(1.0, costs[free].sum())
+        score = values[free] / np.maximum(1e-12, weights[free] / scale_w + costs[free] / scale_c)
+        pool = free[np.argsort(-score, kind="stable")[:DOMINANCE_POOL]]
+        pv, pw, pc = values[pool][:, None], weights[pool][:, None], costs[pool][:, None]
+        for lo in range(0, len(free), DOMINANCE_CHUNK):
+            block = free[lo:lo + DOMINANCE_CHUNK]
+            v, w, c = values[block], weights[block], costs[block]
+            geq = (pv >= v) & (pw <= w) & (pc <= c)
+            strict = (pv > v) | (pw < w) | (pc < c) | (pool[:, None] < block)
+            dominated[block] = (geq & strict).sum(axis=0) >= limit
+    counts["dominated"] = int(dominated.sum())
+    keep &= ~dominated
+
+    # 4. Bound-based fixing against a greedy incumbent
+    free = np.flatnonzero(keep)
+    fix_out = np.zeros(n, dtype=bool)
+    fix_in = np.zeros(n, dtype=bool)
+    if len(free):
+        v, w, c = values[free], weights[free], costs[free]
+        # (sizes, room) per relaxation: capacity only, budget only, and the surrogate of both
+        rel = []
+        if cap_left:
+            rel.append((w, cap_left))
+        if bud_left:
+            rel.append((c, bud_left))
+        if cap_left and bud_left:
+            lam = surrogate_multiplier(v, w, c, cap_left, bud_left, np.random.default_rng(0))
+            rel.append((lam * w / cap_left + (1 - lam) * c / bud_left, 1.0))
+        if rel:
+            incumbent = max(_greedy_value(v, w, c, cap_left, bud_left, sizes) for sizes, _ in rel)
+            bound_in = np.full(len(free), np.inf)
+            bound_out = np.full(len(free), np.inf)
+            for sizes, room in rel:
+                b_in, b_out = lp_bounds(v, sizes, room)
+                bound_in = np.minimum(bound_in, b_in)
+                bound_out = np.minimum(bound_out, b_out)
+            tol = 1e-9 * max(1.0, abs(incumbent))
+            fix_out[free] = bound_in < incumbent - tol
+            fix_in[free] = (bound_out < incumbent - tol) & ~fix_out[free]
+    counts["bound_out"] = int(fix_out.sum())
+    counts["bound_in"] = int(fix_in.sum())
+    keep &= ~fix_out
+
+    eliminated = sum(counts.values())
+    if not eliminated:
+        return None
+    kept = keep | fixed_in
+    reduced = table.subset(kept)
+    mandatory = list(mandatory_items or []) + table.select(fix_in)
+    info = {
+        "items": n,
+        "kept": int(kept.sum()),
+        "free": int(keep.sum() - fix_in.sum()),
+        "eliminated": eliminated,
+        "by": counts,
+        "time": round(time.time() - start_time, 4),
+    }
+    return reduced, mandatory, info
@@ -0,0 +1,352 @@
+import math
+import time
+import numpy as np
+from models.item_table import ItemTable
+from models.dp_knapsack import dp_unsupported_reason, DEFAULT_DP_MEMORY_MB
+from models.bounds import dantzig_break, surrogate_multiplier
+from models.reduction import lp_bounds
+from models.constraint_index import compile_constraints
+
+# Ties within this (relative) tolerance keep the finished selection optimal
+TIE_TOL = 1e-9
+
+
+def _lp_curve(values, sizes):
+    """
+    Dantzig bound as a function of the room, after one sort: (lp, room_for) where lp(r)
+    is the bound at room r (-inf when r < 0) and room_for(z) the largest room whose
+    bound is still <= z (inf when no room reaches z).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eff = np.where(sizes > 0, values / np.where(sizes > 0, sizes, 1), np.inf)
+    order = np.argsort(-eff, kind="stable")
+    cum_s = np.concatenate(([0.0], np.cumsum(sizes[order])))
+    cum_v = np.concatenate(([0.0], np.cumsum(values[order])))
+    eff = np.append(eff[order], 0.0)  # past the last item extra room is worth nothing
+
+    def lp(r):
+        r = np.asarray(r, dtype=float)
+        b = np.clip(np.searchsorted(cum_s, r, side="right"), 1, len(cum_s)) - 1
+        with np.errstate(invalid="ignore"):
+            frac = np.where(np.isfinite(eff[b]), (r - cum_s[b]) * eff[b], 0.0)
+        return np.where(r < 0, -np.inf, cum_v[b] + frac)
+
+    def room_for(z):
+        z = np.asarray(z, dtype=float)
+        b = np.searchsorted(cum_v, z, side="right") - 1
+        inside = (b >= 0) & (b < len(cum_v) - 1)
+        b = np.clip(b, 0, len(cum_v) - 2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(eff[b] > 0, (z - cum_v[b]) / eff[b], np.inf)
+        room = np.where(np.isfinite(eff[b]), cum_s[b] + step, cum_s[b])
+        return np.where(z < 0, -np.inf, np.where(inside, room, np.where(b < 0, -np.inf, np.inf)))
+
+    return lp, room_for
+
+
+def _shadow_prices(values, weights, costs, cap_left, bud_left):
+    """LP duals of capacity and budget: the break efficiency, split by the surrogate multiplier."""
+    use_w = cap_left is not None and weights.sum() > cap_left
+    use_c = bud_left is not None and costs.sum() > bud_left
+    prices = {"capacity": 0.0 if cap_left is not None else None, "budget": 0.0 if bud_left is not None else None}
+    if use_w and use_c and cap_left > 0 and bud_left > 0:
+        lam = surrogate_multiplier(values, weights, costs, cap_left, bud_left, np.random.default_rng(0))
+        _, eff, _ = dantzig_break(values, lam * weights / cap_left + (1 - lam) * costs / bud_left, 1.0)
+        prices["capacity"] = (eff or 0.0) * lam / cap_left
+        prices["budget"] = (eff or 0.0) * (1 - lam) / bud_left
+    elif use_w:
+        prices["capacity"] = dantzig_break(values, weights, cap_left)[1] or 0.0
+    elif use_c:
+        prices["budget"] = dantzig_break(values, costs, bud_left)[1] or 0.0
+    return {k: None if p is None or not math.isfinite(p) else round(float(p), 6) for k, p in prices.items()}
+
+
+def _dp_ranges(table, capacity, budget, fixed, chosen, value):
+    """
+    Exact ranges from leave-one-out DP tables: table T_-j holds every item but j, so
+    with j forced in the best value is v_j + T_-j[W - w_j, B - c_j] and with j out T_-j[W, B].
+    All n tables come from a divide-and-conquer over the items (each half is added to
+    a copy of the table of everything outside it): O(log n) DP fills of work and
+    O(log n) tables of memory, instead of n re-solves.
+    """
+    n = len(table)
+    values = table.values
+    has_w, has_c = bool(capacity), bool(budget)
+    weights = table.weights.astype(np.int64) if has_w else np.zeros(n, dtype=np.int64)
+    costs = table.costs.astype(np.int64) if has_c else np.zeros(n, dtype=np.int64)
+    W = int(capacity) - int(weights[fixed].sum()) if has_w else 0
+    B = int(budget) - int(costs[fixed].sum()) if has_c else 0
+    base = float(values[fixed].sum())
+    # Room past the limits: one unit for the marginal gain, or what a mandatory item could give back
+    ext_w = max(1, int(weights[fixed].max(initial=0))) if has_w else 0
+    ext_c = max(1, int(costs[fixed].max(initial=0))) if has_c else 0
+    shape = (W + ext_w + 1, B + ext_c + 1)
+    items = np.flatnonzero(~fixed & (values > 0) & (weights < shape[0]) & (costs < shape[1]))
+    tol = TIE_TOL * max(1.0, abs(value))
+    target = value - base + tol  # what the free items of any solution may reach without beating ours
+
+    def add(dp, k):
+        w, c = weights[k], costs[k]
+        cand = dp[:shape[0] - w, :shape[1] - c] + values[k]
+        np.maximum(dp[w:, c:], cand, out=dp[w:, c:])
+
+    full = np.zeros(shape)
+    for k in items:
+        add(full, k)
+
+    ranges = {}
+
+    def last_within(line, limit):
+        """Largest index of a non-decreasing line whose entry is <= limit (-1 if none)."""
+        return int(np.searchsorted(line, limit, side="right")) - 1
+
+    def item_ranges(j, dp):
+        v, w, c = float(values[j]), int(weights[j]), int(costs[j])
+        fits = w <= W and c <= B
+        out = {"value": [None, None], "weight": [None, None], "cost": [None, None]}
+        if fixed[j]:
+            # Giving up w units of a mandatory item's weight is extra room for the free items
+            if has_w:
+                out["weight"] = [w - max(0, last_within(full[W:W + w + 1, B], target)), w + capacity_slack]
+            if has_c:
+                out["cost"] = [c - max(0, last_within(full[W, B:B + c + 1], target)), c + budget_slack]
+            return out
+        if chosen[j]:
+            out["value"][0] = v - (value - (base + dp[W, B]))
+        elif fits:
+            out["value"][1] = v + (value - (base + v + dp[W - w, B - c]))
+        if has_w:
+            low = 0 if c > B else min(w, max(0, W - last_within(dp[:W + 1, B - c], target - v)))
+            out["weight"] = [low, w + capacity_slack if chosen[j] else None]
+        if has_c:
+            low = 0 if w > W else min(c, max(0, B - last_within(dp[W - w, :B + 1], target - v)))
+            out["cost"] = [low, c + budget_slack if chosen[j] else None]
+        return out
+
+    _, used_w, used_c = table.totals(chosen)
+    capacity_slack = int(capacity) - int(used_w) if has_w else None
+    budget_slack = int(budget) - int(used_c) if has_c else None
+
+    def split(dp, part):
+        # dp holds every candidate item outside part and is owned by this call
+        if len(part) == 1:
+            ranges[part[0]] = item_ranges(part[0], dp)
+            return
+        mid = len(part) // 2
+        left = dp.copy()
+        for k in part[mid:]:
+            add(left, k)
+        split(left, part[:mid])
+        del left
+        for k in part[:mid]:
+            add(dp, k)
+        split(dp, part[mid:])
+
+    if len(items):
+        split(np.zeros(shape), items)
+    for j in range(n):
+        if j not in ranges:
+            ranges[j] = item_ranges(j, full)
+
+    marginal = {
+        "capacity": {"gain_per_unit": float(full[W + 1, B] - full[W, B]),
+                     "loss_per_unit": float(full[W, B] - full[W - 1, B]) if W >= 1 else None} if has_w else None,
+        "budget": {"gain_per_unit": float(full[W, B + 1] - full[W, B]),
+                   "loss_per_unit": float(full[W, B] - full[W, B - 1]) if B >= 1 else None} if has_c else None,
+    }
+    return ranges, marginal, base + float(full[W, B])
+
+
+def _lp_ranges(table, capacity, budget, fixed, chosen, value):
+    """
+    Guaranteed (inner) ranges from LP bounds, for instances the DP cannot take: the true
+    best value with an item forced in / out is at most its Dantzig bound (reduction.lp_bounds),
+    so the selection stays optimal at least while that bound does not beat it.
+    """
+    n = len(table)
+    values, weights, costs = table.values, table.weights, table.costs
+    cap_left = capacity - float(weights[fixed].sum()) if capacity else None
+    bud_left = budget - float(costs[fixed].sum()) if budget else None
+    base = float(values[fixed].sum())
+    tol = TIE_TOL * max(1.0, abs(value))
+    target = value - base + tol
+    _, used_w, used_c = table.totals(chosen)
+
+    pos = ~fixed & (values > 0)
+    v, w, c = values[pos], weights[pos], costs[pos]
+    rel = []
+    if cap_left is not None:
+        rel.append((w, cap_left))
+    if bud_left is not None:
+        rel.append((c, bud_left))
+    if cap_left and bud_left:
+        lam = surrogate_multiplier(v, w, c, cap_left, bud_left, np.random.default_rng(0))
+        rel.append((lam * w / cap_left + (1 - lam) * c / bud_left, 1.0))
+    bound_in = np.full(n, np.inf)
+    bound_out = np.full(n, np.inf)
+    total = np.inf
+    for sizes, room in rel:
+        b_in, b_out = lp_bounds(v, sizes, room)
+        bound_in[pos] = np.minimum(bound_in[pos], b_in)
+        bound_out[pos] = np.minimum(bound_out[pos], b_out)
+        total = min(total, dantzig_break(v, sizes, room)[0])
+    if not rel:
+        total = float(v.sum())
+    # A worthless item forced in adds its value to the best the others can do
+    bound_in[~fixed & ~pos] = values[~fixed & ~pos] + total
+
+    # Bound of the free items as a function of the room of one constraint (the other held fixed)
+    curve_w = _lp_curve(v, w) if cap_left is not None else None
+    curve_c = _lp_curve(v, c) if bud_left is not None else None
+
+    def low_limit(own, room, curve, other_bound, others_target):
+        """
+        Smallest size (within [0, own]) at which the solutions holding the item still
+        cannot beat ours: the others' bound at room - size, or on the other constraint, stays <= others_target.
+        """
+        if other_bound <= others_target:
+            return 0.0
+        return min(own, max(0.0, room - float(curve[1](others_target))))
+
+    ranges = {}
+    for j in range(n):
+        vj, wj, cj = float(values[j]), float(weights[j]), float(costs[j])
+        out = {"value": [None, None], "weight": [None, None], "cost": [None, None]}
+        fits = (cap_left is None or wj <= cap_left) and (bud_left is None or cj <= bud_left)
+        if fixed[j]:
+            if curve_w is not None:
+                other = float(curve_c[0](bud_left)) if curve_c is not None else np.inf
+                gives = 0.0 if other <= target else max(0.0, float(curve_w[1](target)) - cap_left)
+                out["weight"] = [max(0.0, wj - gives), wj + capacity - used_w]
+            if curve_c is not None:
+                other = float(curve_w[0](cap_left)) if curve_w is not None else np.inf
+                gives = 0.0 if other <= target else max(0.0, float(curve_c[1](target)) - bud_left)
+                out["cost"] = [max(0.0, cj - gives), cj + budget - used_c]
+            ranges[j] = out
+            continue
+        if chosen[j]:
+            out["value"][0] = vj - max(0.0, value - (base + bound_out[j]))
+        elif fits:
+            out["value"][1] = vj + max(0.0, value - (base + bound_in[j]))
+        if curve_w is not None:
+            other = float(curve_c[0](bud_left - cj)) if curve_c is not None else np.inf
+            out["weight"] = [low_limit(wj, cap_left, curve_w, other, target - vj),
+                             wj + capacity - used_w if chosen[j] else None]
+        if curve_c is not None:
+            other = float(curve_w[0](cap_left - wj)) if curve_w is not None else np.inf
+            out["cost"] = [low_limit(cj, bud_left, curve_c, other, target - vj),
+                           cj + budget - used_c if chosen[j] else None]
+        ranges[j] = out
+    return ranges
+
+
+def sensitivity_analysis(data, result=None, solve=None, max_memory_mb=None):
+    """
+    Post-optimal ranges for a finished solve, without re-solving per item.
+    - Per item: the value, weight and cost range ([low, high], None = unbounded) over which
+      the selection stays optimal with everything else unchanged.
+    - Capacity / budget: slack, the LP shadow price and (DP) the exact value gained or lost per unit.
+    - Without rules and with integer weights/costs: exact, from leave-one-out DP tables
+      (O(log n) DP fills). Otherwise: LP-bound ranges, narrower but guaranteed (rules only
+      shrink the set of competing solutions, so they stay valid).
+    result is a finished solve of data (solved exactly here when omitted).
+    Returns {"items": [...], "capacity": {...}, "budget": {...}, "info": {...}} or None.
+    """
+    start_time = time.time()
+    params = data.get("parameters", {})
+    capacity, budget = params.get("capacity"), params.get("budget")
+    mandatory_items = data.get("mandatory_items", [])
+    if result is None:
+        if solve is None:
+            from models.knapsack_model_json import solve_knapsack_from_json as solve
+        result = solve(dict(data, solve_mode="exact"))
+    if result is None:
+        print("❌ Sensitivity analysis needs a solution; the solve returned none.")
+        return None
+
+    table = ItemTable.from_data(data)
+    rules = compile_constraints(data, table)
+    chosen = table.mask(result["selected"])
+    fixed = table.mask(mandatory_items)
+    if np.any(fixed & ~chosen):
+        print("❌ The solution dropped mandatory items; its ranges are not defined.")
+        return None
+    info = result.get("info", {})
+    proven = result.get("mode") in ("exact", "auto (exact)") and info.get("optimal", True)
+    if not (proven or info.get("gap") == 0.0):
+        print("⚠️ Ranges assume the selection is optimal; this one is not proven.")
+    value = float(table.values[chosen].sum())
+
+    reason = "rules present" if rules.has_rules else None
+    if reason is None and (np.any(table.weights < 0) or np.any(table.costs < 0)):
+        reason = "negative weights or costs"
+    if reason is None:
+        # Integrality only; the memory test below counts this method's own tables
+        reason = dp_unsupported_reason(table, capacity, budget, float("inf"))
+    if reason is None:
+        # One extra unit per limit for the marginal gain (mandatory weight/cost only shrinks the rest)
+        cells = ((int(capacity) + 2) if capacity else 1) * ((int(budget) + 2) if budget else 1)
+        table_mb = cells * 8 * (math.log2(max(2, len(table))) + 3) / 2**20
+        limit = max_memory_mb or params.get("dp_memory_mb", DEFAULT_DP_MEMORY_MB)
+        if table_mb > limit:
+            reason = f"DP tables need {table_mb:.0f} MB (cap {limit} MB)"
+
+    cap_left = capacity - float(table.weights[fixed].sum()) if capacity else None
+    bud_left = budget - float(table.costs[fixed].sum()) if budget else None
+    if (cap_left is not None and cap_left < 0) or (bud_left is not None and bud_left < 0):
+        print("❌ Mandatory items exceed capacity or budget; nothing to analyse.")
+        return None
+
+    marginal = {"capacity": None, "budget": None}
+    if reason is None:
+        print(f"🧮 Exact sensitivity from leave-one-out DP tables ({len(table)} items)")
+        ranges, marginal, optimum = _dp_ranges(table, capacity, budget, fixed, chosen, value)
+        if optimum > value + TIE_TOL * max(1.0, abs(value)):
+            print(f"⚠️ The selection ({value}) is not optimal (DP optimum {optimum}); ranges are empty.")
+        method = "dp"
+    else:
+        print(f"📐 DP sensitivity not applicable ({reason}); using LP-bound ranges")
+        ranges = _lp_ranges(table, capacity, budget, fixed, chosen, value)
+        method = "lp"
+
+    positive = ~fixed & (table.values > 0)
+    prices = _shadow_prices(table.values[positive], table.weights[positive], table.costs[positive],
+                            cap_left, bud_left)
+    _, used_w, used_c = table.totals(chosen)
+    limits = {}
+    for name, limit, used in (("capacity", capacity, used_w), ("budget", budget, used_c)):
+        if not limit:
+            limits[name] = None
+            continue
+        limits[name] = dict({"limit": limit, "used": used, "slack": limit - used, "shadow_price": prices[name]},
+                            **(marginal[name] or {"gain_per_unit": None, "loss_per_unit": None}))
+
+    def num(x):
+        return None if x is None or not math.isfinite(x) else round(float(x), 6)
+
+    items = []
+    for j, name in enumerate(table.names):
+        r = ranges[j]
+        items.append({
+            "name": name,
+            "selected": bool(chosen[j]),
+            "mandatory": bool(fixed[j]),
+            "value": float(table.values[j]),
+            "weight": float(table.weights[j]),
+            "cost": float(table.costs[j]),
+            "value_range": [num(x) for x in r["value"]],
+            "weight_range": [num(x) for x in r["weight"]] if capacity else None,
+            "cost_range": [num(x) for x in r["cost"]] if budget else None,
+        })
+    return {
+        "items": items,
+        "capacity": limits["capacity"],
+        "budget": limits["budget"],
+        "info": {
+            "method": method,
+            "exact": method == "dp",
+            "reason": reason,
+            "value": value,
+            "runtime": round(time.time() - start_time, 3),
+        },
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Sensitivity analysis — how far each item's value, weight and cost can move before
+the optimal selection changes, and what capacity and budget are worth at the margin
+(models/sensitivity.py), from one solve instead of editing the instance and re-running.
+
+    python src/sensitivity.py data/knapsack_input.json
+    python src/sensitivity.py data/knapsack_input.json --backend bnb -o results/ranges.csv
+
+Ranges are [low, high] with an empty bound meaning unbounded. They are exact when the
+DP applies (no rules, integer weights/costs) and guaranteed-but-narrower LP ranges otherwise.
+"""
+import argparse
+import csv
+import os
+import sys
+
+from utils.data_loader import load_instance
+from utils.logger import log_run, print_summary
+from models.knapsack_model_json import solve_knapsack_from_json
+from models.sensitivity import sensitivity_analysis
+
+DEFAULT_OUTPUT_DIR = "results"
+CSV_COLUMNS = ("name", "selected", "mandatory", "value", "value_low", "value_high",
+               "weight", "weight_low", "weight_high", "cost", "cost_low", "cost_high")
+# Items printed with the smallest value tolerance
+SHOW_TIGHTEST = 5
+
+
+def write_table(items, path):
+    """One row per item; each range is split into its _low / _high columns."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for item in items:
+            row = dict(item)
+            for field in ("value", "weight", "cost"):
+                row[f"{field}_low"], row[f"{field}_high"] = item[f"{field}_range"] or (None, None)
+            writer.writerow(row)
+
+
+def tolerance(item):
+    """How far the item's value can move toward changing the selection (inf when it cannot)."""
+    low, high = item["value_range"]
+    edge = low if item["selected"] else high
+    return float("inf") if edge is None else abs(item["value"] - edge)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Post-optimal sensitivity ranges of a knapsack instance.")
+    parser.add_argument("instance", nargs="?", default="data/knapsack_input.json",
+                        help="JSON instance or columnar directory")
+    parser.add_argument("--backend", default=None, help="exact backend for the solve (default: the instance's)")
+    parser.add_argument("-o", "--output", default=None,
+                        help=f"CSV path (default: {DEFAULT_OUTPUT_DIR}/sensitivity_<instance>.csv)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("\n🧠 AI Optimizer Agent — Sensitivity Analysis")
+    data = load_instance(args.instance)
+    if not data:
+        print("❌ Failed to load input data. Please check JSON file path.")
+        sys.exit(1)
+    if args.backend:
+        data = dict(data, backend=args.backend)
+
+    result = solve_knapsack_from_json(dict(data, solve_mode="exact"))
+    report = sensitivity_analysis(data, result)
+    if report is None:
+        print("\n⚠️ No sensitivity report: the instance has no usable solution.")
+        sys.exit(1)
+
+    stem = os.path.splitext(os.path.basename(os.path.normpath(args.instance)))[0]
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR, f"sensitivity_{stem}.csv")
+    write_table(report["items"], output)
+
+    info = report["info"]
+    print(f"\n📊 Optimal value {info['value']} ({'exact' if info['exact'] else 'LP-bound'} ranges)")
+    for name in ("capacity", "budget"):
+        limit = report[name]
+        if limit:
+            print(f"   {name}: slack {limit['slack']}, shadow price {limit['shadow_price']}, "
+                  f"+1 unit → +{limit['gain_per_unit']}, -1 unit → -{limit['loss_per_unit']}")
+    tightest = sorted(report["items"], key=tolerance)[:SHOW_TIGHTEST]
+    print("🎯 Tightest items (value range):")
+    for item in tightest:
+        print(f"   {item['name']} ({'in' if item['selected'] else 'out'}): {item['value']} in {item['value_range']}")
+    print(f"\n📁 Sensitivity table ({len(report['items'])} items) saved to {output}")
+
+    entry = {
+        "mode": "sensitivity",
+        "method": info["method"],
+        "value": info["value"],
+        "items": len(report["items"]),
+        "runtime": info["runtime"],
+        "status": "SUCCESS",
+    }
+    log_run(entry)
+    print_summary(entry)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Solve service — a long-lived asyncio server that keeps warm worker processes and
+answers knapsack instances in the usual JSON input schema.
+
+    python src/service.py --port 8765 --workers 4        # HTTP on 127.0.0.1:8765
+    python src/service.py --unix /tmp/optimizer.sock     # JSON lines over a Unix socket
+
+HTTP:
+    POST /solve   one JSON instance -> the solve_knapsack_from_json result
+                  (application/x-ndjson body: one instance per line, one
+                  record per line streamed back as each finishes)
+    GET  /health  pool size, queue depth and request counters
+
+Unix socket: write one JSON instance per line, read one record per line
+({"index", "id", "status", "result", "elapsed"}, as in batch_runner.py) in
+completion order.
+
+Each request may carry "deadline" (seconds, default --deadline). The solver
+timelimit is capped to it, and a request not answered within deadline +
+DEADLINE_GRACE gets status "timeout" (its worker is killed and replaced, so
+a stuck solve never holds a slot); a deadline that is not a positive
+number is answered with status "error". At most --max-queue requests wait at
+once; beyond that the service answers 503 / status "busy" straight away.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import solve_line, warm_worker
+from utils.logger import log_run, flush_logs
+from utils.worker_pool import WorkerPool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DEADLINE = 30.0
+# Requests allowed to wait for a worker, per worker, before new ones are rejected
+QUEUE_PER_WORKER = 8
+# Seconds past a request's deadline before it is answered with "timeout"
+DEADLINE_GRACE = 1.0
+# Largest accepted request body / socket line
+MAX_REQUEST_BYTES = 256 * 2**20
+
+_HTTP_STATUS = {"success": 200, "no_solution": 422, "error": 400, "timeout": 504, "busy": 503}
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+            422: "Unprocessable Entity", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class SolveService:
+    """
+    Warm worker pool behind an asyncio front end.
+    - workers processes solve concurrently; they are started and warmed up front.
+      A worker that overruns its request's deadline is killed and replaced
+      (utils/worker_pool.py) instead of holding its slot until it finishes.
+    - max_queue bounds the requests waiting for a worker (backpressure).
+    - solve() is the whole request path, usable in-process without any socket.
+    """
+
+    def __init__(self, workers=None, max_queue=None, deadline=DEFAULT_DEADLINE, warm_backends=(), quiet=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue if max_queue is not None else QUEUE_PER_WORKER * self.workers
+        self.deadline = deadline
+        self.quiet = quiet
+        # Workers are forked from a clean fork server, never from this process with its client sockets
+        methods = mp.get_all_start_methods()
+        start_method = "forkserver" if "forkserver" in methods else "spawn"
+        if start_method == "forkserver":
+            mp.set_forkserver_preload(["batch_runner"])
+        self.pool = WorkerPool(self.workers, initializer=warm_worker, initargs=(tuple(warm_backends),),
+                               start_method=start_method)
+        # One thread per slot waits on its worker's pipe, off the event loop
+        self._waiters = ThreadPoolExecutor(max_workers=self.workers)
+        self._busy = set()
+        self._slots = None
+        self._waiting = 0
+        self._next_index = 0
+        self.stats = {"requests": 0, "success": 0, "no_solution": 0, "error": 0, "timeout": 0, "busy": 0}
+        self.started = time.time()
+
+    async def start(self):
+        """Spawn and warm every worker before the first request arrives."""
+        self._slots = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        workers = [self.pool.acquire() for _ in range(self.workers)]
+        for worker in workers:
+            worker.send(os.getpid)
+        await asyncio.gather(*(loop.run_in_executor(self._waiters, worker.recv) for worker in workers))
+        for worker in workers:
+            self.pool.release(worker)
+
+    def close(self):
+        self.pool.close(busy=self._busy)
+        self._waiters.shutdown(wait=False)
+
+    async def solve(self, data, index=None):
+        """Solve one parsed instance; returns a batch_runner-style record."""
+        self.stats["requests"] += 1
+        if index is None:
+            index, self._next_index = self._next_index, self._next_index + 1
+        if self._waiting >= self.max_queue + self.workers:
+            return self._count({"index": index, "id": _request_id(data), "status": "busy"})
+
+        deadline = _deadline(data, self.deadline)
+        if deadline is None:
+            return self._count({"index": index, "id": _request_id(data), "status": "error",
+                                "error": f"ValueError: deadline must be a positive number of seconds, "
+                                         f"got {data['deadline']!r}"})
+        start_time = time.time()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=deadline)
+        except asyncio.TimeoutError:
+            self._waiting -= 1
+            return self._count({"index": index, "id": _request_id(data), "status": "timeout",
+                                "elapsed": round(time.time() - start_time, 3)})
+        worker = self.pool.acquire()  # a slot always has an idle worker
+        self._busy.add(worker)
+        try:
+            remaining = max(0.0, deadline - (time.time() - start_time))
+            line = json.dumps(data) if isinstance(data, dict) else data
+            worker.send(solve_line, index, line, max(remaining, 0.001), self.quiet)
+            ready = False
+            try:
+                ready = await asyncio.get_running_loop().run_in_executor(
+                    self._waiters, worker.poll, remaining + DEADLINE_GRACE)
+            finally:
+                self._busy.discard(worker)
+                if not ready:
+                    # Not every solve stops at its capped timelimit: kill the worker, free the slot now
+                    self.pool.replace(worker)
+            if not ready:
+                return self._count({"index": index, "id": _request_id(data), "status": "timeout",
+                                    "elapsed": round(time.time() - start_time, 3)})
+            ok, record = worker.recv()
+            if ok:
+                self.pool.release(worker)
+            else:
+                self.pool.replace(worker)
+                record = {"index": index, "id": _request_id(data), "status": "error", "error": record}
+            record["elapsed"] = round(time.time() - start_time, 3)
+            return self._count(record)
+        finally:
+            self._slots.release()
+            self._waiting -= 1
+
+    def _count(self, record):
+        self.stats[record["status"]] = self.stats.get(record["status"], 0) + 1
+        return record
+
+    def health(self):
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "waiting": self._waiting,
+            "replaced_workers": self.pool.replaced,
+            "uptime": round(time.time() - self.started, 1),
+            "stats": dict(self.stats),
+        }
+
+    # ----------------------------------------------------------------
+    # Transports
+    # ----------------------------------------------------------------
+    async def handle_lines(self, reader, writer):
+        """Unix-socket protocol: JSON instances in, one JSON record per line out, as each finishes."""
+        tasks = set()
+        lock = asyncio.Lock()
+        index = 0
+
+        async def answer(i, line):
+            record = await self.solve(_parse(line), index=i)
+            async with lock:
+                writer.write((json.dumps(record, default=str) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.create_task(answer(index, line.decode()))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    index += 1
+            if tasks:
+                # One failed answer must not cancel the others still in flight
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def handle_http(self, reader, writer):
+        """Minimal HTTP/1.1: POST /solve and GET /health, one request per connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0].upper(), request_line[1].split("?")[0]
+
+            if method == "GET" and path == "/health":
+                return await _respond(writer, 200, self.health())
+            if method != "POST" or path != "/solve":
+                return await _respond(writer, 404, {"status": "error", "error": f"no route {method} {path}"})
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_REQUEST_BYTES:
+                return await _respond(writer, 413, {"status": "error", "error": "request body too large"})
+            body = (await reader.readexactly(length)).decode() if length else ""
+
+            if "ndjson" in headers.get("content-type", ""):
+                return await self._stream_http(writer, body)
+            record = await self.solve(_parse(body))
+            payload = record["result"] if record["status"] == "success" else record
+            return await _respond(writer, _HTTP_STATUS.get(record["status"], 500), payload)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            try:
+                await _respond(writer, 400, {"status": "error", "error": f"{type(e).__name__}: {e}"})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _stream_http(self, writer, body):
+        """Chunked application/x-ndjson response, one record per instance line, in completion order."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        lines = [line for line in body.splitlines() if line.strip()]
+        for next_done in asyncio.as_completed([self.solve(_parse(line), index=i) for i, line in enumerate(lines)]):
+            chunk = (json.dumps(await next_done, default=str) + "\n").encode()
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+def _deadline(data, default):
+    """The request's "deadline" in seconds (default when absent), or None when it is not a positive number."""
+    value = data.get("deadline") if isinstance(data, dict) else None
+    if value is None:
+        return default
+    try:
+        deadline = float(value)
+    except (TypeError, ValueError):
+        return None
+    return deadline if 0 < deadline < float("inf") and not isinstance(value, bool) else None
+
+
+def _parse(text):
+    """Instance dict from a JSON line, or the raw text so the worker reports the parse error."""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text
+    return data if isinstance(data, dict) else text
+
+
+def _request_id(data):
+    return data.get("id", data.get("request_id")) if isinstance(data, dict) else None
+
+
+async def _respond(writer, status, payload):
+    body = json.dumps(payload, default=str).encode()
+    writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+async def serve(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+    await service.start()
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        server = await asyncio.start_unix_server(service.handle_lines, path=unix_path, limit=MAX_REQUEST_BYTES)
+        print(f"🛰️ Solve service on unix://{unix_path} ({service.workers} warm workers)")
+    else:
+        server = await asyncio.start_server(service.handle_http, host, port, limit=MAX_REQUEST_BYTES)
+        print(f"🛰️ Solve service on http://{host}:{port} ({service.workers} warm workers)")
+    async with server:
+        await server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Long-lived knapsack solve service with a warm worker pool.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="serve JSON lines on this Unix socket instead of HTTP")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-queue", type=int, default=None,
+                        help=f"requests waiting for a worker before new ones get 503 (default: {QUEUE_PER_WORKER} x workers)")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE, help="default per-request deadline in seconds")
+    parser.add_argument("--warm", default="", help="comma-separated backends to preload per worker: ortools,glpk")
+    parser.add_argument("--metrics-port", type=int, default=None, help="expose Prometheus metrics on this port")
+    parser.add_argument("--verbose", action="store_true", help="show solver output from the workers")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print("\n🧠 AI Optimizer Agent — Solve Service")
+    if args.metrics_port:
+        from utils.metrics import start_metrics_server
+        start_metrics_server(args.metrics_port)
+    service = SolveService(args.workers, args.max_queue, args.deadline,
+                           [b for b in args.warm.split(",") if b], quiet=not args.verbose)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+        log_run({"mode": "service", **service.health(), "status": "SUCCESS"})
+        flush_logs()
+        print(f"\n📊 Service stats: {service.stats}")
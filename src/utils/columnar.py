@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Columnar instance format — one directory per instance, memory-mappable:
+
+    instance.knap/
+        header.json      parameters, solve_mode, backend, category_limits, categories, n
+        value.npy        float64 (n,)
+        weight.npy       float64 (n,)
+        cost.npy         float64 (n,)
+        category.npy     int32 (n,), index into header["categories"], -1 = none
+        mandatory.npy    bool (n,)
+        names.npy        fixed-width UTF-8 bytes (n,)
+        dependent.npy    int64 (E, 2) edges (item, item it depends on)
+        exclusive.npy    int64 (E, 2) edges (item, item it excludes)
+
+Converters stream their input, so neither the JSON item list nor the CSV rows
+are ever held in memory as Python objects:
+
+    python src/utils/columnar.py data/knapsack_input.json data/knapsack_input.knap
+    python src/utils/columnar.py old_versions/knapsack_items.csv data/knapsack_items.knap
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+import numpy as np
+
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+# Rows buffered per column before flushing to the temporary column files
+FLUSH_ROWS = 65536
+# Characters read per chunk by the streaming JSON reader
+JSON_CHUNK = 1 << 20
+
+# column -> (array typecode used while buffering, stored dtype)
+_NUMERIC = {
+    "value": ("d", np.float64),
+    "weight": ("d", np.float64),
+    "cost": ("d", np.float64),
+    "category": ("i", np.int32),
+    "mandatory": ("b", bool),
+}
+_EDGES = ("dependent", "exclusive")
+
+
+def is_columnar(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, HEADER_FILE))
+
+
+class ColumnarWriter:
+    """
+    Append items one at a time into a columnar instance directory.
+    Columns are buffered in small typed arrays and flushed to raw files, then
+    wrapped into .npy files by close(), so memory stays flat in the item count.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._tmp = tempfile.mkdtemp(prefix=".columns-", dir=path)
+        self._buffers = {col: array(code) for col, (code, _) in _NUMERIC.items()}
+        self._files = {col: open(os.path.join(self._tmp, col), "wb") for col in _NUMERIC}
+        self._names = open(os.path.join(self._tmp, "names"), "wb")
+        self._edges = {kind: [] for kind in _EDGES}  # (item index, referenced name)
+        self._name_width = 1
+        self.categories = {}
+        self.n = 0
+
+    def add(self, name, value, weight, cost, category=None, dependent=(), exclusive=(), mandatory=False):
+        k = self.n
+        encoded = str(name).encode("utf-8")
+        self._name_width = max(self._name_width, len(encoded))
+        self._names.write(encoded + b"\n")
+        if category in (None, ""):
+            code = -1
+        else:
+            code = self.categories.setdefault(str(category), len(self.categories))
+        row = {"value": float(value), "weight": float(weight), "cost": float(cost),
+               "category": code, "mandatory": 1 if mandatory else 0}
+        for col, buf in self._buffers.items():
+            buf.append(row[col])
+        for kind, refs in (("dependent", dependent), ("exclusive", exclusive)):
+            for ref in refs or []:
+                self._edges[kind].append((k, str(ref)))
+        self.n += 1
+        if self.n % FLUSH_ROWS == 0:
+            self._flush()
+
+    def _flush(self):
+        for col, buf in self._buffers.items():
+            buf.tofile(self._files[col])
+            del buf[:]
+
+    def close(self, header=None, mandatory_items=()):
+        """Write every column as .npy plus header.json and remove the temporary files."""
+        self._flush()
+        for f in self._files.values():
+            f.close()
+        self._names.close()
+        for col, (code, dtype) in _NUMERIC.items():
+            raw = np.fromfile(os.path.join(self._tmp, col), dtype=np.dtype(code), count=self.n)
+            np.save(os.path.join(self.path, f"{col}.npy"), raw.astype(dtype))
+            del raw
+
+        names = np.zeros(self.n, dtype=f"S{self._name_width}")
+        index = {} if any(self._edges.values()) or mandatory_items else None
+        with open(os.path.join(self._tmp, "names"), "rb") as f:
+            for k, line in enumerate(f):
+                names[k] = line.rstrip(b"\n")
+                if index is not None:
+                    index[line.rstrip(b"\n").decode("utf-8")] = k
+        np.save(os.path.join(self.path, "names.npy"), names)
+        del names
+
+        if mandatory_items:
+            mandatory = np.load(os.path.join(self.path, "mandatory.npy"))
+            for m in mandatory_items:
+                if str(m) in index:
+                    mandatory[index[str(m)]] = True
+            np.save(os.path.join(self.path, "mandatory.npy"), mandatory)
+        for kind, refs in self._edges.items():
+            edges = np.array([(k, index[ref]) for k, ref in refs if ref in index], dtype=np.int64).reshape(-1, 2)
+            np.save(os.path.join(self.path, f"{kind}.npy"), edges)
+
+        header = dict(header or {})
+        header.pop("items", None)
+        header.pop("mandatory_items", None)
+        header.update({
+            "format": "columnar",
+            "version": FORMAT_VERSION,
+            "n": self.n,
+            "categories": sorted(self.categories, key=self.categories.get),
+        })
+        with open(os.path.join(self.path, HEADER_FILE), "w") as f:
+            json.dump(header, f, indent=2)
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        return self.path
+
+
+class ColumnarInstance:
+    """
+    A loaded columnar instance. Columns are NumPy arrays (memory-mapped by default);
+    solvers wrap them in an ItemTable (models/item_table.py) without materializing
+    item dicts. items() builds the classic list of dicts when one is really needed.
+    """
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE), "r") as f:
+            self.header = json.load(f)
+        # Empty files cannot be memory-mapped, so zero-length columns are read normally
+        load = lambda col: np.load(os.path.join(path, f"{col}.npy"),
+                                   mmap_mode="r" if mmap and self.header.get("n") else None)
+        self.values = load("value")
+        self.weights = load("weight")
+        self.costs = load("cost")
+        self.category = load("category")
+        self.mandatory = load("mandatory")
+        self.names = load("names")
+        self.dependent = np.load(os.path.join(path, "dependent.npy"))
+        self.exclusive = np.load(os.path.join(path, "exclusive.npy"))
+        self.categories = self.header.get("categories", [])
+        self.n = int(self.header.get("n", len(self.values)))
+
+    def __len__(self):
+        return self.n
+
+    def name(self, k):
+        return self.names[k].decode("utf-8")
+
+    def select_names(self, mask):
+        return [self.name(k) for k in np.flatnonzero(mask)]
+
+    def mandatory_items(self):
+        return self.select_names(self.mandatory)
+
+    def items(self):
+        """Materialize the classic list of item dicts (expensive for very large instances)."""
+        refs = {kind: {} for kind in _EDGES}
+        for kind in _EDGES:
+            for k, j in getattr(self, kind):
+                refs[kind].setdefault(int(k), []).append(self.name(j))
+        items = []
+        for k in range(self.n):
+            item = {
+                "name": self.name(k),
+                "value": float(self.values[k]),
+                "weight": float(self.weights[k]),
+                "cost": float(self.costs[k]),
+            }
+            if self.category[k] >= 0:
+                item["category"] = self.categories[self.category[k]]
+            for kind in _EDGES:
+                if k in refs[kind]:
+                    item[kind] = refs[kind][k]
+            items.append(item)
+        return items
+
+    def to_data(self):
+        """Solver input dict: the header fields plus this instance under "columns"."""
+        data = {k: v for k, v in self.header.items() if k not in ("format", "version", "n", "categories")}
+        data["mandatory_items"] = self.mandatory_items()
+        data["columns"] = self
+        return data
+
+
+def load_columnar(path, mmap=True):
+    return ColumnarInstance(path, mmap=mmap)
+
+
+# --------------------------------------------------------------------
+# Streaming converters
+# --------------------------------------------------------------------
+def iter_json_instance(path, chunk_size=JSON_CHUNK):
+    """
+    Stream a JSON instance file: yields ("item", dict) for each element of the
+    top-level "items" array and (key, value) for every other top-level field.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        def expect(chars):
+            nonlocal pos
+            skip_ws()
+            if pos >= len(buf) or buf[pos] not in chars:
+                raise ValueError(f"Malformed JSON instance: expected one of {chars!r} in {path}")
+            pos += 1
+            return buf[pos - 1]
+
+        def value():
+            nonlocal pos
+            skip_ws()
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    # A number cut by the chunk boundary ("12" of "12.5") decodes fine, so
+                    # numbers are only accepted once the following delimiter is in the buffer
+                    rest = buf[end:].lstrip()
+                    if eof or not isinstance(obj, (int, float)) or (rest and rest[0] in ",]}"):
+                        pos = end
+                        return obj
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        expect("{")
+        skip_ws()
+        if buf[pos] == "}":
+            return
+        while True:
+            key = value()
+            expect(":")
+            if key == "items":
+                expect("[")
+                skip_ws()
+                if buf[pos] == "]":
+                    pos += 1
+                else:
+                    while True:
+                        yield "item", value()
+                        if expect(",]") == "]":
+                            break
+            else:
+                yield key, value()
+            if expect(",}") == "}":
+                break
+
+
+def convert_json(src, dest):
+    """Stream a JSON instance (the data/knapsack_input.json layout) into a columnar directory."""
+    writer = ColumnarWriter(dest)
+    header = {}
+    for key, value in iter_json_instance(src):
+        if key == "item":
+            writer.add(value["name"], value["value"], value["weight"], value["cost"], value.get("category"),
+                       value.get("dependent"), value.get("exclusive"))
+        else:
+            header[key] = value
+    return writer.close(header, header.get("mandatory_items", []))
+
+
+def _split_refs(raw):
+    return [r.strip() for r in str(raw or "").split(",") if r.strip()]
+
+
+def convert_csv(src, dest, solve_mode="auto"):
+    """
+    Stream the legacy CSV layout (old_versions/knapsack_items.csv) into a columnar directory.
+    Control rows: CAPACITY (weight column), BUDGET and TARGET (cost column),
+    CATEGORY_LIMIT (category column, "A:1-2;B:0-2").
+    """
+    writer = ColumnarWriter(dest)
+    params, category_limits = {}, {}
+    with open(src, "r", newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("item") or "").strip()
+            if not name:
+                continue
+            if name == "CAPACITY":
+                params["capacity"] = float(row["weight"])
+            elif name == "BUDGET":
+                params["budget"] = float(row["cost"])
+            elif name == "TARGET":
+                params["target"] = float(row["cost"])
+            elif name == "CATEGORY_LIMIT":
+                for part in str(row.get("category", "")).split(";"):
+                    if part.strip():
+                        cat, bounds = part.split(":")
+                        lo, hi = bounds.split("-")
+                        category_limits[cat.strip()] = [int(lo), int(hi)]
+            else:
+                writer.add(
+                    name, row["value"] or 0, row["weight"] or 0, row["cost"] or 0, (row.get("category") or "").strip(),
+                    _split_refs(row.get("dependent")), _split_refs(row.get("exclusive")),
+                    mandatory=str(row.get("mandatory") or "0").strip() not in ("", "0"),
+                )
+    header = {"model_type": "knapsack", "solve_mode": solve_mode, "parameters": params}
+    if category_limits:
+        header["category_limits"] = category_limits
+    return writer.close(header)
+
+
+def convert(src, dest):
+    if src.lower().endswith(".csv"):
+        return convert_csv(src, dest)
+    return convert_json(src, dest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a JSON or legacy CSV instance to the columnar format.")
+    parser.add_argument("source", help="JSON instance or legacy CSV file")
+    parser.add_argument("dest", help="output directory (e.g. data/instance.knap)")
+    args = parser.parse_args()
+    if not os.path.exists(args.source):
+        print(f"❌ Input not found: {args.source}")
+        sys.exit(1)
+    path = convert(args.source, args.dest)
+    instance = load_columnar(path)
+    print(f"✅ Wrote {len(instance)} items to {path} ({len(instance.categories)} categories, "
+          f"{len(instance.dependent)} dependent / {len(instance.exclusive)} exclusive links)")
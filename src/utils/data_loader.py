@@ -1,4 +1,5 @@
 import json
+from utils.columnar import is_columnar, load_columnar
 
 def load_json_data(path: str):
     """
@@ -11,4 +12,21 @@ def load_json_data(path: str):
         return data
     except Exception as e:
         print(f"❌ Error loading JSON file: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def load_instance(path: str):
+    """
+    Loads a JSON input file or a columnar instance directory (see utils/columnar.py).
+    Columnar instances come back as a dict whose "columns" entry holds the
+    memory-mapped arrays instead of an "items" list.
+    """
+    if not is_columnar(path):
+        return load_json_data(path)
+    try:
+        data = load_columnar(path).to_data()
+        print(f"✅ Memory-mapped columnar instance from {path} ({len(data['columns'])} items)")
+        return data
+    except Exception as e:
+        print(f"❌ Error loading columnar instance: {e}")
+        return None
@@ -0,0 +1,105 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+_ACTIVE = threading.local()
+
+
+class IncumbentTracker:
+    """
+    Improving solutions of one solve, as the solvers find them.
+    - report() keeps only a better value or a tighter upper bound and passes each
+      such event to the callback: {"value", "bound", "gap", "elapsed", "source"}
+      (+ "selected" when the solver hands over its selection).
+    - The solve should stop once the callback returns True, the value reaches
+      target, the relative gap drops to gap or the cancel Event is set;
+      report() and stopped are True from then on.
+    """
+
+    def __init__(self, callback=None, target=None, gap=None, cancel=None):
+        self.callback = callback
+        self.target = target
+        self.gap = gap
+        self.cancel = cancel
+        self.value = -math.inf
+        self.bound = math.inf
+        self.events = 0
+        self.stop_reason = None
+        self.expand = None  # maps a solver's selection back to instance names (see contraction)
+        self._start = time.perf_counter()
+
+    @property
+    def stopped(self):
+        if self.stop_reason is None and self.cancel is not None and self.cancel.is_set():
+            self.stop_reason = "cancelled"
+        return self.stop_reason is not None
+
+    def current_gap(self):
+        if not (math.isfinite(self.value) and math.isfinite(self.bound)):
+            return None
+        return max(0.0, (self.bound - self.value) / abs(self.bound)) if self.bound else 0.0
+
+    def report(self, value, bound=None, source="", selected=None):
+        """Record a feasible solution value (and optionally a proven upper bound); True means stop."""
+        improved = value is not None and value > self.value + 1e-9
+        tighter = bound is not None and bound < self.bound - 1e-9
+        if not (improved or tighter):
+            return self.stopped
+        if improved:
+            self.value = float(value)
+        if tighter:
+            self.bound = float(bound)
+        self.events += 1
+        gap = self.current_gap()
+
+        if self.callback is not None:
+            event = {
+                "value": self.value if math.isfinite(self.value) else None,
+                "bound": self.bound if math.isfinite(self.bound) else None,
+                "gap": gap,
+                "elapsed": round(time.perf_counter() - self._start, 4),
+                "source": source,
+            }
+            if improved and selected is not None:
+                names = selected() if callable(selected) else selected
+                event["selected"] = self.expand(names) if self.expand else names
+            if self.callback(event) and not self.stopped:
+                self.stop_reason = "callback"
+        if not self.stopped and self.target is not None and self.value >= self.target:
+            self.stop_reason = "target"
+        if not self.stopped and self.gap is not None and gap is not None and gap <= self.gap:
+            self.stop_reason = "gap"
+        return self.stopped
+
+    def summary(self):
+        return {"events": self.events, "stopped": self.stop_reason, "gap": self.current_gap()}
+
+
+@contextmanager
+def tracking(callback=None, target=None, gap=None, cancel=None):
+    """Make an IncumbentTracker the active one for this thread while the block runs."""
+    tracker = IncumbentTracker(callback, target, gap, cancel)
+    outer = getattr(_ACTIVE, "tracker", None)
+    _ACTIVE.tracker = tracker
+    try:
+        yield tracker
+    finally:
+        _ACTIVE.tracker = outer
+
+
+def active_tracker():
+    return getattr(_ACTIVE, "tracker", None)
+
+
+def report_incumbent(value, bound=None, source="", selected=None):
+    """Report to the active tracker; a no-op (never stops) outside tracking()."""
+    tracker = active_tracker()
+    if tracker is None:
+        return False
+    return tracker.report(value, bound, source, selected)
+
+
+def stop_requested():
+    tracker = active_tracker()
+    return tracker is not None and tracker.stopped
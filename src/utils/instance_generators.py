@@ -0,0 +1,87 @@
+import numpy as np
+from models.item_table import ItemTable
+
+# Classic knapsack difficulty classes (Pisinger), plus an independent cost column for the budget
+INSTANCE_CLASSES = (
+    "uncorrelated",
+    "weakly_correlated",
+    "strongly_correlated",
+    "inverse_strongly_correlated",
+    "subset_sum",
+)
+# Coefficient range: weights, costs and values are integers in [1, DEFAULT_RANGE]
+DEFAULT_RANGE = 1000
+# Capacity and budget as a fraction of the total item weight / cost
+DEFAULT_CAPACITY_RATIO = 0.5
+DEFAULT_BUDGET_RATIO = 0.5
+# Share of items drawn as mandatory candidates, and the slice of capacity/budget they may use
+DEFAULT_MANDATORY_FRACTION = 0.01
+MANDATORY_SHARE = 0.1
+
+
+def class_columns(kind, n, rng, coef_range=DEFAULT_RANGE):
+    """(values, weights) for one difficulty class; every column is integer-valued float64."""
+    r = coef_range
+    weights = rng.integers(1, r + 1, n).astype(float)
+    if kind == "uncorrelated":
+        values = rng.integers(1, r + 1, n).astype(float)
+    elif kind == "weakly_correlated":
+        values = np.maximum(1.0, weights + rng.integers(-(r // 10), r // 10 + 1, n))
+    elif kind == "strongly_correlated":
+        values = weights + r // 10
+    elif kind == "inverse_strongly_correlated":
+        values = rng.integers(1, r + 1, n).astype(float)
+        weights = values + r // 10
+    elif kind == "subset_sum":
+        values = weights.copy()
+    else:
+        raise ValueError(f"Unknown instance class '{kind}' (expected one of {', '.join(INSTANCE_CLASSES)})")
+    return values, weights
+
+
+def generate_instance(kind, n, seed=0, coef_range=DEFAULT_RANGE, capacity_ratio=DEFAULT_CAPACITY_RATIO,
+                      budget_ratio=DEFAULT_BUDGET_RATIO, mandatory_fraction=DEFAULT_MANDATORY_FRACTION,
+                      solve_mode="heuristic", backend="auto"):
+    """
+    Seeded synthetic instance as a solver input dict.
+    - Items live in a prebuilt ItemTable under "table", so million-item
+      instances never go through item dicts.
+    - Costs are drawn independently of the class so the budget row is a real second constraint.
+    - Mandatory items are a random sample that uses at most MANDATORY_SHARE of
+      capacity and budget, so every instance stays feasible.
+    The same (kind, n, seed) always gives the same instance.
+    """
+
+    rng = np.random.default_rng([seed, n, INSTANCE_CLASSES.index(kind) if kind in INSTANCE_CLASSES else 0])
+    values, weights = class_columns(kind, n, rng, coef_range)
+    costs = rng.integers(1, coef_range + 1, n).astype(float)
+    capacity = max(1, int(capacity_ratio * weights.sum()))
+    budget = max(1, int(budget_ratio * costs.sum()))
+
+    candidates = rng.choice(n, size=int(n * mandatory_fraction), replace=False) if n else np.zeros(0, int)
+    fits = ((np.cumsum(weights[candidates]) <= MANDATORY_SHARE * capacity)
+            & (np.cumsum(costs[candidates]) <= MANDATORY_SHARE * budget))
+    mandatory = np.sort(candidates[fits])
+
+    names = [f"{kind[:2]}{k}" for k in range(n)]
+    table = ItemTable(names, values, weights, costs)
+    return {
+        "model_type": "knapsack",
+        "solve_mode": solve_mode,
+        "backend": backend,
+        "parameters": {"capacity": capacity, "budget": budget},
+        "mandatory_items": [names[k] for k in mandatory.tolist()],
+        "table": table,
+        "generator": {"class": kind, "n": n, "seed": seed, "range": coef_range},
+    }
+
+
+def to_json_instance(data):
+    """Plain JSON-serializable copy of a generated instance (items as dicts), for small n."""
+    table = data["table"]
+    out = {k: v for k, v in data.items() if k not in ("table", "generator")}
+    out["items"] = [
+        {"name": name, "value": v, "weight": w, "cost": c, "category": "", "dependent": [], "exclusive": []}
+        for name, v, w, c in zip(table.names, table.values.tolist(), table.weights.tolist(), table.costs.tolist())
+    ]
+    return out
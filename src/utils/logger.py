@@ -1,18 +1,163 @@
 import os
 import json
+import time
+import queue
+import atexit
+import threading
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: rotation is then only safe within one process
+    fcntl = None
+
 LOG_PATH = "logs/optimizer_runs.log"
-os.makedirs("logs", exist_ok=True)
+
+# Background writer: flush at most this often, or as soon as this many records are queued
+FLUSH_INTERVAL = 0.5
+FLUSH_RECORDS = 256
+# Rotation: by size and/or age of the current file; keep this many old files (.1 is newest)
+MAX_LOG_BYTES = 10 * 2**20
+MAX_LOG_AGE = 24 * 3600
+LOG_BACKUPS = 5
+
+
+class RunLogWriter:
+    """
+    Queue-backed JSONL writer for run records.
+    - write() only enqueues; a daemon thread batches records and appends each
+      batch with a single write, so the solve path never touches the file.
+    - Appends and rotation happen under an flock on a sidecar lock file, so
+      several processes (batch workers) can share one log safely.
+    - Rotates when the file exceeds max_bytes or its first record is older than
+      max_age seconds, keeping `backups` old files (log.1 ... log.N).
+    """
+
+    def __init__(self, path=LOG_PATH, max_bytes=MAX_LOG_BYTES, max_age=MAX_LOG_AGE, backups=LOG_BACKUPS,
+                 flush_interval=FLUSH_INTERVAL, flush_records=FLUSH_RECORDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        # Threads do not survive fork(); a child process starts its own writer lazily
+        self._pid = os.getpid()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._started = False
+
+    def write(self, entry):
+        self._ensure_thread()
+        self._queue.put(json.dumps(entry, default=str) + "\n")
+
+    def flush(self, timeout=5.0):
+        """Block until every record queued so far is on disk."""
+        if self._started and self._pid == os.getpid():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait(timeout)
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._started:
+            with self._start_lock:
+                if not self._started:
+                    self._thread = threading.Thread(target=self._run, name="run-log-writer", daemon=True)
+                    self._thread.start()
+                    self._started = True
+
+    def _run(self):
+        while True:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.time() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break  # flush() asked for everything queued so far
+                batch.append(item)
+                if len(batch) >= self.flush_records:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._append("".join(batch))
+                except OSError as e:
+                    print(f"⚠️ Could not write run log: {e}")
+            for w in waiters:
+                w.set()
+
+    def _append(self, text):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._maybe_rotate()
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, text.encode("utf-8"))
+                finally:
+                    os.close(fd)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _maybe_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = self.max_age and size and self._age() >= self.max_age
+        if not (too_big or too_old):
+            return
+        for k in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{k}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{k + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _age(self):
+        """Seconds since the first record in the current file was written."""
+        try:
+            with open(self.path, "r") as f:
+                first = json.loads(f.readline())
+            stamp = datetime.strptime(first["timestamp"], "%Y-%m-%d %H:%M:%S")
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+        return (datetime.now() - stamp).total_seconds()
+
+
+RUN_LOG = RunLogWriter()
+atexit.register(RUN_LOG.flush)
+
 
 def log_run(entry: dict):
     """
     Append a structured run record to logs/optimizer_runs.log.
     Each line is a JSON object for easy parsing later.
+    The record is queued and written by a background thread (see RunLogWriter).
     """
     entry["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_PATH, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+    RUN_LOG.write(dict(entry))
+
+
+def flush_logs():
+    RUN_LOG.flush()
+
 
 def print_summary(entry: dict):
     print(f"\n📝 Logged Run → mode={entry.get('mode')} | value={entry.get('value')} | "
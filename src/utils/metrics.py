@@ -0,0 +1,73 @@
+import os
+import importlib.util
+
+# prometheus_client is imported on first use; without it the metrics are no-ops
+PROMETHEUS_AVAILABLE = importlib.util.find_spec("prometheus_client") is not None
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+GAP_BUCKETS = (0.0, 1e-6, 1e-4, 1e-3, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25, 1.0)
+# Label values for "mode"; anything else is reported as "other" to keep label cardinality bounded
+KNOWN_MODES = {"exact", "heuristic", "metaheuristic", "auto", "compare"}
+
+_METRICS = {}
+
+
+def _metrics():
+    """The metric objects, created with the first recorded solve."""
+    if not _METRICS:
+        from prometheus_client import Counter, Histogram
+        _METRICS.update(
+            solves=Counter("optimizer_solves_total", "Solves by requested mode and outcome", ["mode", "status"]),
+            latency=Histogram("optimizer_solve_latency_seconds", "Wall-clock time per solve", ["mode"],
+                              buckets=LATENCY_BUCKETS),
+            gap=Histogram("optimizer_gap", "Relative optimality gap reported by the solver", ["mode"],
+                          buckets=GAP_BUCKETS),
+            timeouts=Counter("optimizer_timeouts_total", "Solves that stopped on the time limit", ["mode"]),
+            cache_hits=Counter("optimizer_cache_hits_total", "Solves answered from the solution cache", ["tier"]),
+        )
+    return _METRICS
+
+
+def record_solve(mode, result, elapsed, cache_tier=None):
+    """
+    Record one solve_knapsack_from_json call.
+    - mode is the requested solve_mode (bounded label set), status is
+      "success" / "no_solution", plus "cached" for cache hits.
+    - A result whose info says optimal=False counts as a timeout; info["gap"] feeds the gap histogram.
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return
+    m = _metrics()
+    mode = mode if mode in KNOWN_MODES else "other"
+    if cache_tier is not None:
+        m["cache_hits"].labels(tier=cache_tier).inc()
+        m["solves"].labels(mode=mode, status="cached").inc()
+        return
+    m["solves"].labels(mode=mode, status="success" if result else "no_solution").inc()
+    m["latency"].labels(mode=mode).observe(elapsed)
+    info = (result or {}).get("info", {})
+    if info.get("optimal") is False:
+        m["timeouts"].labels(mode=mode).inc()
+    if info.get("gap") is not None:
+        m["gap"].labels(mode=mode).observe(float(info["gap"]))
+
+
+def start_metrics_server(port, addr="0.0.0.0"):
+    """
+    Expose /metrics on the given port. Returns True if the exporter started.
+    With PROMETHEUS_MULTIPROC_DIR set (must exist before workers start), the
+    endpoint aggregates the metrics written by every worker process.
+    """
+    if not PROMETHEUS_AVAILABLE:
+        print("⚠️ prometheus_client not installed; metrics exporter disabled.")
+        return False
+    from prometheus_client import CollectorRegistry, REGISTRY, start_http_server
+    _metrics()
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    start_http_server(port, addr=addr, registry=registry)
+    print(f"📈 Prometheus metrics on http://{addr}:{port}/metrics")
+    return True
@@ -0,0 +1,124 @@
+import io
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Functions listed in the cProfile summary attached to info["profile"]
+PROFILE_TOP = 25
+# Allocation sites listed in the tracemalloc summary
+MEMORY_TOP = 10
+
+_ACTIVE = threading.local()
+
+
+class SolveProfile:
+    """
+    Named phase timings for one solve, plus optional cProfile / tracemalloc capture.
+    - phase(name) accumulates wall-clock seconds; repeated phases add up, nested
+      phases are counted in both the outer and the inner name.
+    - profile: False, "cpu" (cProfile), "memory" (tracemalloc) or True / "all" for both.
+    - summary() returns the dict attached to result["info"].
+    """
+
+    def __init__(self, profile=False):
+        if profile is True:
+            profile = "all"
+        self.cpu = profile in ("cpu", "all")
+        self.memory = profile in ("memory", "all")
+        self.phases = {}
+        self.total = 0.0
+        self._profiler = None
+        self._started_tracing = False
+        self._memory_snapshot = None
+        self._peak = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, name, seconds):
+        """Record a phase measured elsewhere (e.g. a solver's own reported time)."""
+        if seconds is not None:
+            self.phases[name] = self.phases.get(name, 0.0) + float(seconds)
+
+    def start(self):
+        self._start = time.perf_counter()
+        if self.cpu:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.memory:
+            tracemalloc.reset_peak()
+
+    def stop(self):
+        self.total = time.perf_counter() - self._start
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.memory and tracemalloc.is_tracing():
+            self._memory_snapshot = tracemalloc.take_snapshot()
+            self._peak = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+
+    def summary(self):
+        out = {"timings": {name: round(t, 4) for name, t in self.phases.items()}}
+        out["timings"]["total"] = round(self.total, 4)
+        profile = {}
+        if self._profiler is not None:
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            profile["cpu"] = [line for line in stream.getvalue().splitlines() if line.strip()]
+        if self._memory_snapshot is not None:
+            top = self._memory_snapshot.statistics("lineno")[:MEMORY_TOP]
+            profile["memory"] = {
+                "peak_mb": round(self._peak / 2**20, 3),
+                "top": [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                        f"{stat.size / 2**10:.1f} KiB in {stat.count} blocks" for stat in top],
+            }
+        if profile:
+            out["profile"] = profile
+        return out
+
+
+@contextmanager
+def profiled(profile=False):
+    """Make a SolveProfile the active one for this thread while the block runs."""
+    prof = SolveProfile(profile)
+    outer = getattr(_ACTIVE, "profile", None)
+    _ACTIVE.profile = prof
+    prof.start()
+    try:
+        yield prof
+    finally:
+        prof.stop()
+        _ACTIVE.profile = outer
+
+
+def active_profile():
+    return getattr(_ACTIVE, "profile", None)
+
+
+@contextmanager
+def phase(name):
+    """Time a block into the active SolveProfile; a no-op outside profiled()."""
+    prof = active_profile()
+    if prof is None:
+        yield
+        return
+    with prof.phase(name):
+        yield
+
+
+def add_phase(name, seconds):
+    prof = active_profile()
+    if prof is not None:
+        prof.add(name, seconds)
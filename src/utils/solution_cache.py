@@ -0,0 +1,180 @@
+import copy
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_CACHE_DIR = "results/cache"
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_MEMORY_BYTES = 64 * 2**20
+DEFAULT_MAX_DISK_BYTES = 512 * 2**20
+# Disk eviction trims the directory to this fraction of max_disk_bytes, so scans stay rare
+DISK_EVICT_TO = 0.9
+
+# Parameters that control caching or instrumentation and never change the answer
+_NON_SOLVE_PARAMS = {"cache", "cache_dir", "profile"}
+
+
+def instance_key(data):
+    """
+    Canonical hash of everything that determines a solve's answer.
+    Item order, mandatory order and dict key order do not change the key.
+    """
+    if data.get("table") is not None:
+        items = "table:" + data["table"].fingerprint()
+    elif "items" not in data and "columns" in data:
+        items = _columns_digest(data["columns"])
+    else:
+        items = sorted(
+            (
+                str(i["name"]), i["value"], i["weight"], i["cost"], str(i.get("category", "")),
+                sorted(map(str, i.get("dependent", []) or [])), sorted(map(str, i.get("exclusive", []) or [])),
+            )
+            for i in data.get("items", [])
+        )
+    params = {k: v for k, v in data.get("parameters", {}).items() if k not in _NON_SOLVE_PARAMS}
+    canonical = {
+        "items": items,
+        "parameters": params,
+        "mandatory_items": sorted(map(str, data.get("mandatory_items", []) or [])),
+        "category_limits": data.get("category_limits", {}),
+        "solve_mode": data.get("solve_mode", "exact").lower(),
+        "backend": data.get("backend", "auto").lower(),
+    }
+    blob = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _columns_digest(columns):
+    """Hash of a columnar instance's arrays, read straight from the mapped files (item order matters here)."""
+    h = hashlib.sha256()
+    for arr in (columns.names, columns.values, columns.weights, columns.costs, columns.category,
+                columns.dependent, columns.exclusive):
+        h.update(np.ascontiguousarray(arr).data)
+    h.update(json.dumps(columns.categories).encode())
+    return "columns:" + h.hexdigest()
+
+
+class SolutionCache:
+    """
+    Two-tier cache of solve results keyed by instance_key().
+    - Memory tier: LRU bounded by entry count and by serialized size.
+    - Disk tier (optional): one JSON file per key under cache_dir. A running size
+      total per directory (seeded by one scan) is kept; only when it exceeds
+      max_disk_bytes is the directory rescanned and its oldest files evicted.
+      Files other processes add are picked up at that rescan.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 cache_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_entries = max_entries
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (result, size in bytes)
+        self._memory_bytes = 0
+        self._disk_bytes = {}  # cache_dir -> running size total
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, cache_dir=None):
+        """Return (copy of the cached result, tier) or (None, None) on a miss."""
+        cache_dir = cache_dir or self.cache_dir
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            self.stats["memory_hits"] += 1
+            return copy.deepcopy(self._entries[key][0]), "memory"
+
+        if cache_dir:
+            path = os.path.join(cache_dir, f"{key}.json")
+            try:
+                with open(path, "r") as f:
+                    result = json.load(f)
+                os.utime(path)  # refresh recency for disk eviction
+            except (OSError, ValueError):
+                result = None
+            if result is not None:
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                self._put_memory(key, result)
+                return copy.deepcopy(result), "disk"
+
+        self.stats["misses"] += 1
+        return None, None
+
+    def put(self, key, result, cache_dir=None):
+        if result is None:
+            return
+        cache_dir = cache_dir or self.cache_dir
+        result = copy.deepcopy(result)
+        self._put_memory(key, result)
+        if cache_dir:
+            self._put_disk(key, result, cache_dir)
+
+    def _put_memory(self, key, result):
+        size = len(json.dumps(result, default=str))
+        if key in self._entries:
+            self._memory_bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (result, size)
+        self._memory_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self._memory_bytes > self.max_memory_bytes):
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self._memory_bytes -= old_size
+            self.stats["evictions"] += 1
+
+    def _put_disk(self, key, result, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        if cache_dir not in self._disk_bytes:
+            self._disk_bytes[cache_dir] = sum(size for _, size, _ in self._scan_disk(cache_dir))
+        path = os.path.join(cache_dir, f"{key}.json")
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(result, f, default=str)
+        size = os.stat(tmp_path).st_size
+        os.replace(tmp_path, path)  # atomic, safe with concurrent batch workers
+        self._disk_bytes[cache_dir] += size - replaced
+        if self._disk_bytes[cache_dir] > self.max_disk_bytes:
+            self._evict_disk(cache_dir)
+
+    def _scan_disk(self, cache_dir):
+        """(mtime, size, path) of every cache file in cache_dir."""
+        entries = []
+        for name in os.listdir(cache_dir):
+            if name.endswith(".json"):
+                full = os.path.join(cache_dir, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, full))
+        return entries
+
+    def _evict_disk(self, cache_dir):
+        """Remove the oldest files until the directory is back to DISK_EVICT_TO of the cap."""
+        entries = self._scan_disk(cache_dir)
+        total = sum(size for _, size, _ in entries)
+        target = self.max_disk_bytes * DISK_EVICT_TO
+        for _, size, full in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(full)
+            except OSError:
+                pass
+            total -= size
+            self.stats["evictions"] += 1
+        self._disk_bytes[cache_dir] = total
+
+    def clear(self):
+        self._entries.clear()
+        self._memory_bytes = 0
+
+
+# Process-wide cache shared by every solve_knapsack_from_json call
+SOLUTION_CACHE = SolutionCache()
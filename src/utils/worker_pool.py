@@ -0,0 +1,116 @@
+import multiprocessing as mp
+import signal
+from multiprocessing.connection import wait
+
+# Seconds a worker gets to exit on close() before it is killed
+CLOSE_GRACE = 2.0
+
+
+def _worker_loop(conn, initializer, initargs):
+    """Child process: run (fn, args) tasks from the pipe until it is closed or sent None."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is the parent's to handle; it stops the workers
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        fn, args = task
+        try:
+            reply = (True, fn(*args))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        conn.send(reply)
+    conn.close()
+
+
+class Worker:
+    """One long-lived child process with its own pipe; it runs one task at a time."""
+
+    def __init__(self, ctx, initializer=None, initargs=()):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_loop, args=(child_conn, initializer, initargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def send(self, fn, *args):
+        self.conn.send((fn, args))
+
+    def poll(self, timeout=None):
+        """True once the task's reply (or the worker's exit) can be read."""
+        return self.conn.poll(timeout)
+
+    def recv(self):
+        """(ok, result or error message) of the task sent last."""
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError):
+            self.process.join()
+            return False, f"worker exited with code {self.process.exitcode}"
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """
+    Fixed set of long-lived, individually killable worker processes.
+    - Workers keep their imports, warmed backends and in-process caches from one
+      task to the next, like a ProcessPoolExecutor's.
+    - Unlike an executor's, a worker stuck in a task can be killed: replace() kills
+      it and starts a fresh one in its place, so one overrun never holds a slot.
+    - acquire() / release() hand idle workers out; the caller sends one task and
+      reads its reply (Worker.send / poll / recv), or waits on several with wait().
+    - start_method: multiprocessing start method (default: fork where available).
+      A server should use "forkserver": a worker forked from it later would
+      inherit the open client sockets and keep those connections from closing.
+    """
+
+    def __init__(self, workers, initializer=None, initargs=(), start_method=None):
+        methods = mp.get_all_start_methods()
+        self.ctx = mp.get_context(start_method or ("fork" if "fork" in methods else "spawn"))
+        self.initializer = initializer
+        self.initargs = initargs
+        self.idle = [self._start() for _ in range(workers)]
+        self.replaced = 0
+
+    def _start(self):
+        return Worker(self.ctx, self.initializer, self.initargs)
+
+    def acquire(self):
+        """An idle worker (None when all are busy)."""
+        return self.idle.pop() if self.idle else None
+
+    def release(self, worker):
+        self.idle.append(worker)
+
+    def replace(self, worker):
+        """Kill a busy worker (stuck or dead) and put a fresh one in the idle list."""
+        worker.kill()
+        self.replaced += 1
+        self.idle.append(self._start())
+
+    def wait(self, busy, timeout=None):
+        """The workers of `busy` whose reply (or exit) is ready within timeout seconds."""
+        by_conn = {worker.conn: worker for worker in busy}
+        return [by_conn[conn] for conn in wait(list(by_conn), timeout=timeout)]
+
+    def close(self, busy=()):
+        """Stop the idle workers cleanly and kill the busy ones."""
+        for worker in busy:
+            worker.kill()
+        for worker in self.idle:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self.idle:
+            worker.process.join(CLOSE_GRACE)
+            worker.kill()
+        self.idle = []
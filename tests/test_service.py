@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from service import SolveService, MAX_REQUEST_BYTES
+
+INSTANCE = {
+    "solve_mode": "exact",
+    "backend": "dp",
+    "parameters": {"capacity": 10, "budget": 10, "cache": False},
+    "items": [
+        {"name": "a", "value": 6, "weight": 4, "cost": 3},
+        {"name": "b", "value": 5, "weight": 5, "cost": 6},
+        {"name": "c", "value": 4, "weight": 3, "cost": 2},
+    ],
+}
+
+
+def _dp_instance(n, capacity, **fields):
+    """A capacity-only instance for the DP backend, which runs to the end regardless of its timelimit."""
+    rng = np.random.default_rng(0)
+    items = [{"name": f"i{k}", "value": int(v), "weight": int(w), "cost": 1}
+             for k, (v, w) in enumerate(zip(rng.integers(1, 1000, n), rng.integers(1, 8 * capacity // n, n)))]
+    return dict(fields, solve_mode="exact", backend="dp", items=items,
+                parameters={"capacity": capacity, "cache": False, "reduce": False})
+
+
+async def _exchange(service, path, requests):
+    """Start the service on a Unix socket, send the requests as JSON lines and read every record back."""
+    await service.start()
+    server = await asyncio.start_unix_server(service.handle_lines, path=path, limit=MAX_REQUEST_BYTES)
+    try:
+        reader, writer = await asyncio.open_unix_connection(path, limit=MAX_REQUEST_BYTES)
+        for request in requests:
+            writer.write((json.dumps(request) + "\n").encode())
+        writer.write_eof()
+        records = [json.loads(line) async for line in reader]
+        writer.close()
+        return {record["id"]: record for record in records}
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _run(service, path, requests):
+    try:
+        return asyncio.run(asyncio.wait_for(_exchange(service, path, requests), timeout=60))
+    finally:
+        service.close()
+
+
+def test_success(tmp_path):
+    records = _run(SolveService(workers=1), str(tmp_path / "s.sock"),
+                   [dict(INSTANCE, id="r1"), dict(INSTANCE, id="r2")])
+    assert {r["status"] for r in records.values()} == {"success"}
+    assert records["r1"]["result"]["value"] == 11
+    assert sorted(records["r1"]["result"]["selected"]) == ["a", "b"]
+
+
+def test_deadline_kills_stuck_worker(tmp_path):
+    service = SolveService(workers=1)
+    start = time.time()
+    # Seconds of uninterruptible DP against a 0.3 s deadline
+    records = _run(service, str(tmp_path / "s.sock"),
+                   [_dp_instance(5000, 300000, id="stuck", deadline=0.3), dict(INSTANCE, id="next")])
+    assert records["stuck"]["status"] == "timeout"
+    # The only worker was replaced, so the request behind the stuck one is still answered
+    assert records["next"]["status"] == "success"
+    assert service.health()["replaced_workers"] == 1
+    assert time.time() - start < 4
+
+
+def test_backpressure(tmp_path):
+    service = SolveService(workers=1, max_queue=1)
+    requests = [_dp_instance(2000, 100000, id=f"r{k}", deadline=30) for k in range(4)]
+    records = _run(service, str(tmp_path / "s.sock"), requests)
+    # One solving and one queued; the rest are turned away at once
+    assert sorted(r["status"] for r in records.values()) == ["busy", "busy", "success", "success"]
+    assert service.stats["busy"] == 2